@@ -1,6 +1,7 @@
 ## For random paymentid
-import secrets, sha3
+import secrets
 import sys, re
+import functools
 from binascii import hexlify, unhexlify
 from config import config
 import wallet
@@ -24,11 +25,20 @@ ENABLE_COIN = config.Enable_Coin.split(",")
 def cn_fast_hash(s):
     return keccak_256(unhexlify(s))
 
-def keccak_256(s):
-    #return Keccak().Keccak((len(s)*4, s), 1088, 512, 0x01, 32*8, False).lower()
-    k = sha3.keccak_256()
-    k.update(s)
-    return k.hexdigest()
+# keccak from pysha3 (C), or pycryptodome (C) where pysha3 does not build
+try:
+    import sha3
+    def keccak_256(s):
+        #return Keccak().Keccak((len(s)*4, s), 1088, 512, 0x01, 32*8, False).lower()
+        k = sha3.keccak_256()
+        k.update(s)
+        return k.hexdigest()
+except ImportError:
+    from Crypto.Hash import keccak
+    def keccak_256(s):
+        k = keccak.new(digest_bits=256)
+        k.update(s)
+        return k.hexdigest()
 
 def sc_reduce(key):
     return intToHexStr(hexStrToInt(key) % l)
@@ -63,76 +73,32 @@ def _hexToBin(hex):
         return "Hex string has invalid length!"
     return [int(hex[i*2:i*2+2], 16) for i in range(len(hex)//2)]
 
-def _binToHex(bin):
-    return "".join([("0" + hex(int(bin[i])).split('x')[1])[-2:] for i in range(len(bin))])
-
-def _strToBin(a):
-    return [ord(s) for s in a]
-
-def _binToStr(bin):
-    return ''.join([chr(bin[i]) for i in range(len(bin))])
-
-def _uint8be_to_64(data):
-    l_data = len(data)
-
-    if l_data < 1 or l_data > 8:
-        return "Invalid input length"
-
-    res = 0
-    switch = 9 - l_data
-    for i in range(l_data):
-        if switch == 1:
-            res = res << 8 | data[i]
-        elif switch == 2:
-            res = res << 8 | data[i]
-        elif switch == 3:
-            res = res << 8 | data[i]
-        elif switch == 4:
-            res = res << 8 | data[i]
-        elif switch == 5:
-            res = res << 8 | data[i]
-        elif switch == 6:
-            res = res << 8 | data[i]
-        elif switch == 7:
-            res = res << 8 | data[i]
-        elif switch == 8:
-            res = res << 8 | data[i]
-        else:
-            return "Impossible condition"
-    return res
-
-def _uint64_to_8be(num, size):
-    res = [0] * size;
-    if size < 1 or size > 8:
-        return "Invalid input length"
 
-    twopow8 = 2**8
-    for i in range(size-1,-1,-1):
-        res[i] = num % twopow8
-        num = num // twopow8
-
-    return res
+__alphabet_index = {s: i for i, s in enumerate(__alphabet)}
+__alphabet_index.update({chr(s): i for i, s in enumerate(__alphabet)})
+__block_size_by_encoded = {__encodedBlockSizes[i]: i for i in range(len(__encodedBlockSizes))}
 
+# Blocks are converted with int.from_bytes / int.to_bytes instead of
+# byte by byte lists, same output as the MoneroPy routines.
 def encode_block(data, buf, index):
     l_data = len(data)
 
-    if l_data < 1 or l_data > __fullEncodedBlockSize:
-        return "Invalid block length: " + str(l_data)
+    if l_data < 1 or l_data > __fullBlockSize:
+        raise ValueError("Invalid block length: " + str(l_data))
 
-    num = _uint8be_to_64(data)
+    num = int.from_bytes(bytes(data), "big")
     i = __encodedBlockSizes[l_data] - 1
 
     while num > 0:
-        remainder = num % __b58base
-        num = num // __b58base
-        buf[index+i] = __alphabet[remainder];
+        num, remainder = divmod(num, __b58base)
+        buf[index+i] = __alphabet[remainder]
         i -= 1
 
     return buf
 
 def encode(hex):
     '''Encode hexadecimal string as base58 (ex: encoding a Monero address).'''
-    data = _hexToBin(hex)
+    data = unhexlify(hex)
     l_data = len(data)
 
     if l_data == 0:
@@ -142,54 +108,42 @@ def encode(hex):
     last_block_size = l_data % __fullBlockSize
     res_size = full_block_count * __fullEncodedBlockSize + __encodedBlockSizes[last_block_size]
 
-    res = [0] * res_size
-    for i in range(res_size):
-        res[i] = __alphabet[0]
+    res = [__alphabet[0]] * res_size
 
     for i in range(full_block_count):
-        res = encode_block(data[(i*__fullBlockSize):(i*__fullBlockSize+__fullBlockSize)], res, i * __fullEncodedBlockSize)
+        encode_block(data[(i*__fullBlockSize):(i*__fullBlockSize+__fullBlockSize)], res, i * __fullEncodedBlockSize)
 
     if last_block_size > 0:
-        res = encode_block(data[(full_block_count*__fullBlockSize):(full_block_count*__fullBlockSize+last_block_size)], res, full_block_count * __fullEncodedBlockSize)
+        encode_block(data[(full_block_count*__fullBlockSize):(full_block_count*__fullBlockSize+last_block_size)], res, full_block_count * __fullEncodedBlockSize)
 
-    return _binToStr(res)
+    return bytes(res).decode('latin-1')
 
 def decode_block(data, buf, index):
     l_data = len(data)
 
     if l_data < 1 or l_data > __fullEncodedBlockSize:
-        return "Invalid block length: " + l_data
+        raise ValueError("Invalid block length: " + str(l_data))
 
-    res_size = __encodedBlockSizes.index(l_data)
+    res_size = __block_size_by_encoded.get(l_data, 0)
     if res_size <= 0:
-        return "Invalid block size"
+        raise ValueError("Invalid block size")
 
     res_num = 0
-    order = 1
-    for i in range(l_data-1, -1, -1):
-        digit = __alphabet.index(data[i])
-        if digit < 0:
-            return "Invalid symbol"
-
-        product = order * digit + res_num
-        if product > __UINT64MAX:
-            return "Overflow"
+    for each in data:
+        # KeyError for invalid symbol
+        res_num = res_num * __b58base + __alphabet_index[each]
 
-        res_num = product
-        order = order * __b58base
+    if res_num > __UINT64MAX:
+        raise ValueError("Overflow")
 
     if res_size < __fullBlockSize and 2**(8 * res_size) <= res_num:
-        return "Overflow 2"
-
-    tmp_buf = _uint64_to_8be(res_num, res_size)
-    for i in range(len(tmp_buf)):
-        buf[i+index] = tmp_buf[i]
+        raise ValueError("Overflow 2")
 
+    buf[index:index+res_size] = res_num.to_bytes(res_size, "big")
     return buf
 
 def decode(enc):
     '''Decode a base58 string (ex: a Monero address) into hexidecimal form.'''
-    enc = _strToBin(enc)
     l_enc = len(enc)
 
     if l_enc == 0:
@@ -197,21 +151,20 @@ def decode(enc):
 
     full_block_count = l_enc // __fullEncodedBlockSize
     last_block_size = l_enc % __fullEncodedBlockSize
-    last_block_decoded_size = __encodedBlockSizes.index(last_block_size)
-
-    if last_block_decoded_size < 0:
-        return "Invalid encoded length"
+    if last_block_size not in __block_size_by_encoded:
+        raise ValueError("Invalid encoded length")
+    last_block_decoded_size = __block_size_by_encoded[last_block_size]
 
     data_size = full_block_count * __fullBlockSize + last_block_decoded_size
 
-    data = [0] * data_size
+    data = bytearray(data_size)
     for i in range(full_block_count):
-        data = decode_block(enc[(i*__fullEncodedBlockSize):(i*__fullEncodedBlockSize+__fullEncodedBlockSize)], data, i * __fullBlockSize)
+        decode_block(enc[(i*__fullEncodedBlockSize):(i*__fullEncodedBlockSize+__fullEncodedBlockSize)], data, i * __fullBlockSize)
 
     if last_block_size > 0:
-        data = decode_block(enc[(full_block_count*__fullEncodedBlockSize):(full_block_count*__fullEncodedBlockSize+last_block_size)], data, full_block_count * __fullBlockSize)
+        decode_block(enc[(full_block_count*__fullEncodedBlockSize):(full_block_count*__fullEncodedBlockSize+last_block_size)], data, full_block_count * __fullBlockSize)
 
-    return _binToHex(data)
+    return hexlify(data).decode('latin-1')
 
 """Varint encoder/decoder
 
@@ -244,6 +197,16 @@ def varint_encode(number):
     return buf
 
 
+def varint_decode(data):
+    """Unpack varint from start of `data`, return (number, bytes used)"""
+    number = 0
+    for i, each in enumerate(data):
+        number |= (each & 0x7f) << (7 * i)
+        if each & 0x80 == 0:
+            return number, i + 1
+    raise ValueError("Truncated varint")
+
+
 def hexStrToInt(h):
     '''Converts a hexidecimal string to an integer.'''
     return int.from_bytes(unhexlify(h), "little")
@@ -275,7 +238,11 @@ def make_integrated_cn(wallet_address, coin, integrated_id=None):
         return None
 
 
+# Recent validation results, an address is usually checked several times per command
+VALIDATE_CACHE_SIZE = 4096
+
 # Validate address:
+@functools.lru_cache(maxsize=VALIDATE_CACHE_SIZE)
 def validate_address(wallet_address, coin: str):
     prefix=wallet.get_prefix(coin.upper())
     prefix_hex=varint_encode(prefix).hex()
@@ -309,6 +276,13 @@ def validate_address(wallet_address, coin: str):
 
 # Validate address:
 def validate_integrated(wallet_address, coin: str):
+    result = _validate_integrated(wallet_address, coin)
+    # Caller gets its own copy of the cached dict
+    return dict(result) if isinstance(result, dict) else result
+
+
+@functools.lru_cache(maxsize=VALIDATE_CACHE_SIZE)
+def _validate_integrated(wallet_address, coin: str):
     prefix=wallet.get_prefix(coin.upper())
     prefix_hex=varint_encode(prefix).hex()
     int_address_len=wallet.get_intaddrlen(coin.upper())
@@ -382,6 +356,31 @@ def make_integrated(wallet_address, coin: str, integrated_id=None):
         pass
 
 
+# Monero family integrated address: varint(integrated prefix) + public spend key + public view key
+# + 8 bytes payment id + 4 bytes keccak checksum, base58 encoded like the standard address.
+def make_integrated_xmr(wallet_address: str, int_prefix: int, payment_id: str=None):
+    if payment_id is None:
+        payment_id = paymentid(8)
+    try:
+        data = unhexlify(decode(wallet_address))
+        prefix, prefix_len = varint_decode(data)
+        keys = data[prefix_len:prefix_len+64]
+        if len(keys) != 64 or len(payment_id) != 16:
+            return None
+        data = varint_encode(int_prefix) + keys + unhexlify(payment_id)
+        checksum = keccak_256(data)[0:8]
+        return {'integrated_address': encode(hexlify(data).decode() + checksum), 'payment_id': payment_id}
+    except Exception as e:
+        return None
+
+
+def integrated_prefix_xmr(integrated_address: str):
+    try:
+        return varint_decode(unhexlify(decode(integrated_address)))[0]
+    except Exception as e:
+        return None
+
+
 ## make random paymentid:
 def paymentid(length=None):
     if length is None:
@@ -12,6 +12,7 @@ import simplejson as json
 import pyotp
 
 import store, daemonrpc_client, addressvalidation, addressvalidation_xch, walletapi, coin360, chart_pair_snapshot
+from db_pool import background_job
 
 from generic_xmr.address_msr import address_msr as address_msr
 from generic_xmr.address_xmr import address_xmr as address_xmr
@@ -51,6 +52,13 @@ from decimal import Decimal
 
 # tb
 from tb.tbfun import action as tb_action
+
+# raffle
+from raffle_scheduler import RaffleScheduler
+from interaction import InteractionRegistry
+from leader import RedisLeader, RedisUserSet, UserBusy
+from jobs import JobRegistry
+
 # byte-oriented StringIO was moved to io.BytesIO in py3k
 try:
     from io import BytesIO
@@ -127,6 +135,10 @@ NOTIFY_TRADE_CHAN = config.discord.channelNotify
 WALLET_SERVICE = None
 LIST_IGNORECHAN = None
 MUTE_CHANNEL = None
+# guild_id => command prefix, dropped when prefix is changed
+GUILD_PREFIX = {}
+# messages for talker tips waiting to be pushed to redis by flush_msg_redis
+MSG_REDIS_BUFFER = []
 
 # param introduce by @bobbieltd
 TX_IN_PROCESS = []
@@ -209,11 +221,26 @@ CHART_TRADEVIEW_IN_PROCESS = []
 GAME_INTERACTIVE_ECO = []
 # miningpoolstat_progress
 MINGPOOLSTAT_IN_PROCESS = []
+# coin => in-flight miningpoolstats fetch
+MININGPOOLSTAT_FETCHING = {}
+MININGPOOLSTAT_SESSION = None
+# cached pool data is served stale up to this long while it is refreshed
+MININGPOOLSTAT_STALE = int(getattr(config.miningpoolstat, "stale", 24*3600))
 # raffle queue join
 GAME_RAFFLE_QUEUE = []
 
+# guild_id => counters, kept from member/presence/channel events
+GUILD_STATS = {}
+# guild_id changed since last flush
+GUILD_STATS_CHANGED = set()
+# guild_id => set of online non-bot member ids, for tipall online
+GUILD_ONLINE_MEMBERS = {}
+
 # save all temporary
 SAVING_ALL = None
+# coin => wallet height/balance at last auto-save, and auto-save counters
+WALLET_SAVE_FINGERPRINT = {}
+WALLET_SAVE_STATS = {}
 
 # disclaimer message
 DISCLAIM_MSG = """Disclaimer: No warranty or guarantee is provided, expressed, or implied \
@@ -442,6 +469,15 @@ def openRedis():
             traceback.print_exc(file=sys.stdout)
 
 
+def interaction_redis():
+    openRedis()
+    return redis_conn
+
+
+# message id => pending interactive session, see interaction.py
+INTERACTION = InteractionRegistry(interaction_redis)
+
+
 def get_round_amount(coin: str, amount: int):
     COIN_NAME = coin.upper()
     if COIN_NAME in ROUND_AMOUNT_COIN:
@@ -483,6 +519,9 @@ async def get_prefix(bot, message):
         extras = [pre_cmd, 'tb!', 'tipbot!', '?', '.', '+', '!', '-']
         return when_mentioned_or(*extras)(bot, message)
 
+    if message.guild.id in GUILD_PREFIX:
+        return when_mentioned_or(GUILD_PREFIX[message.guild.id], 'tb!', 'tipbot!')(bot, message)
+
     serverinfo = await store.sql_info_by_server(str(message.guild.id))
     if serverinfo is None:
         # Let's add some info if guild return None
@@ -492,6 +531,7 @@ async def get_prefix(bot, message):
         serverinfo = await store.sql_info_by_server(str(message.guild.id))
     if serverinfo and ('prefix' in serverinfo):
         pre_cmd = serverinfo['prefix']
+        GUILD_PREFIX[message.guild.id] = pre_cmd
     else:
         pre_cmd =  config.discord.prefixCmd
     extras = [pre_cmd, 'tb!', 'tipbot!']
@@ -514,7 +554,36 @@ intents = discord.Intents.default()
 intents.members = True
 intents.presences = True
 
-bot = AutoShardedBot(command_prefix = get_prefix, case_insensitive=True, owner_id = OWNER_ID_TIPBOT, pm_help = True, intents=intents)
+# Multi-process mode, set by bot_shards.py: this process runs shards TIPBOT_SHARD_IDS
+# (like 0-3 or 0,2) of TIPBOT_SHARD_COUNT. TIPBOT_SCANNERS=0 keeps it out of the
+# election for the background scanners.
+def parse_shard_ids(shard_ids: str):
+    ids = []
+    for each in shard_ids.split(","):
+        if "-" in each:
+            first, last = each.split("-")
+            ids += list(range(int(first), int(last) + 1))
+        elif len(each.strip()) > 0:
+            ids.append(int(each))
+    return ids
+
+SHARD_IDS = parse_shard_ids(os.environ["TIPBOT_SHARD_IDS"]) if os.environ.get("TIPBOT_SHARD_IDS") else None
+SHARD_COUNT = int(os.environ["TIPBOT_SHARD_COUNT"]) if SHARD_IDS else None
+RUN_SCANNERS = os.environ.get("TIPBOT_SCANNERS", "1") != "0"
+# fetch users and guilds missing from cache over REST, bot_worker.py turns it on
+REST_LOOKUP = SHARD_IDS is not None
+# id of the bot account, set by bot_worker.py which never connects to the gateway
+BOT_USER_ID = None
+# one user can not run balance changing commands in two shard workers at once
+if SHARD_IDS:
+    TX_IN_PROCESS = RedisUserSet(interaction_redis, "TIPBOT:TX_IN_PROCESS", int(getattr(config, "tx_lock_ttl", config.freetip.duration_max + 600)))
+WORKER_NAME = "shards_{}".format("_".join([str(i) for i in SHARD_IDS])) if SHARD_IDS else "main"
+
+if SHARD_IDS:
+    bot = AutoShardedBot(command_prefix = get_prefix, case_insensitive=True, owner_id = OWNER_ID_TIPBOT, pm_help = True, intents=intents,
+                         shard_ids=SHARD_IDS, shard_count=SHARD_COUNT)
+else:
+    bot = AutoShardedBot(command_prefix = get_prefix, case_insensitive=True, owner_id = OWNER_ID_TIPBOT, pm_help = True, intents=intents)
 bot.remove_command('help')
 
 
@@ -530,6 +599,32 @@ async def logchanbot(content: str):
         traceback.print_exc(file=sys.stdout)
 
 
+# Background scanners run in one worker or in bot_worker.py, users and guilds of other
+# shards are not in its cache and are fetched over REST.
+async def find_user(user_id: int):
+    user = bot.get_user(id=user_id)
+    if user is None and REST_LOOKUP:
+        try:
+            user = await bot.fetch_user(user_id)
+        except (discord.errors.NotFound, discord.errors.HTTPException) as e:
+            user = None
+    return user
+
+
+def bot_user_id():
+    return bot.user.id if bot.user else BOT_USER_ID
+
+
+async def find_guild(guild_id: int):
+    guild = bot.get_guild(id=guild_id)
+    if guild is None and REST_LOOKUP:
+        try:
+            guild = await bot.fetch_guild(guild_id)
+        except (discord.errors.NotFound, discord.errors.Forbidden, discord.errors.HTTPException) as e:
+            guild = None
+    return guild
+
+
 @bot.event
 async def on_ready():
     global LIST_IGNORECHAN, MUTE_CHANNEL, IS_RESTARTING, BOT_INVITELINK, HANGMAN_WORDS
@@ -559,6 +654,8 @@ async def on_shard_ready(shard_id):
 
 @bot.event
 async def on_guild_join(guild):
+    guild_stats_count(guild)
+    GUILD_PREFIX.pop(guild.id, None)
     botLogChan = bot.get_channel(id=LOG_CHAN)
     add_server_info = await store.sql_addinfo_by_server(str(guild.id), guild.name,
                                                         config.discord.prefixCmd, "WRKZ", True)
@@ -568,6 +665,8 @@ async def on_guild_join(guild):
 
 @bot.event
 async def on_guild_remove(guild):
+    GUILD_STATS.pop(guild.id, None)
+    GUILD_ONLINE_MEMBERS.pop(guild.id, None)
     botLogChan = bot.get_channel(id=LOG_CHAN)
     add_server_info = await store.sql_updateinfo_by_server(str(guild.id), "status", "REMOVED")
     await botLogChan.send(f'Bot was removed from guild {guild.name} / {guild.id}. Total guilds: {len(bot.guilds)}')
@@ -580,6 +679,8 @@ async def on_raw_reaction_add(payload):
     if payload.guild_id is None:
         return  # Reaction is on a private message
     """Handle a reaction add."""
+    if await INTERACTION.dispatch_reaction(payload):
+        return
     try:
         emoji_partial = str(payload.emoji)
         message_id = payload.message_id
@@ -683,7 +784,7 @@ async def on_reaction_add(reaction, user):
                 else:
                     actual_balance = int(xfer_in) + int(userdata_balance['Adjust'])
 
-                coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+                coin_family = get_coin_family(COIN_NAME)
                 # Negative check
                 try:
                     if actual_balance < 0:
@@ -896,38 +997,36 @@ async def on_reaction_add(reaction, user):
 @bot.event
 async def on_message(message):
     global LIST_IGNORECHAN, MUTE_CHANNEL
+    in_guild = message.guild is not None
     # should ignore webhook message
-    if isinstance(message.channel, discord.DMChannel) == False and message.webhook_id:
+    if in_guild and message.webhook_id:
         return
 
-    if isinstance(message.channel, discord.DMChannel) == False and message.author.bot == False and len(message.content) > 0 and message.author != bot.user:
-        if config.Enable_Message_Logging == 1:
-            await add_msg_redis(json.dumps([str(message.guild.id), message.guild.name, str(message.channel.id), message.channel.name, 
-                                             str(message.author.id), message.author.name, str(message.id), message.content, int(time.time())]), False)
-        else:
-            await add_msg_redis(json.dumps([str(message.guild.id), message.guild.name, str(message.channel.id), message.channel.name, 
-                                             str(message.author.id), message.author.name, str(message.id), '', int(time.time())]), False)
+    guild_id = str(message.guild.id) if in_guild else None
+    channel_id = str(message.channel.id)
+    muted = in_guild and MUTE_CHANNEL and guild_id in MUTE_CHANNEL and channel_id in MUTE_CHANNEL[guild_id]
+    ignored = in_guild and LIST_IGNORECHAN and guild_id in LIST_IGNORECHAN and channel_id in LIST_IGNORECHAN[guild_id]
+
+    # talker tips can not be called in muted or ignored channel, no need to keep those messages
+    if in_guild and not muted and not ignored and message.author.bot == False and len(message.content) > 0 and message.author != bot.user:
+        MSG_REDIS_BUFFER.append([guild_id, message.guild.name, channel_id, message.channel.name,
+                                 str(message.author.id), message.author.name, str(message.id),
+                                 message.content if config.Enable_Message_Logging == 1 else '', int(time.time())])
 
     # mute channel
-    if isinstance(message.channel, discord.DMChannel) == False and MUTE_CHANNEL and str(message.guild.id) in MUTE_CHANNEL:
-        if str(message.channel.id) in MUTE_CHANNEL[str(message.guild.id)] and message.content[1:].upper() != "SETTING UNMUTE":
-            # Ignore
-            return
+    if muted and message.content[1:].upper() != "SETTING UNMUTE":
+        # Ignore
+        return
 
     # filter ignorechan
     commandList = ('TIP', 'TIPALL', 'DONATE', 'HELP', 'DONATE', 'SEND', 'WITHDRAW', 'BOTBAL', 'BAL PUB', 'GAME')
-    try:
-        # remove first char
-        if LIST_IGNORECHAN:
-            if isinstance(message.channel, discord.DMChannel) == False and str(message.guild.id) in LIST_IGNORECHAN:
-                if message.content[1:].upper().startswith(commandList) \
-                    and (str(message.channel.id) in LIST_IGNORECHAN[str(message.guild.id)]):
-                    await message.add_reaction(EMOJI_ERROR)
-                    await message.channel.send(f'Bot not respond to #{message.channel.name}. It is set to ignore list by channel manager or discord server owner.')
-                    return
-    except Exception as e:
-        await logchanbot(traceback.format_exc())
-        pass
+    if ignored and message.content[1:].upper().startswith(commandList):
+        try:
+            await message.add_reaction(EMOJI_ERROR)
+            await message.channel.send(f'Bot not respond to #{message.channel.name}. It is set to ignore list by channel manager or discord server owner.')
+        except Exception as e:
+            await logchanbot(traceback.format_exc())
+        return
 
     # Do not remove this, otherwise, command not working.
     ctx = await bot.get_context(message)
@@ -2269,7 +2368,7 @@ Rules:
     elif COIN_NAME in ENABLE_COIN_ERC:
         coin_family = "TRC-20"
     else:
-        coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+        coin_family = get_coin_family(COIN_NAME)
     real_amount = int(amount * get_decimal(COIN_NAME)) if coin_family in ["BCN", "XMR", "TRTL", "NANO", "XCH"] else float(amount)
     result = f'You got reward of **{num_format_coin(real_amount, COIN_NAME)} {COIN_NAME}** to Tip balance!'
     if free_game == True:
@@ -2405,7 +2504,7 @@ async def slot(ctx):
                 elif COIN_NAME in ENABLE_COIN_TRC:
                     coin_family = "TRC-20"
                 else:
-                    coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+                    coin_family = get_coin_family(COIN_NAME)
                 real_amount = int(amount * get_decimal(COIN_NAME)) if coin_family in ["BCN", "XMR", "TRTL", "NANO", "XCH"] else float(amount)
                 reward = await store.sql_game_add(slotOutput, str(ctx.message.author.id), COIN_NAME, 'WIN', real_amount, get_decimal(COIN_NAME), str(ctx.guild.id), 'SLOT', int(time.time()) - time_start, SERVER_BOT)
                 result = f'You won! {ctx.author.mention} got reward of **{num_format_coin(real_amount, COIN_NAME)} {COIN_NAME}** to Tip balance!'
@@ -2611,7 +2710,7 @@ clues would be Fermi Pico.'''.format(NUM_DIGITS)
                                 elif COIN_NAME in ENABLE_COIN_TRC:
                                     coin_family = "TRC-20"
                                 else:
-                                    coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+                                    coin_family = get_coin_family(COIN_NAME)
                                 real_amount = int(amount * get_decimal(COIN_NAME)) if coin_family in ["BCN", "XMR", "TRTL", "NANO", "XCH"] else float(amount)
                                 reward = await store.sql_game_add(str(secretNum), str(ctx.message.author.id), COIN_NAME, 'WIN', real_amount, get_decimal(COIN_NAME), str(ctx.guild.id), 'BAGEL', int(time.time()) - time_start, SERVER_BOT)
                                 result = f'{ctx.author.mention} got reward of **{num_format_coin(real_amount, COIN_NAME)} {COIN_NAME}** to Tip balance!'
@@ -2838,7 +2937,7 @@ Hints:
                                 elif COIN_NAME in ENABLE_COIN_TRC:
                                     coin_family = "TRC-20"
                                 else:
-                                    coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+                                    coin_family = get_coin_family(COIN_NAME)
                                 real_amount = int(amount * get_decimal(COIN_NAME)) if coin_family in ["BCN", "XMR", "TRTL", "NANO", "XCH"] else float(amount)
                                 reward = await store.sql_game_add(str(secretNum), str(ctx.message.author.id), COIN_NAME, 'WIN', real_amount, get_decimal(COIN_NAME), str(ctx.guild.id), 'BAGEL', int(time.time()) - time_start, SERVER_BOT)
                                 result = f'{ctx.author.mention} got reward of **{num_format_coin(real_amount, COIN_NAME)} {COIN_NAME}** to Tip balance!'
@@ -3073,7 +3172,7 @@ Hints:
                                 elif COIN_NAME in ENABLE_COIN_TRC:
                                     coin_family = "TRC-20"
                                 else:
-                                    coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+                                    coin_family = get_coin_family(COIN_NAME)
                                 real_amount = int(amount * get_decimal(COIN_NAME)) if coin_family in ["BCN", "XMR", "TRTL", "NANO", "XCH"] else float(amount)
                                 reward = await store.sql_game_add(str(secretNum), str(ctx.message.author.id), COIN_NAME, 'WIN', real_amount, get_decimal(COIN_NAME), str(ctx.guild.id), 'BAGEL', int(time.time()) - time_start, SERVER_BOT)
                                 result = f'{ctx.author.mention} got reward of **{num_format_coin(real_amount, COIN_NAME)} {COIN_NAME}** to Tip balance!'
@@ -3319,7 +3418,7 @@ async def maze(ctx):
             elif COIN_NAME in ENABLE_COIN_TRC:
                 coin_family = "TRC-20"
             else:
-                coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+                coin_family = get_coin_family(COIN_NAME)
             real_amount = int(amount * get_decimal(COIN_NAME)) if coin_family in ["BCN", "XMR", "TRTL", "NANO", "XCH"] else float(amount)
             result = f'You got reward of **{num_format_coin(real_amount, COIN_NAME)} {COIN_NAME}** to Tip balance!'
             if free_game == True:
@@ -3498,7 +3597,7 @@ async def hangman(ctx):
                         elif COIN_NAME in ENABLE_COIN_TRC:
                             coin_family = "TRC-20"
                         else:
-                            coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+                            coin_family = get_coin_family(COIN_NAME)
                         real_amount = int(amount * get_decimal(COIN_NAME)) if coin_family in ["BCN", "XMR", "TRTL", "NANO", "XCH"] else float(amount)
                         reward = await store.sql_game_add(secretWord, str(ctx.message.author.id), COIN_NAME, 'WIN', real_amount, get_decimal(COIN_NAME), str(ctx.guild.id), 'HANGMAN', int(time.time()) - time_start, SERVER_BOT)
                         result = f'{ctx.author.mention} got reward of **{num_format_coin(real_amount, COIN_NAME)} {COIN_NAME}** to Tip balance!'
@@ -3678,7 +3777,7 @@ To win, you must continue rolling the dice until you "make your point."
                     elif COIN_NAME in ENABLE_COIN_TRC:
                         coin_family = "TRC-20"
                     else:
-                        coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+                        coin_family = get_coin_family(COIN_NAME)
                     real_amount = int(amount * get_decimal(COIN_NAME)) if coin_family in ["BCN", "XMR", "TRTL", "NANO", "XCH"] else float(amount)
                     reward = await store.sql_game_add('{}:{}:{}:{}'.format(dice_time, sum_dice, dice1, dice2), str(ctx.message.author.id), COIN_NAME, 'WIN', real_amount, get_decimal(COIN_NAME), str(ctx.guild.id), 'DICE', int(time.time()) - time_start, SERVER_BOT)
                     result = f'You won! {ctx.author.mention} got reward of **{num_format_coin(real_amount, COIN_NAME)} {COIN_NAME}** to Tip balance!'
@@ -3865,7 +3964,7 @@ async def snail(ctx, bet_numb: str=None):
                                         elif COIN_NAME in ENABLE_COIN_TRC:
                                             coin_family = "TRC-20"
                                         else:
-                                            coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+                                            coin_family = get_coin_family(COIN_NAME)
                                         real_amount = int(amount * get_decimal(COIN_NAME)) if coin_family in ["BCN", "XMR", "TRTL", "NANO", "XCH"] else float(amount)
                                         reward = await store.sql_game_add('BET:#{}/WINNER:{}'.format(your_snail, randomSnailName), str(ctx.message.author.id), COIN_NAME, 'WIN', real_amount, get_decimal(COIN_NAME), str(ctx.guild.id), 'SNAIL', int(time.time()) - time_start, SERVER_BOT)
                                         result = f'You won **snail#{str(your_snail)}**! {ctx.author.mention} got reward of **{num_format_coin(real_amount, COIN_NAME)} {COIN_NAME}** to Tip balance!'
@@ -4114,7 +4213,7 @@ You lose if the board fills up the tiles before then.'''
                 elif COIN_NAME in ENABLE_COIN_TRC:
                     coin_family = "TRC-20"
                 else:
-                    coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+                    coin_family = get_coin_family(COIN_NAME)
                 real_amount = int(amount * get_decimal(COIN_NAME)) if coin_family in ["BCN", "XMR", "TRTL", "NANO", "XCH"] else float(amount)
                 result = f'You got reward of **{num_format_coin(real_amount, COIN_NAME)} {COIN_NAME}** to Tip balance!'
                 duration = seconds_str(int(time.time()) - time_start)
@@ -4620,7 +4719,7 @@ respectively. You can also reload game level.'''
                             elif COIN_NAME in ENABLE_COIN_TRC:
                                 coin_family = "TRC-20"
                             else:
-                                coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+                                coin_family = get_coin_family(COIN_NAME)
                             real_amount = int(amount * get_decimal(COIN_NAME)) if coin_family in ["BCN", "XMR", "TRTL", "NANO", "XCH"] else float(amount)
                             reward = await store.sql_game_add(str(level), str(ctx.message.author.id), COIN_NAME, 'WIN', real_amount, get_decimal(COIN_NAME), str(ctx.guild.id), 'SOKOBAN', int(time.time()) - time_start, SERVER_BOT)
                             result = f'You won! {ctx.author.mention} got reward of **{num_format_coin(real_amount, COIN_NAME)} {COIN_NAME}** to Tip balance!'
@@ -5166,7 +5265,7 @@ async def credit(ctx, amount: str, coin: str, to_userid: str):
     coin_family = None
     wallet = None
     try:
-        coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+        coin_family = get_coin_family(COIN_NAME)
     except Exception as e:
         await logchanbot(traceback.format_exc())
         await ctx.send(f'{EMOJI_RED_NO} {ctx.author.mention} **INVALID TICKER**')
@@ -5814,7 +5913,7 @@ and len(GAME_INTERACTIVE_ECO) == 0:
         except Exception as e:
             traceback.print_exc(file=sys.stdout)
             await logchanbot(traceback.format_exc())
-        TX_IN_PROCESS = [] 
+        TX_IN_PROCESS.clear()
         GAME_INTERACTIVE_PRGORESS = []
         GAME_SLOT_IN_PRGORESS = []
         GAME_DICE_IN_PRGORESS = []
@@ -8100,7 +8199,7 @@ async def deposit(ctx, amount: str, coin: str):
     elif COIN_NAME in ENABLE_COIN_TRC:
         coin_family = "TRC-20"
     else:
-        coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+        coin_family = get_coin_family(COIN_NAME)
     # Check allowed coins
     tiponly_coins = serverinfo['tiponly'].split(",")
     if COIN_NAME == serverinfo['default_coin'].upper() or serverinfo['tiponly'].upper() == "ALLCOIN":
@@ -8336,7 +8435,7 @@ async def createraffle(ctx, amount: str, coin: str, duration: str):
         token_info = await store.get_token_info(COIN_NAME)
         decimal_pts = token_info['token_decimal']
     else:
-        coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+        coin_family = get_coin_family(COIN_NAME)
         decimal_pts = int(math.log10(get_decimal(COIN_NAME)))
 
     if coin_family == "ERC-20" or coin_family == "TRC-20":
@@ -8393,6 +8492,9 @@ async def createraffle(ctx, amount: str, coin: str, duration: str):
                 insert_raffle = await store.raffle_insert_new(str(ctx.guild.id), ctx.guild.name, real_amount, decimal_pts, COIN_NAME,
                                                               str(ctx.author.id), '{}#{}'.format(ctx.author.name, ctx.author.discriminator), 
                                                               start_ts, start_ts+duration_in_s, SERVER_BOT)
+                if insert_raffle:
+                    get_raffle = await store.raffle_get_from_guild(str(ctx.guild.id), False, SERVER_BOT)
+                    if get_raffle: raffle_schedule_row(get_raffle)
                 await logchanbot(message_raffle)
             except Exception as e:
                 await ctx.message.add_reaction(EMOJI_ZIPPED_MOUTH)
@@ -8579,162 +8681,207 @@ async def raffle(ctx, subc: str=None):
             await ctx.send(f'{EMOJI_RED_NO} {ctx.author.mention} There is no information of current raffle yet!')
             return
 
-async def check_raffle_status():
-    time_lap = 20 # seconds
-    announce_lap = 3600 # seconds
+async def process_raffle_id(raffle_id: int):
+    # Called by raffle_sched at the raffle deadline. Returns next deadline, RaffleScheduler.DONE when the
+    # raffle is completed or cancelled, or None to retry soon (raffle_sched re-reads the status then).
     to_close_fromopen = 300 # second
-    while not bot.is_closed():
-        await asyncio.sleep(time_lap)
-        # Announce every announce_lap in raffle channel if there is any raffle opened
-        # Get all list of raffle
-        # Change guild_raffle status from OPENED to ONGOING (1h) if less than 1h to start
-        # Change guild_raffle status from ONGOING to CANCELLED if less than 3 users registered, => change `guild_raffle_entries` status to CANCELLED
-        # Change guild_raffle status from ONGOING to COMPLETED, random users for winner and update => 
-        #       winner_userid_1st	varchar(32) NULL	
-        #       winner_name_1st	varchar(64) NULL	
-        #       winner_1st_amount	decimal(64,20) NULL	
-        #       winner_userid_2nd	varchar(32) NULL	
-        #       winner_name_2nd	varchar(64) NULL	
-        #       winner_2nd_amount	decimal(64,20) NULL	
-        #       winner_userid_3rd	varchar(32) NULL	
-        #       winner_name_3rd	varchar(64) NULL	
-        #       winner_3rd_amount	decimal(64,20) NULL	
-        #       raffle_fund_pot	decimal(64,20) NULL
-        # Try DM user if they are winner, and if they are loser
-        get_all_active_raffle = await store.raffle_get_all(SERVER_BOT)
-        if get_all_active_raffle and len(get_all_active_raffle) > 0:
-            for each_raffle in get_all_active_raffle:
-                # loop each raffle
-                try:
-                    if each_raffle['status'] == "OPENED":
-                        if each_raffle['ending_ts'] - to_close_fromopen < int(time.time()):
-                            # less than 3 participants, cancel
-                            list_raffle_id = await store.raffle_get_from_by_id(each_raffle['id'], SERVER_BOT, None)
-                            if (list_raffle_id and list_raffle_id['entries'] and len(list_raffle_id['entries']) < 3) or \
-                            (list_raffle_id and list_raffle_id['entries'] is None):
-                                # Cancel game
-                                cancelled_status = await store.raffle_cancel_id(each_raffle['id'])
-                                msg_raffle = "Cancelled raffle #{} in guild {}: **Shortage of users**. User entry fee refund!".format(each_raffle['id'], each_raffle['guild_name'])
-                                serverinfo = await store.sql_info_by_server(each_raffle['guild_id'])
-                                if serverinfo['raffle_channel']:
-                                    raffle_chan = bot.get_channel(id=int(serverinfo['raffle_channel']))
-                                    if raffle_chan:
-                                        await raffle_chan.send(msg_raffle)
-                                await logchanbot(msg_raffle)                                
+    # Announce every announce_lap in raffle channel if there is any raffle opened
+    # Get all list of raffle
+    # Change guild_raffle status from OPENED to ONGOING (1h) if less than 1h to start
+    # Change guild_raffle status from ONGOING to CANCELLED if less than 3 users registered, => change `guild_raffle_entries` status to CANCELLED
+    # Change guild_raffle status from ONGOING to COMPLETED, random users for winner and update => 
+    #       winner_userid_1st	varchar(32) NULL	
+    #       winner_name_1st	varchar(64) NULL	
+    #       winner_1st_amount	decimal(64,20) NULL	
+    #       winner_userid_2nd	varchar(32) NULL	
+    #       winner_name_2nd	varchar(64) NULL	
+    #       winner_2nd_amount	decimal(64,20) NULL	
+    #       winner_userid_3rd	varchar(32) NULL	
+    #       winner_name_3rd	varchar(64) NULL	
+    #       winner_3rd_amount	decimal(64,20) NULL	
+    #       raffle_fund_pot	decimal(64,20) NULL
+    # Try DM user if they are winner, and if they are loser
+    each_raffle = await store.raffle_get_from_by_id(raffle_id, SERVER_BOT, None)
+    if each_raffle is None:
+        return None
+    try:
+        if each_raffle['status'] == "OPENED":
+            if each_raffle['ending_ts'] - to_close_fromopen > raffle_sched.clock():
+                return each_raffle['ending_ts'] - to_close_fromopen
+            else:
+                # less than 3 participants, cancel
+                list_raffle_id = each_raffle
+                if (list_raffle_id and list_raffle_id['entries'] and len(list_raffle_id['entries']) < 3) or \
+                (list_raffle_id and list_raffle_id['entries'] is None):
+                    # Cancel game
+                    cancelled_status = await store.raffle_cancel_id(each_raffle['id'], each_raffle['coin_name'])
+                    if not cancelled_status:
+                        await logchanbot("Raffle #{} was not cancelled, checking its status again.".format(each_raffle['id']))
+                        return None
+                    msg_raffle = "Cancelled raffle #{} in guild {}: **Shortage of users**. User entry fee refund!".format(each_raffle['id'], each_raffle['guild_name'])
+                    serverinfo = await store.sql_info_by_server(each_raffle['guild_id'])
+                    if serverinfo['raffle_channel']:
+                        raffle_chan = bot.get_channel(id=int(serverinfo['raffle_channel']))
+                        if raffle_chan:
+                            await raffle_chan.send(msg_raffle)
+                    await logchanbot(msg_raffle)
+                    return RaffleScheduler.DONE
+                else:
+                    # change status from Open to ongoing
+                    update_status = await store.raffle_update_id(each_raffle['id'], 'ONGOING', None, None)
+                    if update_status:
+                        msg_raffle = "Changed raffle #{} status to **ONGOING** in guild {}/{}! ".format(each_raffle['id'], each_raffle['guild_name'], each_raffle['guild_id'])
+                        msg_raffle += "Raffle will start in **{}**".format(seconds_str(to_close_fromopen))
+                        serverinfo = await store.sql_info_by_server(each_raffle['guild_id'])                                        
+                        if serverinfo['raffle_channel']:
+                            raffle_chan = bot.get_channel(id=int(serverinfo['raffle_channel']))
+                            if raffle_chan:
+                                await raffle_chan.send(msg_raffle)
+                                try:
+                                    # Ping users
+                                    list_ping = []
+                                    for each_user in list_raffle_id['entries']:
+                                        list_ping.append("<@{}>".format(each_user['user_id']))
+                                    await raffle_chan.send(", ".join(list_ping))
+                                except Exception as e:
+                                    print(traceback.format_exc())
+                                    await logchanbot(traceback.format_exc()) 
+                        await logchanbot(msg_raffle)
+                        # Next, draw at ending_ts
+                        return each_raffle['ending_ts']
+                    else:
+                        await logchanbot("Raffle #{} could not be changed to ONGOING, checking its status again.".format(each_raffle['id']))
+        elif each_raffle['status'] == "ONGOING":
+            if each_raffle['ending_ts'] > raffle_sched.clock():
+                return each_raffle['ending_ts']
+            else:
+                # Let's random and update
+                list_raffle_id = each_raffle
+                # This is redundant with above!
+                if list_raffle_id and (list_raffle_id['entries'] is None or len(list_raffle_id['entries']) < 3):
+                    # Cancel game
+                    cancelled_status = await store.raffle_cancel_id(each_raffle['id'], each_raffle['coin_name'])
+                    if not cancelled_status:
+                        await logchanbot("Raffle #{} was not cancelled, checking its status again.".format(each_raffle['id']))
+                        return None
+                    msg_raffle = "Cancelled raffle #{} in guild {}: shortage of users. User entry fee refund!".format(each_raffle['id'], each_raffle['guild_id'])
+                    serverinfo = await store.sql_info_by_server(each_raffle['guild_id'])
+                    if serverinfo['raffle_channel']:
+                        raffle_chan = bot.get_channel(id=int(serverinfo['raffle_channel']))
+                        if raffle_chan:
+                            await raffle_chan.send(msg_raffle)
+                    await logchanbot(msg_raffle)
+                    return RaffleScheduler.DONE
+                if list_raffle_id and list_raffle_id['entries'] and len(list_raffle_id['entries']) >= 3:
+                    entries_id = []
+                    user_entries_id = {}
+                    user_entries_name = {}
+                    list_winners = []
+                    won_amounts = []
+                    total_reward = 0
+                    for each_entry in list_raffle_id['entries']:
+                        entries_id.append(each_entry['entry_id'])
+                        user_entries_id[each_entry['entry_id']] = each_entry['user_id']
+                        user_entries_name[each_entry['entry_id']] = each_entry['user_name']
+                        total_reward += each_entry['amount']
+                    winner_1 = random.choice(entries_id)
+                    winner_1_user = user_entries_id[winner_1]
+                    winner_1_name = user_entries_name[winner_1]
+                    entries_id.remove(winner_1)
+                    list_winners.append(winner_1_user)
+                    won_amounts.append(float(total_reward) * 0.5)
+
+                    winner_2 = random.choice(entries_id)
+                    winner_2_user = user_entries_id[winner_2]
+                    winner_2_name = user_entries_name[winner_2]
+                    entries_id.remove(winner_2)
+                    list_winners.append(winner_2_user)
+                    won_amounts.append(float(total_reward) * 0.3)
+
+                    winner_3 = random.choice(entries_id)
+                    winner_3_user = user_entries_id[winner_3]
+                    winner_3_name = user_entries_name[winner_3]
+                    entries_id.remove(winner_3)
+                    list_winners.append(winner_3_user)
+                    won_amounts.append(float(total_reward) * 0.19)
+                    won_amounts.append(float(total_reward) * 0.01)
+                    update_status = await store.raffle_update_id(each_raffle['id'], 'COMPLETED', list_winners, won_amounts, each_raffle['coin_name'])
+                    if not update_status:
+                        # not paid, maybe completed or cancelled elsewhere, the retry sees its status
+                        await logchanbot("Raffle #{} was not completed, checking its status again.".format(each_raffle['id']))
+                        return None
+                    embed = discord.Embed(title = "RAFFLE #{} / {}".format(each_raffle['id'], each_raffle['guild_name']), color = 0xFF0000, timestamp=datetime.utcnow())
+                    embed.add_field(name="ENTRY FEE", value="{} {}".format(num_format_coin(each_raffle['amount'], each_raffle['coin_name']), each_raffle['coin_name']), inline=True)
+                    embed.add_field(name="1st WINNER: {}".format(winner_1_name), value="{} {}".format(num_format_coin(won_amounts[0], each_raffle['coin_name']), each_raffle['coin_name']), inline=False)
+                    embed.add_field(name="2nd WINNER: {}".format(winner_2_name), value="{} {}".format(num_format_coin(won_amounts[1], each_raffle['coin_name']), each_raffle['coin_name']), inline=False)
+                    embed.add_field(name="3rd WINNER: {}".format(winner_3_name), value="{} {}".format(num_format_coin(won_amounts[2], each_raffle['coin_name']), each_raffle['coin_name']), inline=False)
+                    embed.set_footer(text="Raffle for {} by {}".format(each_raffle['guild_name'], each_raffle['created_username']))
+
+                    msg_raffle = "**Completed raffle #{} in guild {}! Winner entries: #1: {}, #2: {}, #3: {}**\n".format(each_raffle['id'], each_raffle['guild_name'], winner_1_name, winner_2_name, winner_3_name)
+                    msg_raffle += "```Three winners get reward of #1: {}{}, #2: {}{}, #3: {}{}```".format(num_format_coin(won_amounts[0], each_raffle['coin_name']), each_raffle['coin_name'],
+                                                                                                   num_format_coin(won_amounts[1], each_raffle['coin_name']), each_raffle['coin_name'],
+                                                                                                   num_format_coin(won_amounts[2], each_raffle['coin_name']), each_raffle['coin_name'])
+                    serverinfo = await store.sql_info_by_server(each_raffle['guild_id'])
+                    if serverinfo['raffle_channel']:
+                        raffle_chan = bot.get_channel(id=int(serverinfo['raffle_channel']))
+                        if raffle_chan:
+                            await raffle_chan.send(embed=embed)
+                    await logchanbot(msg_raffle)
+                    for each_entry in list_winners:
+                        # Update tipstat
+                        try:
+                            update_tipstat = await store.sql_user_get_tipstat(str(each_entry), each_raffle['coin_name'], True, SERVER_BOT)
+                        except Exception as e:
+                            await logchanbot(traceback.format_exc())
+                        try:
+                            # Find user
+                            user_found = bot.get_user(id=int(each_entry))
+                            if user_found:
+                                try:
+                                    await user_found.send(embed=embed)
+                                except (discord.errors.NotFound, discord.errors.Forbidden) as e:
+                                    print(traceback.format_exc())
+                                    await logchanbot(f"[Discord]/Raffle can not message to {user_found.name}#{user_found.discriminator} about winning raffle.")
+                                # TODO update alert win
                             else:
-                                # change status from Open to ongoing
-                                update_status = await store.raffle_update_id(each_raffle['id'], 'ONGOING', None, None)
-                                if update_status:
-                                    msg_raffle = "Changed raffle #{} status to **ONGOING** in guild {}/{}! ".format(each_raffle['id'], each_raffle['guild_name'], each_raffle['guild_id'])
-                                    msg_raffle += "Raffle will start in **{}**".format(seconds_str(to_close_fromopen))
-                                    serverinfo = await store.sql_info_by_server(each_raffle['guild_id'])                                        
-                                    if serverinfo['raffle_channel']:
-                                        raffle_chan = bot.get_channel(id=int(serverinfo['raffle_channel']))
-                                        if raffle_chan:
-                                            await raffle_chan.send(msg_raffle)
-                                            try:
-                                                # Ping users
-                                                list_ping = []
-                                                for each_user in list_raffle_id['entries']:
-                                                    list_ping.append("<@{}>".format(each_user['user_id']))
-                                                await raffle_chan.send(", ".join(list_ping))
-                                            except Exception as e:
-                                                print(traceback.format_exc())
-                                                await logchanbot(traceback.format_exc()) 
-                                    await logchanbot(msg_raffle)
-                                else:
-                                    await logchanbot(f"Internal error to {msg_raffle}")
-                    elif each_raffle['status'] == "ONGOING":
-                        if each_raffle['ending_ts'] < int(time.time()):
-                            # Let's random and update
-                            list_raffle_id = await store.raffle_get_from_by_id(each_raffle['id'], SERVER_BOT, None)
-                            # This is redundant with above!
-                            if list_raffle_id and list_raffle_id['entries'] and len(list_raffle_id['entries']) < 3:
-                                # Cancel game
-                                cancelled_status = await store.raffle_cancel_id(each_raffle['id'])
-                                msg_raffle = "Cancelled raffle #{} in guild {}: shortage of users. User entry fee refund!".format(each_raffle['id'], each_raffle['guild_id'])
-                                serverinfo = await store.sql_info_by_server(each_raffle['guild_id'])
-                                if serverinfo['raffle_channel']:
-                                    raffle_chan = bot.get_channel(id=int(serverinfo['raffle_channel']))
-                                    if raffle_chan:
-                                        await raffle_chan.send(msg_raffle)
-                                await logchanbot(msg_raffle)
-                            if list_raffle_id and list_raffle_id['entries'] and len(list_raffle_id['entries']) >= 3:
-                                entries_id = []
-                                user_entries_id = {}
-                                user_entries_name = {}
-                                list_winners = []
-                                won_amounts = []
-                                total_reward = 0
-                                for each_entry in list_raffle_id['entries']:
-                                    entries_id.append(each_entry['entry_id'])
-                                    user_entries_id[each_entry['entry_id']] = each_entry['user_id']
-                                    user_entries_name[each_entry['entry_id']] = each_entry['user_name']
-                                    total_reward += each_entry['amount']
-                                winner_1 = random.choice(entries_id)
-                                winner_1_user = user_entries_id[winner_1]
-                                winner_1_name = user_entries_name[winner_1]
-                                entries_id.remove(winner_1)
-                                list_winners.append(winner_1_user)
-                                won_amounts.append(float(total_reward) * 0.5)
-
-                                winner_2 = random.choice(entries_id)
-                                winner_2_user = user_entries_id[winner_2]
-                                winner_2_name = user_entries_name[winner_2]
-                                entries_id.remove(winner_2)
-                                list_winners.append(winner_2_user)
-                                won_amounts.append(float(total_reward) * 0.3)
-
-                                winner_3 = random.choice(entries_id)
-                                winner_3_user = user_entries_id[winner_3]
-                                winner_3_name = user_entries_name[winner_3]
-                                entries_id.remove(winner_3)
-                                list_winners.append(winner_3_user)
-                                won_amounts.append(float(total_reward) * 0.19)
-                                won_amounts.append(float(total_reward) * 0.01)
-                                update_status = await store.raffle_update_id(each_raffle['id'], 'COMPLETED', list_winners, won_amounts)
-                                embed = discord.Embed(title = "RAFFLE #{} / {}".format(each_raffle['id'], each_raffle['guild_name']), color = 0xFF0000, timestamp=datetime.utcnow())
-                                embed.add_field(name="ENTRY FEE", value="{} {}".format(num_format_coin(each_raffle['amount'], each_raffle['coin_name']), each_raffle['coin_name']), inline=True)
-                                embed.add_field(name="1st WINNER: {}".format(winner_1_name), value="{} {}".format(num_format_coin(won_amounts[0], each_raffle['coin_name']), each_raffle['coin_name']), inline=False)
-                                embed.add_field(name="2nd WINNER: {}".format(winner_2_name), value="{} {}".format(num_format_coin(won_amounts[1], each_raffle['coin_name']), each_raffle['coin_name']), inline=False)
-                                embed.add_field(name="3rd WINNER: {}".format(winner_3_name), value="{} {}".format(num_format_coin(won_amounts[2], each_raffle['coin_name']), each_raffle['coin_name']), inline=False)
-                                embed.set_footer(text="Raffle for {} by {}".format(each_raffle['guild_name'], each_raffle['created_username']))
-                                
-                                msg_raffle = "**Completed raffle #{} in guild {}! Winner entries: #1: {}, #2: {}, #3: {}**\n".format(each_raffle['id'], each_raffle['guild_name'], winner_1_name, winner_2_name, winner_3_name)
-                                msg_raffle += "```Three winners get reward of #1: {}{}, #2: {}{}, #3: {}{}```".format(num_format_coin(won_amounts[0], each_raffle['coin_name']), each_raffle['coin_name'],
-                                                                                                               num_format_coin(won_amounts[1], each_raffle['coin_name']), each_raffle['coin_name'],
-                                                                                                               num_format_coin(won_amounts[2], each_raffle['coin_name']), each_raffle['coin_name'])
-                                serverinfo = await store.sql_info_by_server(each_raffle['guild_id'])
-                                if serverinfo['raffle_channel']:
-                                    raffle_chan = bot.get_channel(id=int(serverinfo['raffle_channel']))
-                                    if raffle_chan:
-                                        await raffle_chan.send(embed=embed)
-                                await logchanbot(msg_raffle)
-                                for each_entry in list_winners:
-                                    # Update tipstat
-                                    try:
-                                        update_tipstat = await store.sql_user_get_tipstat(str(each_entry), each_raffle['coin_name'], True, SERVER_BOT)
-                                    except Exception as e:
-                                        await logchanbot(traceback.format_exc())
-                                    try:
-                                        # Find user
-                                        user_found = bot.get_user(id=int(each_entry))
-                                        if user_found:
-                                            try:
-                                                await user_found.send(embed=embed)
-                                            except (discord.errors.NotFound, discord.errors.Forbidden) as e:
-                                                print(traceback.format_exc())
-                                                await logchanbot(f"[Discord]/Raffle can not message to {user_found.name}#{user_found.discriminator} about winning raffle.")
-                                            # TODO update alert win
-                                        else:
-                                            await logchanbot('[Discord]/Raffle Can not find entry id: {}'.format(each_entry))
-                                    except Exception as e:
-                                        print(traceback.format_exc())
-                                        await logchanbot(traceback.format_exc())
-                except Exception as e:
-                    print(traceback.format_exc())
-                    await logchanbot(traceback.format_exc())
-        await asyncio.sleep(time_lap)
+                                await logchanbot('[Discord]/Raffle Can not find entry id: {}'.format(each_entry))
+                        except Exception as e:
+                            print(traceback.format_exc())
+                            await logchanbot(traceback.format_exc())
+                    return RaffleScheduler.DONE
+        else:
+            # COMPLETED or CANCELLED
+            return RaffleScheduler.DONE
+    except Exception as e:
+        print(traceback.format_exc())
+        await logchanbot(traceback.format_exc())
+    return None
+
+
+raffle_sched = RaffleScheduler(process_raffle_id)
+
+
+def raffle_schedule_row(each_raffle):
+    to_close_fromopen = 300 # second
+    if each_raffle['status'] == "OPENED":
+        raffle_sched.schedule(each_raffle['id'], each_raffle['ending_ts'] - to_close_fromopen)
+    elif each_raffle['status'] == "ONGOING":
+        raffle_sched.schedule(each_raffle['id'], each_raffle['ending_ts'])
+
+
+async def check_raffle_status():
+    # Load all active raffles once, then each fires at its own deadline
+    await asyncio.sleep(20)
+    await bot.wait_until_ready()
+    get_all_active_raffle = await store.raffle_get_all(SERVER_BOT)
+    if get_all_active_raffle and len(get_all_active_raffle) > 0:
+        for each_raffle in get_all_active_raffle:
+            # each worker runs the raffles of its own shards. Ownership comes from the guild id, not
+            # bot.get_guild(), so a guild unavailable at startup still gets its raffles scheduled
+            if SHARD_IDS and (int(each_raffle['guild_id']) >> 22) % SHARD_COUNT not in SHARD_IDS:
+                continue
+            raffle_schedule_row(each_raffle)
+    await raffle_sched.run()
 
 @guild.command(name='botchan', aliases=['botchannel', 'bot_chan'])
 @commands.has_permissions(manage_channels=True)
@@ -8832,6 +8979,7 @@ async def prefix(ctx, prefix_char: str=None):
             return
         else:
             changeinfo = await store.sql_changeinfo_by_server(str(ctx.guild.id), 'prefix', prefix_char.lower())
+            GUILD_PREFIX.pop(ctx.guild.id, None)
             await ctx.send(f'{ctx.author.mention} Prefix changed from `{server_prefix}` to `{prefix_char.lower()}`.')
             await botLogChan.send(f'{ctx.message.author.name} / {ctx.message.author.id} changed prefix in {ctx.guild.name} / {ctx.guild.id} to `{prefix_char.lower()}`')
             return
@@ -9743,7 +9891,7 @@ async def deposit(ctx, coin_name: str, option: str=None):
         coin_family = "TRC-20"
     else:
         try:
-            coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+            coin_family = get_coin_family(COIN_NAME)
         except Exception as e:
             await logchanbot(traceback.format_exc())
             await ctx.send(f'{EMOJI_RED_NO} {ctx.author.mention} **INVALID TICKER**')
@@ -9929,7 +10077,7 @@ async def mdeposit(ctx, coin_name: str, option: str=None):
         elif COIN_NAME in ENABLE_COIN_TRC:
             coin_family = "TRC-20"
         else:
-            coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+            coin_family = get_coin_family(COIN_NAME)
     except Exception as e:
         await logchanbot(traceback.format_exc())
         await ctx.send(f'{EMOJI_RED_NO} {ctx.author.mention} **INVALID TICKER**')
@@ -10297,7 +10445,7 @@ async def pools(ctx, coin: str):
         is_cache = 'NO'
         if redis_conn and redis_conn.exists(key_data):
             await ctx.message.add_reaction(EMOJI_FLOPPY)
-            get_pool_data = json.loads(redis_conn.get(key_data).decode())
+            get_pool_data = await get_miningpoolstat_coin(COIN_NAME)
             is_cache = 'YES'
         else:
             if ctx.message.author.id not in MINGPOOLSTAT_IN_PROCESS:
@@ -11029,7 +11177,7 @@ async def mbalance(ctx, coin: str = None):
         elif COIN_NAME in ENABLE_COIN_TRC:
             coin_family = "TRC-20"
         else:
-            coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+            coin_family = get_coin_family(COIN_NAME)
     except Exception as e:
         await logchanbot(traceback.format_exc())
         await ctx.message.reply(f'{EMOJI_RED_NO} {ctx.author.mention} **INVALID TICKER**')
@@ -11147,7 +11295,7 @@ async def botbalance(ctx, member: discord.Member, coin: str):
     elif COIN_NAME in ENABLE_COIN_TRC:
         coin_family = "TRC-20"
     else:
-        coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+        coin_family = get_coin_family(COIN_NAME)
     if COIN_NAME in ENABLE_COIN+ENABLE_XMR+ENABLE_COIN_DOGE+ENABLE_COIN_NANO+ENABLE_COIN_ERC+ENABLE_COIN_TRC+ENABLE_XCH:
         try:
             userwallet = await store.sql_get_userwallet(str(member.id), COIN_NAME)
@@ -11337,7 +11485,7 @@ async def register(ctx, wallet_address: str, coin: str=None):
     elif COIN_NAME in ENABLE_XCH:
         coin_family = "XCH"
     else:
-        coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+        coin_family = get_coin_family(COIN_NAME)
 
     if is_maintenance_coin(COIN_NAME):
         await ctx.message.add_reaction(EMOJI_MAINTENANCE)
@@ -11518,10 +11666,6 @@ async def register(ctx, wallet_address: str, coin: str=None):
                 await ctx.send(f'Your {COIN_NAME} {ctx.author.mention} withdraw address has changed from:\n'
                                f'`{prev_address}`\n to\n '
                                f'`{wallet_address}`')
-                try:
-                    await store.redis_delete_userwallet(str(ctx.message.author.id), COIN_NAME, SERVER_BOT)
-                except Exception as e:
-                    await logchanbot(traceback.format_exc())
             else:
                 await ctx.message.add_reaction(EMOJI_WARNING)
                 await ctx.send(f'{ctx.author.mention} Your {COIN_NAME} previous and new address is the same.')
@@ -11534,10 +11678,6 @@ async def register(ctx, wallet_address: str, coin: str=None):
                 await ctx.send(f'Your {COIN_NAME} {ctx.author.mention} withdraw address has changed from:\n'
                                f'`{prev_address}`\n to\n '
                                f'`{wallet_address}`')
-                try:
-                    await store.redis_delete_userwallet(str(ctx.message.author.id), COIN_NAME, SERVER_BOT)
-                except Exception as e:
-                    await logchanbot(traceback.format_exc())
             else:
                 await ctx.message.add_reaction(EMOJI_WARNING)
                 await ctx.send(f'{ctx.author.mention} Your {COIN_NAME} previous and new address is the same.')
@@ -11547,10 +11687,6 @@ async def register(ctx, wallet_address: str, coin: str=None):
         await ctx.message.add_reaction(EMOJI_OK_HAND)
         await ctx.send(f'{ctx.author.mention} You have registered {COIN_NAME} withdraw address.\n'
                        f'You can use `{server_prefix}withdraw AMOUNT {COIN_NAME}` anytime.')
-        try:
-            await store.redis_delete_userwallet(str(ctx.message.author.id), COIN_NAME, SERVER_BOT)
-        except Exception as e:
-            await logchanbot(traceback.format_exc())
         return
 
 
@@ -11649,7 +11785,7 @@ async def withdraw(ctx, amount: str, coin: str = None):
         coin_family = "TRC-20"
         real_amount = float(amount)
     else:
-        coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+        coin_family = get_coin_family(COIN_NAME)
         real_amount = int(amount * get_decimal(COIN_NAME)) if coin_family in ["BCN", "XMR", "TRTL", "NANO", "XCH"] else float(amount)
         MinTx = get_min_tx_amount(COIN_NAME)
         MaxTX = get_max_tx_amount(COIN_NAME)
@@ -11916,7 +12052,7 @@ async def donate(ctx, amount: str, coin: str=None):
         coin_family = "TRC-20"
         real_amount = float(amount)
     else:
-        coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+        coin_family = get_coin_family(COIN_NAME)
         real_amount = int(amount * get_decimal(COIN_NAME)) if coin_family in ["BCN", "XMR", "TRTL", "NANO", "XCH"] else Decimal(amount)
     if is_maintenance_coin(COIN_NAME):
         await ctx.message.add_reaction(EMOJI_MAINTENANCE)
@@ -12131,7 +12267,7 @@ async def swap(ctx, amount: str, coin_from: str, coin_to: str):
             Min_Tip = token_info['real_min_tip']
             Max_Tip = token_info['real_max_tip']
         else:
-            coin_family = getattr(getattr(config,"daemon"+COIN_NAME_FROM),"coin_family","TRTL")
+            coin_family = get_coin_family(COIN_NAME_FROM)
             from_decimal = int(math.log10(get_decimal(COIN_NAME_FROM)))
             Min_Tip = get_min_mv_amount(COIN_NAME_FROM) / 10**from_decimal
             Max_Tip = get_max_mv_amount(COIN_NAME_FROM) / 10**from_decimal * 5 # Increase x5 for swap
@@ -12151,7 +12287,7 @@ async def swap(ctx, amount: str, coin_from: str, coin_to: str):
             token_info = await store.get_token_info(COIN_NAME_TO)
             to_decimal = token_info['token_decimal']
         else:
-            coin_family = getattr(getattr(config,"daemon"+COIN_NAME_TO),"coin_family","TRTL")
+            coin_family = get_coin_family(COIN_NAME_TO)
             to_decimal = int(math.log10(get_decimal(COIN_NAME_TO)))
             
 
@@ -12395,7 +12531,7 @@ async def take(ctx, info: str=None):
     elif COIN_NAME in ENABLE_COIN_TRC:
         coin_family = "TRC-20"
     else:
-        coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+        coin_family = get_coin_family(COIN_NAME)
     try:
         if COIN_NAME in ENABLE_COIN_ERC+ENABLE_COIN_TRC:
             token_info = await store.get_token_info(COIN_NAME)
@@ -12594,7 +12730,7 @@ async def randtip(ctx, amount: str, coin: str, *, rand_option: str=None):
     elif COIN_NAME in ENABLE_COIN_TRC:
         coin_family = "TRC-20"
     else:
-        coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+        coin_family = get_coin_family(COIN_NAME)
     # Check allowed coins
     tiponly_coins = serverinfo['tiponly'].split(",")
     if COIN_NAME == serverinfo['default_coin'].upper() or serverinfo['tiponly'].upper() == "ALLCOIN":
@@ -12812,7 +12948,7 @@ async def randtip(ctx, amount: str, coin: str, *, rand_option: str=None):
             result = await store.create_address_trx()
             wallet = await store.sql_register_user(str(rand_user.id), COIN_NAME, SERVER_BOT, 0, result)
         else:
-            coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+            coin_family = get_coin_family(COIN_NAME)
             wallet = await store.sql_register_user(str(rand_user.id), COIN_NAME, SERVER_BOT, 0)
         user_to = await store.sql_get_userwallet(str(rand_user.id), COIN_NAME)
 
@@ -12882,6 +13018,242 @@ async def randtip(ctx, amount: str, coin: str, *, rand_option: str=None):
         return
 
 
+# freetip with comment is an INTERACTION session of kind freetip, drop state is in
+# session data. The embed is re-rendered at most every FREETIP_RENDER_INTERVAL.
+FREETIP_RENDER_INTERVAL = int(getattr(config.freetip, "render_interval", 5))
+FREETIP_EXPIRE_RETRIES = 5
+FREETIP_EXPIRE_RETRY_WAIT = 30
+
+
+def freetip_embed(drop, description: str, footer: str):
+    COIN_NAME = drop['coin']
+    embed = discord.Embed(title=f"Free Tip appears {num_format_coin(drop['amount'], COIN_NAME)} {COIN_NAME}", description=description, timestamp=datetime.utcfromtimestamp(drop['ts']), color=0x00ff00)
+    embed.add_field(name="Comment", value=drop['comment'], inline=False)
+    if len(drop['attendees']) > 0:
+        embed.add_field(name="Attendees", value=", ".join(drop['attendees'].values()), inline=False)
+    embed.set_footer(text=footer)
+    return embed
+
+
+def freetip_attend(drop, user_id: int, user_name: str):
+    if user_id == drop['author_id'] or time.time() >= drop['end_ts']:
+        return
+    if str(user_id) not in drop['attendees']:
+        drop['attendees'][str(user_id)] = user_name
+
+
+async def freetip_on_reaction(session, payload):
+    if str(payload.emoji) == EMOJI_PARTY and payload.member and payload.member.bot == False:
+        freetip_attend(session['data'], payload.user_id, '{}#{}'.format(payload.member.name, payload.member.discriminator))
+        INTERACTION.touch(session['message_id'])
+
+
+async def freetip_on_restore(session):
+    # pick up reactions added while the bot was away
+    drop = session['data']
+    channel = bot.get_channel(id=session['channel_id'])
+    if channel is None:
+        return
+    try:
+        msg = await channel.fetch_message(session['message_id'])
+    except (discord.errors.NotFound, discord.errors.Forbidden) as e:
+        INTERACTION.close(session['message_id'])
+        return
+    for reaction in msg.reactions:
+        if str(reaction.emoji) == EMOJI_PARTY:
+            async for user in reaction.users():
+                if user.bot == False:
+                    freetip_attend(drop, user.id, '{}#{}'.format(user.name, user.discriminator))
+    INTERACTION.touch(session['message_id'])
+
+
+async def freetip_drop_lost(drop, message_id: int, reason: str):
+    global TX_IN_PROCESS
+    if drop['author_id'] in TX_IN_PROCESS:
+        TX_IN_PROCESS.remove(drop['author_id'])
+    await logchanbot('[Discord]/Freetip drop {} by {} of {} {} not paid: {}'.format(message_id, drop['author_name'],
+                                                                                  num_format_coin(drop['amount'], drop['coin']), drop['coin'], reason))
+
+
+async def freetip_on_expire(session):
+    drop = session['data']
+    channel = bot.get_channel(id=session['channel_id'])
+    if channel is None:
+        await freetip_drop_lost(drop, session['message_id'], "channel {} not found".format(session['channel_id']))
+        return
+    try:
+        origin_msg = await channel.fetch_message(drop['origin_id'])
+    except (discord.errors.NotFound, discord.errors.Forbidden) as e:
+        await freetip_drop_lost(drop, session['message_id'], "command message not found")
+        return
+    except (discord.errors.HTTPException, asyncio.TimeoutError) as e:
+        # transient, expire again a bit later
+        drop['retries'] = drop.get('retries', 0) + 1
+        if drop['retries'] > FREETIP_EXPIRE_RETRIES:
+            await freetip_drop_lost(drop, session['message_id'], "fetching command message failed {} times".format(drop['retries']))
+            return
+        INTERACTION.open("freetip", session['message_id'], session['channel_id'], session['user_id'], time.time() + FREETIP_EXPIRE_RETRY_WAIT, drop)
+        return
+    try:
+        await freetip_multiple(drop, origin_msg, channel.get_partial_message(session['message_id']))
+    except Exception as e:
+        # not retried, part of it may be paid
+        await logchanbot(traceback.format_exc())
+        await freetip_drop_lost(drop, session['message_id'], "error during payout, check the drop")
+
+
+async def freetip_render():
+    while True:
+        for session in INTERACTION.pop_dirty():
+            if session['kind'] != "freetip":
+                continue
+            drop = session['data']
+            INTERACTION.save(session)
+            channel = bot.get_channel(id=session['channel_id'])
+            if channel is None:
+                continue
+            try:
+                footer = f"Free tip by {drop['author_name']}, timeout: {seconds_str(drop['duration'])}"
+                await channel.get_partial_message(session['message_id']).edit(embed=freetip_embed(drop, f"Re-act {EMOJI_PARTY} to collect", footer))
+            except Exception as e:
+                traceback.print_exc(file=sys.stdout)
+        await asyncio.sleep(FREETIP_RENDER_INTERVAL)
+
+
+INTERACTION.register_kind("freetip", on_reaction=freetip_on_reaction, on_expire=freetip_on_expire, on_restore=freetip_on_restore)
+
+
+async def freetip_multiple(drop, origin_msg, msg):
+    global TX_IN_PROCESS
+    # the drop holds its author in TX_IN_PROCESS since the freetip command, paid or not release it here
+    try:
+        await freetip_payout(drop, origin_msg, msg)
+    finally:
+        if origin_msg.author.id in TX_IN_PROCESS:
+            TX_IN_PROCESS.remove(origin_msg.author.id)
+
+
+async def freetip_payout(drop, origin_msg, msg):
+    COIN_NAME = drop['coin']
+    coin_family = drop['coin_family']
+    real_amount = drop['amount']
+    attend_list_id = [int(user_id) for user_id in drop['attendees']]
+    if coin_family == "ERC-20" or coin_family == "TRC-20":
+        token_info = await store.get_token_info(COIN_NAME)
+    if len(attend_list_id) == 0:
+        embed = freetip_embed(drop, "Already expired", f"Free tip by {drop['author_name']}, and no one collected!")
+        await msg.edit(embed=embed)
+        await msg.add_reaction(EMOJI_OK_BOX)
+        return
+
+    # re-check balance
+    userdata_balance = await store.sql_user_balance(str(origin_msg.author.id), COIN_NAME)
+    xfer_in = 0
+    if COIN_NAME not in ENABLE_COIN_ERC+ENABLE_COIN_TRC:
+        xfer_in = await store.sql_user_balance_get_xfer_in(str(origin_msg.author.id), COIN_NAME)
+    if COIN_NAME in ENABLE_COIN_DOGE+ENABLE_COIN_ERC+ENABLE_COIN_TRC:
+        actual_balance = float(xfer_in) + float(userdata_balance['Adjust'])
+    elif COIN_NAME in ENABLE_COIN_NANO:
+        actual_balance = int(xfer_in) + int(userdata_balance['Adjust'])
+        actual_balance = round(actual_balance / get_decimal(COIN_NAME), 6) * get_decimal(COIN_NAME)
+    else:
+        actual_balance = int(xfer_in) + int(userdata_balance['Adjust'])
+
+    if real_amount > actual_balance:
+        await origin_msg.add_reaction(EMOJI_ERROR)
+        await origin_msg.channel.send(f'{EMOJI_RED_NO} {origin_msg.author.mention} Insufficient balance to do a free tip of '
+                       f'{num_format_coin(real_amount, COIN_NAME)} '
+                       f'{COIN_NAME}.')
+        return
+    # end of re-check balance
+
+    # Multiple tip here
+    notifyList = await store.sql_get_tipnotify()
+
+    if len(attend_list_id) == 0:
+        await origin_msg.add_reaction(EMOJI_ERROR)
+        await origin_msg.channel.send(f'{EMOJI_RED_NO} {origin_msg.author.mention} divided by 0!!!')
+        return
+
+    amountDiv = int(round(real_amount / len(attend_list_id), 2))  # cut 2 decimal only
+    if coin_family == "DOGE" or coin_family == "ERC-20" or coin_family == "TRC-20":
+        amountDiv = round(real_amount / len(attend_list_id), 4)
+
+    tip = None
+    try:
+        if coin_family in ["TRTL", "BCN"]:
+            tip = await store.sql_mv_cn_multiple(str(origin_msg.author.id), amountDiv, attend_list_id, 'TIPALL', COIN_NAME)
+        elif coin_family == "XMR":
+            tip = await store.sql_mv_xmr_multiple(str(origin_msg.author.id), attend_list_id, amountDiv, COIN_NAME, "TIPALL")
+        elif coin_family == "XCH":
+            tip = await store.sql_mv_xch_multiple(str(origin_msg.author.id), attend_list_id, amountDiv, COIN_NAME, "TIPALL")
+        elif coin_family == "NANO":
+            tip = await store.sql_mv_nano_multiple(str(origin_msg.author.id), attend_list_id, amountDiv, COIN_NAME, "TIPALL")
+        elif coin_family == "DOGE":
+            tip = await store.sql_mv_doge_multiple(str(origin_msg.author.id), attend_list_id, amountDiv, COIN_NAME, "TIPALL")
+        elif coin_family == "ERC-20":
+            tip = await store.sql_mv_erc_multiple(str(origin_msg.author.id), attend_list_id, amountDiv, COIN_NAME, "TIPALL", token_info['contract'])
+        elif coin_family == "TRC-20":
+            tip = await store.sql_mv_trx_multiple(str(origin_msg.author.id), attend_list_id, amountDiv, COIN_NAME, "TIPALL", token_info['contract'])
+    except Exception as e:
+        await logchanbot(traceback.format_exc())
+
+    # remove queue from tipall, no need to hold it while sending DMs
+    if origin_msg.author.id in TX_IN_PROCESS:
+        TX_IN_PROCESS.remove(origin_msg.author.id)
+    if tip:
+        # Update tipstat
+        try:
+            update_tipstat = await store.sql_user_get_tipstat(str(origin_msg.author.id), COIN_NAME, True, SERVER_BOT)
+        except Exception as e:
+            await logchanbot(traceback.format_exc())
+        tipAmount = num_format_coin(real_amount, COIN_NAME)
+        ActualSpend_str = num_format_coin(amountDiv * len(attend_list_id), COIN_NAME)
+        amountDiv_str = num_format_coin(amountDiv, COIN_NAME)
+        if COIN_NAME in ENABLE_COIN_ERC+ENABLE_COIN_TRC:
+            await origin_msg.add_reaction(TOKEN_EMOJI)
+        else:
+            await origin_msg.add_reaction(get_emoji(COIN_NAME))
+        # tipper shall always get DM. Ignore notifyList
+        try:
+            await origin_msg.author.send(
+                f'{EMOJI_ARROW_RIGHTHOOK} Free Tip of {tipAmount} '
+                f'{COIN_NAME} '
+                f'was collected by ({len(attend_list_id)}) members in server `{origin_msg.guild.name}`.\n'
+                f'Each member got: `{amountDiv_str} {COIN_NAME}`\n'
+                f'Actual spending: `{ActualSpend_str} {COIN_NAME}`')
+        except (discord.Forbidden, discord.errors.Forbidden, discord.errors.HTTPException) as e:
+            await store.sql_toggle_tipnotify(str(origin_msg.author.id), "OFF")
+        numMsg = 0
+        for member_id in attend_list_id:
+            member = bot.get_user(id=member_id)
+            if origin_msg.author.id != member.id and member.id != bot.user.id:
+                if str(member.id) not in notifyList:
+                    # random user to DM
+                    dm_user = bool(random.getrandbits(1)) if len(attend_list_id) > config.tipallMax_LimitDM else True
+                    if dm_user:
+                        try:
+                            await member.send(
+                                f'{EMOJI_MONEYFACE} You collected a free tip of {amountDiv_str} '
+                                f'{COIN_NAME} from {origin_msg.author.name}#{origin_msg.author.discriminator} in server `{origin_msg.guild.name}` #{origin_msg.channel.name}\n'
+                                f'{NOTIFICATION_OFF_CMD}')
+                            numMsg += 1
+                        except (discord.Forbidden, discord.errors.Forbidden, discord.errors.HTTPException) as e:
+                            await store.sql_toggle_tipnotify(str(member.id), "OFF")
+            if numMsg >= config.tipallMax_LimitDM:
+                # stop DM if reaches
+                break
+        # Edit embed
+        try:
+            embed = freetip_embed(drop, f"Re-act {EMOJI_PARTY} to collect", f"Free tip by {drop['author_name']}, completed! Collected by {len(attend_list_id)} member(s)")
+            await msg.edit(embed=embed)
+            await msg.add_reaction(EMOJI_OK_BOX)
+        except Exception as e:
+            traceback.print_exc(file=sys.stdout)
+        await origin_msg.add_reaction(EMOJI_OK_HAND)
+        return
+
+
 @bot.command(pass_context=True, help=bot_help_freetip)
 async def freetip(ctx, amount: str, coin: str, duration: str='60s', *, comment: str=None):
     global TRTL_DISCORD, IS_RESTARTING
@@ -12976,7 +13348,7 @@ async def freetip(ctx, amount: str, coin: str, duration: str='60s', *, comment:
     elif COIN_NAME in ENABLE_COIN_TRC:
         coin_family = "TRC-20"
     else:
-        coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+        coin_family = get_coin_family(COIN_NAME)
     # Check allowed coins
     tiponly_coins = serverinfo['tiponly'].split(",")
     if COIN_NAME == serverinfo['default_coin'].upper() or serverinfo['tiponly'].upper() == "ALLCOIN":
@@ -13074,8 +13446,6 @@ async def freetip(ctx, amount: str, coin: str, duration: str='60s', *, comment:
                        f'{COIN_NAME}.')
         return
 
-    attend_list_id = []
-    attend_list_names = []
     ts = timestamp=datetime.utcnow()
 
     if ctx.message.author.id not in TX_IN_PROCESS:
@@ -13100,184 +13470,53 @@ and reaction.message.id == msg.id and str(reaction.emoji) == EMOJI_PARTY
     
     if comment and len(comment) > 0:
         # multiple free tip
-        while True:
-            start_time = int(time.time())
+        drop = {'origin_id': ctx.message.id, 'author_id': ctx.message.author.id, 'author_name': f"{ctx.message.author.name}#{ctx.message.author.discriminator}",
+                'coin': COIN_NAME, 'coin_family': coin_family, 'amount': real_amount, 'comment': comment,
+                'duration': duration_s, 'ts': int(time.time()), 'end_ts': int(time.time()) + duration_s, 'attendees': {}}
+        # paid by freetip_on_expire
+        INTERACTION.open("freetip", msg.id, ctx.channel.id, ctx.message.author.id, drop['end_ts'], drop)
+        return
+    else:
+        # single free tip
+        try:
+            reaction, user = await bot.wait_for('reaction_add', timeout=duration_s, check=check)
+        except asyncio.TimeoutError:
+            if ctx.message.author.id in TX_IN_PROCESS:
+                TX_IN_PROCESS.remove(ctx.message.author.id)
+            embed = discord.Embed(title=f"Free Tip appears {num_format_coin(real_amount, COIN_NAME)} {COIN_NAME}", description=f"Already expired", timestamp=ts, color=0x00ff00)
+            embed.set_footer(text=f"Free tip by {ctx.message.author.name}#{ctx.message.author.discriminator}, and no one collected!")
+            await msg.edit(embed=embed)
+            await msg.add_reaction(EMOJI_OK_BOX)
+            return
+        if str(reaction.emoji) == EMOJI_PARTY:
+            # re-check balance
+            userdata_balance = await store.sql_user_balance(str(ctx.message.author.id), COIN_NAME)
+            xfer_in = 0
+            if COIN_NAME not in ENABLE_COIN_ERC+ENABLE_COIN_TRC:
+                xfer_in = await store.sql_user_balance_get_xfer_in(str(ctx.message.author.id), COIN_NAME)
+            if COIN_NAME in ENABLE_COIN_DOGE+ENABLE_COIN_ERC+ENABLE_COIN_TRC:
+                actual_balance = float(xfer_in) + float(userdata_balance['Adjust'])
+            elif COIN_NAME in ENABLE_COIN_NANO:
+                actual_balance = int(xfer_in) + int(userdata_balance['Adjust'])
+                actual_balance = round(actual_balance / get_decimal(COIN_NAME), 6) * get_decimal(COIN_NAME)
+            else:
+                actual_balance = int(xfer_in) + int(userdata_balance['Adjust'])
+
+            # Negative check
             try:
-                reaction, user = await bot.wait_for('reaction_add', timeout=duration_s, check=check)
-            except asyncio.TimeoutError:
-                if ctx.message.author.id in TX_IN_PROCESS:
-                    TX_IN_PROCESS.remove(ctx.message.author.id)
-                if len(attend_list_id) == 0:
-                    embed = discord.Embed(title=f"Free Tip appears {num_format_coin(real_amount, COIN_NAME)} {COIN_NAME}", description=f"Already expired", timestamp=ts, color=0x00ff00)
-                    embed.add_field(name="Comment", value=comment, inline=False)
-                    embed.set_footer(text=f"Free tip by {ctx.message.author.name}#{ctx.message.author.discriminator}, and no one collected!")
-                    await msg.edit(embed=embed)
-                    await msg.add_reaction(EMOJI_OK_BOX)
-                    return
-                break
+                if actual_balance < 0:
+                    msg_negative = 'Negative balance detected:\nUser: '+str(ctx.message.author.id)+'\nCoin: '+COIN_NAME+'\nAtomic Balance: '+str(actual_balance)
+                    await logchanbot(msg_negative)
+            except Exception as e:
+                await logchanbot(traceback.format_exc())
 
-            if str(reaction.emoji) == EMOJI_PARTY and user.id not in attend_list_id:
-                attend_list_id.append(user.id)
-                attend_list_names.append('{}#{}'.format(user.name, user.discriminator))
-                embed = discord.Embed(title=f"Free Tip appears {num_format_coin(real_amount, COIN_NAME)} {COIN_NAME}", description=f"Re-act {EMOJI_PARTY} to collect", timestamp=ts, color=0x00ff00)
-                embed.add_field(name="Comment", value=comment, inline=False)
-                embed.add_field(name="Attendees", value=", ".join(attend_list_names), inline=False)
-                embed.set_footer(text=f"Free tip by {ctx.message.author.name}#{ctx.message.author.discriminator}, timeout: {seconds_str(duration_s)}")
-                await msg.edit(embed=embed)
-                duration_s -= int(time.time()) - start_time
-                if duration_s <= 1:
-                    break
-
-        # re-check balance
-        userdata_balance = await store.sql_user_balance(str(ctx.message.author.id), COIN_NAME)
-        xfer_in = 0
-        if COIN_NAME not in ENABLE_COIN_ERC+ENABLE_COIN_TRC:
-            xfer_in = await store.sql_user_balance_get_xfer_in(str(ctx.message.author.id), COIN_NAME)
-        if COIN_NAME in ENABLE_COIN_DOGE+ENABLE_COIN_ERC+ENABLE_COIN_TRC:
-            actual_balance = float(xfer_in) + float(userdata_balance['Adjust'])
-        elif COIN_NAME in ENABLE_COIN_NANO:
-            actual_balance = int(xfer_in) + int(userdata_balance['Adjust'])
-            actual_balance = round(actual_balance / get_decimal(COIN_NAME), 6) * get_decimal(COIN_NAME)
-        else:
-            actual_balance = int(xfer_in) + int(userdata_balance['Adjust'])
-
-        if real_amount > actual_balance:
-            await ctx.message.add_reaction(EMOJI_ERROR)
-            await ctx.send(f'{EMOJI_RED_NO} {ctx.author.mention} Insufficient balance to do a free tip of '
-                           f'{num_format_coin(real_amount, COIN_NAME)} '
-                           f'{COIN_NAME}.')
-            return
-        # end of re-check balance
-
-        # Multiple tip here
-        notifyList = await store.sql_get_tipnotify()
-
-        if len(attend_list_id) == 0:
-            await ctx.message.add_reaction(EMOJI_ERROR)
-            await ctx.send(f'{EMOJI_RED_NO} {ctx.author.mention} divided by 0!!!')
-            return
-
-        amountDiv = int(round(real_amount / len(attend_list_id), 2))  # cut 2 decimal only
-        if coin_family == "DOGE" or coin_family == "ERC-20" or coin_family == "TRC-20":
-            amountDiv = round(real_amount / len(attend_list_id), 4)
-
-        tip = None
-        try:
-            if coin_family in ["TRTL", "BCN"]:
-                tip = await store.sql_mv_cn_multiple(str(ctx.message.author.id), amountDiv, attend_list_id, 'TIPALL', COIN_NAME)
-            elif coin_family == "XMR":
-                tip = await store.sql_mv_xmr_multiple(str(ctx.message.author.id), attend_list_id, amountDiv, COIN_NAME, "TIPALL")
-            elif coin_family == "XCH":
-                tip = await store.sql_mv_xch_multiple(str(ctx.message.author.id), attend_list_id, amountDiv, COIN_NAME, "TIPALL")
-            elif coin_family == "NANO":
-                tip = await store.sql_mv_nano_multiple(str(ctx.message.author.id), attend_list_id, amountDiv, COIN_NAME, "TIPALL")
-            elif coin_family == "DOGE":
-                tip = await store.sql_mv_doge_multiple(str(ctx.message.author.id), attend_list_id, amountDiv, COIN_NAME, "TIPALL")
-            elif coin_family == "ERC-20":
-                tip = await store.sql_mv_erc_multiple(str(ctx.message.author.id), attend_list_id, amountDiv, COIN_NAME, "TIPALL", token_info['contract'])
-            elif coin_family == "TRC-20":
-                tip = await store.sql_mv_trx_multiple(str(ctx.message.author.id), attend_list_id, amountDiv, COIN_NAME, "TIPALL", token_info['contract'])
-        except Exception as e:
-            await logchanbot(traceback.format_exc())
-
-        # remove queue from tipall
-        if ctx.message.author.id in TX_IN_PROCESS:
-            TX_IN_PROCESS.remove(ctx.message.author.id)
-        if tip:
-            # Update tipstat
-            try:
-                update_tipstat = await store.sql_user_get_tipstat(str(ctx.message.author.id), COIN_NAME, True, SERVER_BOT)
-            except Exception as e:
-                await logchanbot(traceback.format_exc())
-            tipAmount = num_format_coin(real_amount, COIN_NAME)
-            ActualSpend_str = num_format_coin(amountDiv * len(attend_list_id), COIN_NAME)
-            amountDiv_str = num_format_coin(amountDiv, COIN_NAME)
-            if COIN_NAME in ENABLE_COIN_ERC+ENABLE_COIN_TRC:
-                await ctx.message.add_reaction(TOKEN_EMOJI)
-            else:
-                await ctx.message.add_reaction(get_emoji(COIN_NAME))
-            # tipper shall always get DM. Ignore notifyList
-            try:
-                await ctx.message.author.send(
-                    f'{EMOJI_ARROW_RIGHTHOOK} Free Tip of {tipAmount} '
-                    f'{COIN_NAME} '
-                    f'was collected by ({len(attend_list_id)}) members in server `{ctx.guild.name}`.\n'
-                    f'Each member got: `{amountDiv_str} {COIN_NAME}`\n'
-                    f'Actual spending: `{ActualSpend_str} {COIN_NAME}`')
-            except (discord.Forbidden, discord.errors.Forbidden, discord.errors.HTTPException) as e:
-                await store.sql_toggle_tipnotify(str(ctx.message.author.id), "OFF")
-            numMsg = 0
-            for member_id in attend_list_id:
-                member = bot.get_user(id=member_id)
-                if ctx.message.author.id != member.id and member.id != bot.user.id:
-                    if str(member.id) not in notifyList:
-                        # random user to DM
-                        dm_user = bool(random.getrandbits(1)) if len(attend_list_id) > config.tipallMax_LimitDM else True
-                        if dm_user:
-                            try:
-                                await member.send(
-                                    f'{EMOJI_MONEYFACE} You collected a free tip of {amountDiv_str} '
-                                    f'{COIN_NAME} from {ctx.message.author.name}#{ctx.message.author.discriminator} in server `{ctx.guild.name}` #{ctx.channel.name}\n'
-                                    f'{NOTIFICATION_OFF_CMD}')
-                                numMsg += 1
-                            except (discord.Forbidden, discord.errors.Forbidden, discord.errors.HTTPException) as e:
-                                await store.sql_toggle_tipnotify(str(member.id), "OFF")
-                if numMsg >= config.tipallMax_LimitDM:
-                    # stop DM if reaches
-                    break
-            # Edit embed
-            try:
-                embed = discord.Embed(title=f"Free Tip appears {num_format_coin(real_amount, COIN_NAME)} {COIN_NAME}", description=f"Re-act {EMOJI_PARTY} to collect", timestamp=ts, color=0x00ff00)
-                embed.add_field(name="Comment", value=comment, inline=False)
-                embed.add_field(name="Attendees", value=", ".join(attend_list_names), inline=False)
-                embed.set_footer(text=f"Free tip by {ctx.message.author.name}#{ctx.message.author.discriminator}, completed! Collected by {len(attend_list_id)} member(s)")
-                await msg.edit(embed=embed)
-                await msg.add_reaction(EMOJI_OK_BOX)
-            except Exception as e:
-                traceback.print_exc(file=sys.stdout)
-            await ctx.message.add_reaction(EMOJI_OK_HAND)
-            return
-    else:
-        # single free tip
-        try:
-            reaction, user = await bot.wait_for('reaction_add', timeout=duration_s, check=check)
-        except asyncio.TimeoutError:
-            if ctx.message.author.id in TX_IN_PROCESS:
-                TX_IN_PROCESS.remove(ctx.message.author.id)
-            embed = discord.Embed(title=f"Free Tip appears {num_format_coin(real_amount, COIN_NAME)} {COIN_NAME}", description=f"Already expired", timestamp=ts, color=0x00ff00)
-            embed.set_footer(text=f"Free tip by {ctx.message.author.name}#{ctx.message.author.discriminator}, and no one collected!")
-            await msg.edit(embed=embed)
-            await msg.add_reaction(EMOJI_OK_BOX)
-            return
-        if str(reaction.emoji) == EMOJI_PARTY:
-            # re-check balance
-            userdata_balance = await store.sql_user_balance(str(ctx.message.author.id), COIN_NAME)
-            xfer_in = 0
-            if COIN_NAME not in ENABLE_COIN_ERC+ENABLE_COIN_TRC:
-                xfer_in = await store.sql_user_balance_get_xfer_in(str(ctx.message.author.id), COIN_NAME)
-            if COIN_NAME in ENABLE_COIN_DOGE+ENABLE_COIN_ERC+ENABLE_COIN_TRC:
-                actual_balance = float(xfer_in) + float(userdata_balance['Adjust'])
-            elif COIN_NAME in ENABLE_COIN_NANO:
-                actual_balance = int(xfer_in) + int(userdata_balance['Adjust'])
-                actual_balance = round(actual_balance / get_decimal(COIN_NAME), 6) * get_decimal(COIN_NAME)
-            else:
-                actual_balance = int(xfer_in) + int(userdata_balance['Adjust'])
-
-            # Negative check
-            try:
-                if actual_balance < 0:
-                    msg_negative = 'Negative balance detected:\nUser: '+str(ctx.message.author.id)+'\nCoin: '+COIN_NAME+'\nAtomic Balance: '+str(actual_balance)
-                    await logchanbot(msg_negative)
-            except Exception as e:
-                await logchanbot(traceback.format_exc())
-
-            if real_amount > actual_balance:
-                await ctx.message.add_reaction(EMOJI_ERROR)
-                await ctx.send(f'{EMOJI_RED_NO} {ctx.author.mention} Insufficient balance to do a free tip of '
-                               f'{num_format_coin(real_amount, COIN_NAME)} '
-                               f'{COIN_NAME}.')
-                return
-            # end of re-check balance
+            if real_amount > actual_balance:
+                await ctx.message.add_reaction(EMOJI_ERROR)
+                await ctx.send(f'{EMOJI_RED_NO} {ctx.author.mention} Insufficient balance to do a free tip of '
+                               f'{num_format_coin(real_amount, COIN_NAME)} '
+                               f'{COIN_NAME}.')
+                return
+            # end of re-check balance
 
             tip = None
             user_to = await store.sql_get_userwallet(str(user.id), COIN_NAME)
@@ -13409,7 +13648,7 @@ async def tipto(ctx, amount: str, coin: str, to_user: str):
         elif COIN_NAME in ENABLE_COIN_TRC:
             coin_family = "TRC-20"
         else:
-            coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+            coin_family = get_coin_family(COIN_NAME)
 
         user_from = await store.sql_get_userwallet(str(ctx.message.author.id), COIN_NAME)
         if user_from is None:
@@ -13605,7 +13844,7 @@ async def tip(ctx, amount: str, *args):
     elif COIN_NAME in ENABLE_COIN_TRC:
         coin_family = "TRC-20"
     else:
-        coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+        coin_family = get_coin_family(COIN_NAME)
     if fromDM == False:
         # Check allowed coins
         tiponly_coins = serverinfo['tiponly'].split(",")
@@ -14115,7 +14354,7 @@ async def mtip(ctx, amount: str, *args):
         coin_family = "TRC-20"
         token_info = await store.get_token_info(COIN_NAME)
     else:
-        coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+        coin_family = get_coin_family(COIN_NAME)
     # Check allowed coins
     tiponly_coins = serverinfo['tiponly'].split(",")
     if COIN_NAME == serverinfo['default_coin'].upper() or serverinfo['tiponly'].upper() == "ALLCOIN":
@@ -14377,7 +14616,7 @@ async def mtip(ctx, amount: str, *args):
             result = await store.create_address_trx()
             wallet = await store.sql_register_user(str(ctx.guild.id), COIN_NAME, SERVER_BOT, 0, result)
         else:
-            coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+            coin_family = get_coin_family(COIN_NAME)
             wallet = await store.sql_register_user(str(ctx.guild.id), COIN_NAME, SERVER_BOT, 0)
 
         user_from = await store.sql_register_user(str(ctx.guild.id), COIN_NAME, SERVER_BOT, 0)
@@ -14560,7 +14799,7 @@ async def tipall(ctx, amount: str, coin: str, option: str=None):
     elif COIN_NAME in ENABLE_COIN_TRC:
         coin_family = "TRC-20"
     else:
-        coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+        coin_family = get_coin_family(COIN_NAME)
 
     option = option.upper() if option else "ONLINE"
     option_list = ["ALL", "ONLINE"]
@@ -14623,10 +14862,13 @@ async def tipall(ctx, amount: str, coin: str, option: str=None):
         MaxTX = get_max_mv_amount(COIN_NAME)
 
     # [x.guild for x in [g.members for g in bot.guilds] if x.id = useridyourelookingfor]
-    if option == "ONLINE":
-        listMembers = [member for member in ctx.guild.members if member.status != discord.Status.offline and member.bot == False]
+    if option == "ONLINE" and ctx.guild.id in GUILD_ONLINE_MEMBERS:
+        # kept from member events since the guild became available, no member scan
+        listMembers = list(GUILD_ONLINE_MEMBERS[ctx.guild.id])
+    elif option == "ONLINE":
+        listMembers = [member.id for member in ctx.guild.members if member.status != discord.Status.offline and member.bot == False]
     elif option == "ALL":
-        listMembers = [member for member in ctx.guild.members if member.bot == False]
+        listMembers = [member.id for member in ctx.guild.members if member.bot == False]
     print("Number of tip-all in {}: {}".format(ctx.guild.name, len(listMembers)))
     # Check number of receivers.
     if len(listMembers) > config.tipallMax_Offchain:
@@ -14642,21 +14884,8 @@ async def tipall(ctx, amount: str, coin: str, option: str=None):
                                                                                 ctx.guild.id, ctx.guild.name, len(listMembers)))
     list_receivers = []
     addresses = []
-    for member in listMembers:
-        # print(member.name) # you'll just print out Member objects your way.
-        if ctx.message.author.id != member.id and member.id != bot.user.id:
-            user_to = await store.sql_get_userwallet(str(member.id), COIN_NAME)
-            if user_to is None:
-                if coin_family == "ERC-20":
-                    w = await create_address_eth()
-                    userregister = await store.sql_register_user(str(member.id), COIN_NAME, SERVER_BOT, 0, w)
-                elif coin_family == "TRC-20":
-                    result = await store.create_address_trx()
-                    userregister = await store.sql_register_user(str(member.id), COIN_NAME, SERVER_BOT, 0, result)
-                else:
-                    userregister = await store.sql_register_user(str(member.id), COIN_NAME, SERVER_BOT, 0)
-                user_to = await store.sql_get_userwallet(str(member.id), COIN_NAME)
-            list_receivers.append(str(member.id))
+    list_receivers = await prepare_tip_receivers([member_id for member_id in listMembers if ctx.message.author.id != member_id and member_id != bot.user.id], 
+                                                 COIN_NAME, coin_family)
 
     user_from = await store.sql_get_userwallet(str(ctx.message.author.id), COIN_NAME)
     if user_from is None:
@@ -14779,8 +15008,9 @@ async def tipall(ctx, amount: str, coin: str, option: str=None):
         numb_mention = 0
         if len(listMembers) < max_mention:
             # DM all user
-            for member in listMembers:
-                if ctx.message.author.id != member.id and member.id != bot.user.id:
+            for member_id in listMembers:
+                member = ctx.guild.get_member(member_id)
+                if member and ctx.message.author.id != member.id and member.id != bot.user.id:
                     total_found += 1
                     if str(member.id) not in notifyList:
                         # random user to DM
@@ -14801,15 +15031,17 @@ async def tipall(ctx, amount: str, coin: str, option: str=None):
             list_user_not_mention = []
             list_user_not_mention_str = ""
             random.shuffle(listMembers)
-            for member in listMembers:
+            for member_id in listMembers:
                 if send_tipped_ping >= config.maxTipMessage:
                     total_found += 1
                 else:
-                    if ctx.message.author.id != member.id and member.id != bot.user.id:
-                        if str(member.id) not in notifyList:
-                            list_user_mention.append("{}".format(member.mention))
+                    if ctx.message.author.id != member_id and member_id != bot.user.id:
+                        if str(member_id) not in notifyList:
+                            list_user_mention.append("<@{}>".format(member_id))
                         else:
-                            list_user_not_mention.append("{}#{}".format(member.name, member.discriminator))
+                            member = ctx.guild.get_member(member_id)
+                            if member:
+                                list_user_not_mention.append("{}#{}".format(member.name, member.discriminator))
                     total_found += 1
                     numb_mention += 1
 
@@ -15009,7 +15241,7 @@ async def send(ctx, amount: str, CoinAddress: str, coin: str=None):
         elif COIN_NAME in ENABLE_COIN_TRC:
             coin_family = "TRC-20"
         else:
-            coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+            coin_family = get_coin_family(COIN_NAME)
     else:
         await ctx.message.add_reaction(EMOJI_QUESTEXCLAIM)
         try:
@@ -15793,7 +16025,7 @@ async def address(ctx, *args):
                 await msg.add_reaction(EMOJI_OK_BOX)
             return
         else:
-            coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+            coin_family = get_coin_family(COIN_NAME)
     else:
         if CoinAddress.startswith("0x"):
             if CoinAddress.upper().startswith("0X00000000000000000000000000000"):
@@ -16209,7 +16441,7 @@ async def make(ctx, amount: str, coin: str, *, comment):
             await ctx.message.add_reaction(EMOJI_ERROR)
             return
 
-    coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+    coin_family = get_coin_family(COIN_NAME)
     real_amount = int(voucher_each * get_decimal(COIN_NAME)) if coin_family in ["XMR", "TRTL", "BCN", "NANO", "XCH"] else float(voucher_each)
     total_real_amount = int(total_amount * get_decimal(COIN_NAME)) if coin_family in ["XMR", "TRTL", "BCN", "NANO", "XCH"] else float(total_amount)
     secret_string = str(uuid.uuid4())
@@ -16755,7 +16987,7 @@ async def stats(ctx, coin: str = None):
     elif COIN_NAME in ENABLE_COIN_TRC:
         coin_family = "TRC-20"
     else:
-        coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+        coin_family = get_coin_family(COIN_NAME)
     if coin_family in ["TRTL", "BCN"]:
         try:
             walletStatus = await daemonrpc_client.getWalletStatus(COIN_NAME)
@@ -17209,7 +17441,7 @@ async def height(ctx, coin: str = None):
     if isinstance(ctx.message.channel, discord.DMChannel) == False and ctx.guild.id == TRTL_DISCORD and COIN_NAME != "TRTL":
         return
 
-    coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+    coin_family = get_coin_family(COIN_NAME)
     if COIN_NAME not in (ENABLE_COIN + ENABLE_XMR + ENABLE_XCH):
         await ctx.message.add_reaction(EMOJI_ERROR)
         msg = await ctx.send(f'{ctx.author.mention} Unsupported or Unknown Ticker: **{COIN_NAME}**')
@@ -17472,6 +17704,7 @@ async def setting(ctx, *args):
                     return
                 else:
                     changeinfo = await store.sql_changeinfo_by_server(str(ctx.guild.id), 'prefix', args[1].lower())
+                    GUILD_PREFIX.pop(ctx.guild.id, None)
                     await ctx.send(f'{ctx.author.mention} Prefix changed from `{server_prefix}` to `{args[1].lower()}`.')
                     await botLogChan.send(f'{ctx.message.author.name} / {ctx.message.author.id} changed prefix in {ctx.guild.name} / {ctx.guild.id} to `{args[1].lower()}`')
                     return
@@ -17898,7 +18131,7 @@ async def sell(ctx, sell_amount: str, sell_ticker: str, buy_amount: str, buy_tic
         coin_family_sell = "TRC-20"
         sell_token_info = await store.get_token_info(sell_ticker)
     else:
-        coin_family_sell = getattr(getattr(config,"daemon"+sell_ticker),"coin_family","TRTL")
+        coin_family_sell = get_coin_family(sell_ticker)
         sell_token_info = None
 
     real_amount_sell = int(sell_amount * get_decimal(sell_ticker)) if coin_family_sell in ["BCN", "XMR", "TRTL", "NANO", "XCH"] else float(sell_amount)
@@ -17924,7 +18157,7 @@ async def sell(ctx, sell_amount: str, sell_ticker: str, buy_amount: str, buy_tic
         coin_family_buy = "TRC-20"
         buy_token_info = await store.get_token_info(buy_ticker)
     else:
-        coin_family_buy = getattr(getattr(config,"daemon"+buy_ticker),"coin_family","TRTL")
+        coin_family_buy = get_coin_family(buy_ticker)
         buy_token_info = None
 
     real_amount_buy = int(buy_amount * get_decimal(buy_ticker)) if coin_family_buy in ["BCN", "XMR", "TRTL", "NANO", "XCH"] else float(buy_amount)
@@ -18683,107 +18916,55 @@ async def get_info_pref_coin(ctx):
         return {'server_prefix': server_prefix, 'default_coin': server_coin, 'server_id': server_id, 'servername': ctx.guild.name, 'botchan': botchan}
 
 
-def get_cn_coin_from_address(CoinAddress: str):
-    COIN_NAME = None
-    if CoinAddress.startswith("Wrkz"):
-        COIN_NAME = "WRKZ"
-    elif CoinAddress.startswith("dg"):
-        COIN_NAME = "DEGO"
-    elif CoinAddress.startswith("Nimb"):
-        COIN_NAME = "NIMB"
-    elif CoinAddress.startswith("cat1"):
-        COIN_NAME = "CX"
-    elif CoinAddress.startswith("XCR"):
-        COIN_NAME = "NBXC"
-    elif CoinAddress.startswith("ccx7"):
-        COIN_NAME = "CCX"
-    elif CoinAddress.startswith("fango"):
-        COIN_NAME = "XFG"
-    elif CoinAddress.startswith("btcm"):
-        COIN_NAME = "BTCMZ"
-    elif CoinAddress.startswith("PLe"):
-        COIN_NAME = "PLE"
-    elif CoinAddress.startswith("TRTL"):
-        COIN_NAME = "TRTL"
-    elif CoinAddress.startswith("bit") and (len(CoinAddress) == 98 or len(CoinAddress) == 109):
-        COIN_NAME = "XTOR"
-    elif (CoinAddress.startswith("4") or CoinAddress.startswith("8") or CoinAddress.startswith("5") or CoinAddress.startswith("9")) \
-        and (len(CoinAddress) == 95 or len(CoinAddress) == 106):
-        # XMR / MSR
-        # 5, 9: MSR
-        # 4, 8: XMR
-        addr = None
-        # Try MSR
+# (prefix, accepted lengths or None for any, coin). Checked in this order within
+# the same first character, "XMR_PROBE" tries MSR / XMR / UPX address classes.
+CN_ADDRESS_PREFIX_RULES = [
+    ("Wrkz", None, "WRKZ"), ("dg", None, "DEGO"), ("Nimb", None, "NIMB"), ("cat1", None, "CX"),
+    ("XCR", None, "NBXC"), ("ccx7", None, "CCX"), ("fango", None, "XFG"), ("btcm", None, "BTCMZ"),
+    ("PLe", None, "PLE"), ("TRTL", None, "TRTL"), ("bit", [98, 109], "XTOR"),
+    ("4", [95, 106], "XMR_PROBE"), ("8", [95, 106], "XMR_PROBE"), ("5", [95, 106], "XMR_PROBE"), ("9", [95, 106], "XMR_PROBE"),
+    ("L", [95, 106], "LOKI"), ("cms", [98, 109], "BLOG"),
+    ("WW", [97], "WOW"), ("Wo", [97], "WOW"), ("So", [108], "WOW"),
+    ("Xw", [97], "XOL"), ("iz", [108], "XOL"),
+    ("gnt", [98, 99, 109], "GNTL"),
+    ("NV", [97], "XNV"), ("NS", [97], "XNV"), ("Ni", [109], "XNV"),
+    ("UPX", [98], "UPX"), ("UPi", [109], "UPX"), ("Um", [97], "UPX"),
+    ("fh", [97], "XWP"), ("fi", [108], "XWP"), ("fs", [97], "XWP"),
+    ("T", [34], "TRON_TOKEN"), ("D", [34], "DOGE"), ("V", [34], "KVA"),
+    ("M", [34], None), ("L", [34], None), ("4", [34], None), ("5", [34], None),
+    ("P", [34], "PGO"), ("Q", [34], "PGO"), ("3", [34], "BTC"), ("1", [34], "BTC"), ("X", [34], "DASH"),
+    ("ban_", [64], "BAN"), ("nano_", [65], "NANO"), ("xch", [62], "XCH"), ("xfx", [62], "XFX"),
+    ("iz", [97], "LTHN"), ("NaX", [108], "LTHN")
+]
+CN_ADDRESS_PREFIX_TABLE = {}
+for each_rule in CN_ADDRESS_PREFIX_RULES:
+    CN_ADDRESS_PREFIX_TABLE.setdefault(each_rule[0][0], []).append(each_rule)
+
+
+def get_xmr_coin_from_address(CoinAddress: str):
+    # XMR / MSR
+    # 5, 9: MSR
+    # 4, 8: XMR
+    for COIN_NAME, address_class in [("MSR", address_msr), ("XMR", address_xmr), ("UPX", address_upx)]:
         try:
-            addr = address_msr(CoinAddress)
-            COIN_NAME = "MSR"
+            addr = address_class(CoinAddress)
             return COIN_NAME
         except Exception as e:
-            # await logchanbot(traceback.format_exc())
+            # traceback.print_exc(file=sys.stdout)
             pass
-        # Try XMR
-        try:
-            addr = address_xmr(CoinAddress)
-            COIN_NAME = "XMR"
-            return COIN_NAME
-        except Exception as e:
-            # await logchanbot(traceback.format_exc())
-            pass
-        # Try UPX	
-        try:	
-            addr = address_upx(CoinAddress)	
-            COIN_NAME = "UPX"	
-            return COIN_NAME	
-        except Exception as e:	
-            # traceback.print_exc(file=sys.stdout)	
-            pass
-    elif CoinAddress.startswith("L") and (len(CoinAddress) == 95 or len(CoinAddress) == 106):
-        COIN_NAME = "LOKI"
-    elif CoinAddress.startswith("cms") and (len(CoinAddress) == 98 or len(CoinAddress) == 109):
-        COIN_NAME = "BLOG"
-    elif (CoinAddress.startswith("WW") and len(CoinAddress) == 97) or \
-    (CoinAddress.startswith("Wo") and len(CoinAddress) == 97) or \
-    (CoinAddress.startswith("So") and len(CoinAddress) == 108):
-        COIN_NAME = "WOW"
-    elif (CoinAddress.startswith("Xw") and len(CoinAddress) == 97) or \
-    (CoinAddress.startswith("iz") and len(CoinAddress) == 108):
-        COIN_NAME = "XOL"
-    elif CoinAddress.startswith("gnt") and (len(CoinAddress) == 98 or len(CoinAddress) == 99 or len(CoinAddress) == 109):
-        COIN_NAME = "GNTL"
-    elif ((CoinAddress.startswith("NV") or CoinAddress.startswith("NS")) and len(CoinAddress) == 97) or (CoinAddress.startswith("Ni") and len(CoinAddress) == 109):
-        COIN_NAME = "XNV"
-    elif ((CoinAddress.startswith("UPX") and len(CoinAddress) == 98) or (CoinAddress.startswith("UPi") and len(CoinAddress) == 109) or (CoinAddress.startswith("Um") and len(CoinAddress) == 97)):
-        COIN_NAME = "UPX"
-    elif (CoinAddress.startswith("5") or CoinAddress.startswith("9")) and (len(CoinAddress) == 95 or len(CoinAddress) == 106):
-        COIN_NAME = "MSR"
-    elif (CoinAddress.startswith("fh") and len(CoinAddress) == 97) or \
-    (CoinAddress.startswith("fi") and len(CoinAddress) == 108) or \
-    (CoinAddress.startswith("fs") and len(CoinAddress) == 97):
-        COIN_NAME = "XWP"
-    elif (CoinAddress[0] in ["T"]) and len(CoinAddress) == 34:
-        COIN_NAME = "TRON_TOKEN"
-    elif CoinAddress.startswith("D") and len(CoinAddress) == 34:
-        COIN_NAME = "DOGE"
-    elif CoinAddress.startswith("V") and len(CoinAddress) == 34:
-        COIN_NAME = "KVA"
-    elif (CoinAddress[0] in ["M", "L", "4", "5"]) and len(CoinAddress) == 34:
-        COIN_NAME = None
-    elif (CoinAddress[0] in ["P", "Q"]) and len(CoinAddress) == 34:
-        COIN_NAME = "PGO"
-    elif (CoinAddress[0] in ["3", "1"]) and len(CoinAddress) == 34:
-        COIN_NAME = "BTC"
-    elif (CoinAddress[0] in ["X"]) and len(CoinAddress) == 34:
-        COIN_NAME = "DASH"
-    elif CoinAddress.startswith("ban_") and len(CoinAddress) == 64:
-        COIN_NAME = "BAN"
-    elif CoinAddress.startswith("nano_") and len(CoinAddress) == 65:
-        COIN_NAME = "NANO"
-    elif CoinAddress.startswith("xch") and len(CoinAddress) == 62:
-        COIN_NAME = "XCH"
-    elif CoinAddress.startswith("xfx") and len(CoinAddress) == 62:
-        COIN_NAME = "XFX"
-    elif (CoinAddress.startswith("iz") and len(CoinAddress) == 97) or (CoinAddress.startswith("NaX") and len(CoinAddress) == 108):
-        COIN_NAME = "LTHN"
+    return None
+
+
+@functools.lru_cache(maxsize=4096)
+def get_cn_coin_from_address(CoinAddress: str):
+    COIN_NAME = None
+    if len(CoinAddress) > 0:
+        for prefix, lengths, coin in CN_ADDRESS_PREFIX_TABLE.get(CoinAddress[0], []):
+            if CoinAddress.startswith(prefix) and (lengths is None or len(CoinAddress) in lengths):
+                if coin == "XMR_PROBE":
+                    return get_xmr_coin_from_address(CoinAddress)
+                COIN_NAME = coin
+                break
     print('get_cn_coin_from_address return {}: {}'.format(CoinAddress, COIN_NAME))
     return COIN_NAME
 
@@ -19035,353 +19216,527 @@ async def on_command_error(ctx, error):
         pass
     elif isinstance(error, commands.CommandNotFound):
         pass
+    elif isinstance(error, commands.CommandInvokeError) and isinstance(error.original, UserBusy):
+        # another worker took this user between the TX_IN_PROCESS check and append
+        await ctx.send(f'{EMOJI_ERROR} {ctx.author.mention} You have another tx in progress.')
 
 
 # Update number of user, bot, channel
+def guild_stats_count(guild):
+    # Full count, only when a guild becomes available. Later changes come from member, channel
+    # and guild events; presence changes arrive as on_member_update in discord.py 1.x
+    GUILD_STATS[guild.id] = {
+        'servername': guild.name,
+        'numb_user': guild.member_count if guild.member_count else len(guild.members),
+        'numb_bot': sum(1 for member in guild.members if member.bot == True),
+        'numb_channel': len(guild.channels),
+        'numb_online': sum(1 for member in guild.members if member.status != discord.Status.offline)
+    }
+    GUILD_STATS_CHANGED.add(guild.id)
+    GUILD_ONLINE_MEMBERS[guild.id] = set(member.id for member in guild.members if member.status != discord.Status.offline and member.bot == False)
+
+
+def guild_stats_add(guild_id: int, key: str, value: int):
+    if guild_id in GUILD_STATS:
+        GUILD_STATS[guild_id][key] += value
+        GUILD_STATS_CHANGED.add(guild_id)
+
+
+def guild_online_member(member, is_online: bool):
+    online_members = GUILD_ONLINE_MEMBERS.get(member.guild.id)
+    if online_members is None or member.bot == True:
+        return
+    if is_online:
+        online_members.add(member.id)
+    else:
+        online_members.discard(member.id)
+
+
+def guild_stats_member(member, sign: int):
+    guild_stats_add(member.guild.id, 'numb_user', sign)
+    if member.bot == True:
+        guild_stats_add(member.guild.id, 'numb_bot', sign)
+    if member.status != discord.Status.offline:
+        guild_stats_add(member.guild.id, 'numb_online', sign)
+    guild_online_member(member, sign > 0 and member.status != discord.Status.offline)
+
+
+def guild_stats_status(before, after):
+    was_online = before.status != discord.Status.offline
+    is_online = after.status != discord.Status.offline
+    if was_online != is_online:
+        guild_stats_add(after.guild.id, 'numb_online', 1 if is_online else -1)
+        guild_online_member(after, is_online)
+
+
+@bot.event
+async def on_member_join(member):
+    guild_stats_member(member, 1)
+
+
+@bot.event
+async def on_member_remove(member):
+    guild_stats_member(member, -1)
+
+
+@bot.event
+async def on_member_update(before, after):
+    guild_stats_status(before, after)
+
+
+@bot.event
+async def on_guild_channel_create(channel):
+    guild_stats_add(channel.guild.id, 'numb_channel', 1)
+
+
+@bot.event
+async def on_guild_channel_delete(channel):
+    guild_stats_add(channel.guild.id, 'numb_channel', -1)
+
+
+@bot.event
+async def on_guild_available(guild):
+    # also after an outage, the counts kept from events may have missed changes
+    guild_stats_count(guild)
+
+
+@bot.event
+async def on_guild_unavailable(guild):
+    # no events while unavailable, count again on on_guild_available
+    GUILD_STATS.pop(guild.id, None)
+    GUILD_STATS_CHANGED.discard(guild.id)
+    # tipall ONLINE scans the members until the set is rebuilt
+    GUILD_ONLINE_MEMBERS.pop(guild.id, None)
+
+
+@bot.event
+async def on_guild_update(before, after):
+    if before.name != after.name and after.id in GUILD_STATS:
+        GUILD_STATS[after.id]['servername'] = after.name
+        GUILD_STATS_CHANGED.add(after.id)
+
+
 async def update_user_guild():
+    global GUILD_STATS_CHANGED
+    await bot.wait_until_ready()
+    for g in bot.guilds:
+        if g.id not in GUILD_STATS:
+            guild_stats_count(g)
+            # let others run between big guilds
+            await asyncio.sleep(0)
     while not bot.is_closed():
-        for g in bot.guilds:
-            num_channel = sum(1 for _ in g.channels)
-            num_user = sum(1 for _ in g.members)
-            num_bot = sum(1 for member in g.members if member.bot == True)
-            num_online = sum(1 for member in g.members if member.status != "offline")
-            await store.sql_updatestat_by_server(str(g.id), num_user, num_bot, num_channel, num_online, g.name)
+        if len(GUILD_STATS_CHANGED) > 0:
+            # events during the update go to a new set
+            changed = GUILD_STATS_CHANGED
+            GUILD_STATS_CHANGED = set()
+            list_stats = []
+            for guild_id in changed:
+                if guild_id in GUILD_STATS:
+                    each = GUILD_STATS[guild_id]
+                    list_stats.append((str(guild_id), each['servername'], each['numb_user'], each['numb_bot'], each['numb_channel'], each['numb_online']))
+            if len(list_stats) > 0 and await store.sql_updatestat_by_server_list(list_stats) == 0:
+                # failed, retry these next round
+                GUILD_STATS_CHANGED |= changed
         await asyncio.sleep(300)
 
 
-
 async def update_block_height():
-    sleep_time = 5
-    while True:
-        for coinItem in ENABLE_COIN+ENABLE_COIN_DOGE+ENABLE_XMR+ENABLE_XCH:
-            if is_maintenance_coin(coinItem) or not is_coin_depositable(coinItem):
-                continue
-            else:
-                start = time.time()
-                try:
-                    await store.sql_block_height(coinItem)
-                except Exception as e:
-                    await logchanbot(traceback.format_exc())
-                end = time.time()
-            if end - start > config.interval.log_longduration:
-                await logchanbot('update_block_height {} longer than {}s. Took {}s.'.format(coinItem, config.interval.log_longduration,  int(end - start)))
-        for coinItem in ENABLE_COIN_ERC+ENABLE_COIN_TRC:
-            if is_maintenance_coin(coinItem) or not is_coin_depositable(coinItem):
-                continue
-            else:
-                start = time.time()
-                try:
-                    if coinItem in ENABLE_COIN_ERC:
-                        await store.erc_get_block_number(coinItem)
-                    elif coinItem in ENABLE_COIN_TRC:
-                        await store.trx_get_block_number(coinItem)
-                except Exception as e:
-                    await logchanbot(traceback.format_exc())
-                end = time.time()
-            if end - start > config.interval.log_longduration:
-                await logchanbot('update_block_height {} longer than {}s. Took {}s.'.format(coinItem, config.interval.log_longduration, int(end - start)))
-        await asyncio.sleep(sleep_time)
-
-
-async def unlocked_move_pending_erc_trx():
-    while True:
-        await asyncio.sleep(config.interval.update_balance)
-        for coinItem in ENABLE_COIN_ERC+ENABLE_COIN_TRC:
-            if is_maintenance_coin(coinItem) or not is_coin_depositable(coinItem):
-                continue
+    for coinItem in ENABLE_COIN+ENABLE_COIN_DOGE+ENABLE_XMR+ENABLE_XCH:
+        if is_maintenance_coin(coinItem) or not is_coin_depositable(coinItem):
+            continue
+        else:
             start = time.time()
             try:
-                if coinItem in ENABLE_COIN_ERC:
-                    await store.erc_check_pending_move_deposit(coinItem, 'ALL')
-                    check_min = await store.erc_check_minimum_deposit(coinItem, 1800) # who inquire balance last 30mn
-                elif coinItem in ENABLE_COIN_TRC:
-                    await store.trx_check_pending_move_deposit(coinItem, 'ALL')
-                    check_min = await store.trx_check_minimum_deposit(coinItem, 1800) # who inquire balance last 30mn
+                await store.sql_block_height(coinItem)
             except Exception as e:
-                print(traceback.format_exc())
                 await logchanbot(traceback.format_exc())
             end = time.time()
-            if end - start > config.interval.log_longduration_token:
-                await logchanbot('unlocked_move_pending_erc_trx {} longer than {}s. Took {}s.'.format(coinItem, config.interval.log_longduration_token, int(end - start)))
-        await asyncio.sleep(config.interval.update_balance)
-
-
-async def erc_trx_notify_new_confirmed_spendable():
-    while True:
-        await asyncio.sleep(config.interval.update_balance)
-        for coinItem in ENABLE_COIN_ERC+ENABLE_COIN_TRC:
-            if is_maintenance_coin(coinItem) or not is_coin_depositable(coinItem):
-                continue
+        if end - start > config.interval.log_longduration:
+            await logchanbot('update_block_height {} longer than {}s. Took {}s.'.format(coinItem, config.interval.log_longduration,  int(end - start)))
+    for coinItem in ENABLE_COIN_ERC+ENABLE_COIN_TRC:
+        if is_maintenance_coin(coinItem) or not is_coin_depositable(coinItem):
+            continue
+        else:
             start = time.time()
             try:
-                notify_list = None
                 if coinItem in ENABLE_COIN_ERC:
-                    notify_list = await store.erc_get_pending_notification_users(coinItem)
+                    await store.erc_get_block_number(coinItem)
                 elif coinItem in ENABLE_COIN_TRC:
-                    notify_list = await store.trx_get_pending_notification_users(coinItem)
-                if notify_list and len(notify_list) > 0:
-                    for each_notify in notify_list:
-                        is_notify_failed = False
-                        member = bot.get_user(id=int(each_notify['user_id']))
-                        if member and int(each_notify['user_id']) != bot.user.id:
-                            msg = "You got a new deposit confirmed: ```" + "Amount: {}{}".format(each_notify['real_amount'], coinItem) + "```"
-                            try:
-                                await member.send(msg)
-                            except (discord.Forbidden, discord.errors.Forbidden, discord.errors.HTTPException) as e:
-                                is_notify_failed = True
-                            except Exception as e:
-                                traceback.print_exc(file=sys.stdout)
-                                await logchanbot(traceback.format_exc())
-                            if coinItem in ENABLE_COIN_ERC:
-                                update_status = await store.erc_updating_pending_move_deposit(True, is_notify_failed, each_notify['txn'])
-                            elif coinItem in ENABLE_COIN_TRC:
-                                update_status = await store.trx_updating_pending_move_deposit(True, is_notify_failed, each_notify['txn'])
+                    await store.trx_get_block_number(coinItem)
             except Exception as e:
                 await logchanbot(traceback.format_exc())
             end = time.time()
-        await asyncio.sleep(config.interval.update_balance)
+        if end - start > config.interval.log_longduration:
+            await logchanbot('update_block_height {} longer than {}s. Took {}s.'.format(coinItem, config.interval.log_longduration, int(end - start)))
+
+
+async def unlocked_move_pending_erc_trx():
+    for coinItem in ENABLE_COIN_ERC+ENABLE_COIN_TRC:
+        if is_maintenance_coin(coinItem) or not is_coin_depositable(coinItem):
+            continue
+        start = time.time()
+        try:
+            if coinItem in ENABLE_COIN_ERC:
+                await store.erc_check_pending_move_deposit(coinItem, 'ALL')
+                check_min = await store.erc_check_minimum_deposit(coinItem, 1800) # who inquire balance last 30mn
+            elif coinItem in ENABLE_COIN_TRC:
+                await store.trx_check_pending_move_deposit(coinItem, 'ALL')
+                check_min = await store.trx_check_minimum_deposit(coinItem, 1800) # who inquire balance last 30mn
+        except Exception as e:
+            print(traceback.format_exc())
+            await logchanbot(traceback.format_exc())
+        end = time.time()
+        if end - start > config.interval.log_longduration_token:
+            await logchanbot('unlocked_move_pending_erc_trx {} longer than {}s. Took {}s.'.format(coinItem, config.interval.log_longduration_token, int(end - start)))
+
+
+async def erc_trx_notify_new_confirmed_spendable():
+    for coinItem in ENABLE_COIN_ERC+ENABLE_COIN_TRC:
+        if is_maintenance_coin(coinItem) or not is_coin_depositable(coinItem):
+            continue
+        start = time.time()
+        try:
+            notify_list = None
+            if coinItem in ENABLE_COIN_ERC:
+                notify_list = await store.erc_get_pending_notification_users(coinItem)
+            elif coinItem in ENABLE_COIN_TRC:
+                notify_list = await store.trx_get_pending_notification_users(coinItem)
+            if notify_list and len(notify_list) > 0:
+                for each_notify in notify_list:
+                    is_notify_failed = False
+                    member = await find_user(int(each_notify['user_id']))
+                    if member and int(each_notify['user_id']) != bot_user_id():
+                        msg = "You got a new deposit confirmed: ```" + "Amount: {}{}".format(each_notify['real_amount'], coinItem) + "```"
+                        try:
+                            await member.send(msg)
+                        except (discord.Forbidden, discord.errors.Forbidden, discord.errors.HTTPException) as e:
+                            is_notify_failed = True
+                        except Exception as e:
+                            traceback.print_exc(file=sys.stdout)
+                            await logchanbot(traceback.format_exc())
+                        if coinItem in ENABLE_COIN_ERC:
+                            update_status = await store.erc_updating_pending_move_deposit(True, is_notify_failed, each_notify['txn'])
+                        elif coinItem in ENABLE_COIN_TRC:
+                            update_status = await store.trx_updating_pending_move_deposit(True, is_notify_failed, each_notify['txn'])
+        except Exception as e:
+            await logchanbot(traceback.format_exc())
+        end = time.time()
 
 
 # Let's run balance update by a separate process
 async def update_balance():
-    while True:
-        for coinItem in ENABLE_COIN+ENABLE_COIN_DOGE+ENABLE_XMR+ENABLE_XCH:
-            if is_maintenance_coin(coinItem) or not is_coin_depositable(coinItem):
-                continue
-            start = time.time()
-            try:
-                await store.sql_update_balances(coinItem)
-            except Exception as e:
-                await logchanbot(traceback.format_exc())
-            end = time.time()
-            if end - start > config.interval.log_longduration:
-                await logchanbot('update_balance {} longer than {}s. Took {}s'.format(coinItem, config.interval.log_longduration, int(end - start)))
-        await asyncio.sleep(config.interval.update_balance)
+    for coinItem in ENABLE_COIN+ENABLE_COIN_DOGE+ENABLE_XMR+ENABLE_XCH:
+        if is_maintenance_coin(coinItem) or not is_coin_depositable(coinItem):
+            continue
+        start = time.time()
+        try:
+            await store.sql_update_balances(coinItem)
+        except Exception as e:
+            await logchanbot(traceback.format_exc())
+        end = time.time()
+        if end - start > config.interval.log_longduration:
+            await logchanbot('update_balance {} longer than {}s. Took {}s'.format(coinItem, config.interval.log_longduration, int(end - start)))
 
 
 # notify_new_tx_user_noconfirmation
 async def notify_new_tx_user_noconfirmation():
     global redis_conn
-    INTERVAL_EACH = config.interval.notify_tx
-    while not bot.is_closed():
-        await asyncio.sleep(INTERVAL_EACH)
-        if config.notify_new_tx.enable_new_no_confirm == 1:
-            key_tx_new = config.redis_setting.prefix_new_tx + 'NOCONFIRM'
-            key_tx_no_confirmed_sent = config.redis_setting.prefix_new_tx + 'NOCONFIRM:SENT'
-            try:
-                openRedis()
-                if redis_conn and redis_conn.llen(key_tx_new) > 0:
-                    list_new_tx = redis_conn.lrange(key_tx_new, 0, -1)
-                    list_new_tx_sent = redis_conn.lrange(key_tx_no_confirmed_sent, 0, -1) # byte list with b'xxx'
-                    # Unique the list
-                    list_new_tx = np.unique(list_new_tx).tolist()
-                    list_new_tx_sent = np.unique(list_new_tx_sent).tolist()
-                    for tx in list_new_tx:
-                        try:
-                            if tx not in list_new_tx_sent:
-                                tx = tx.decode() # decode byte from b'xxx to xxx
-                                key_tx_json = config.redis_setting.prefix_new_tx + tx
-                                eachTx = None
-                                try:
-                                    if redis_conn.exists(key_tx_json): eachTx = json.loads(redis_conn.get(key_tx_json).decode())
-                                except Exception as e:
-                                    await logchanbot(traceback.format_exc())
-                                if eachTx and eachTx['coin_name'] in ENABLE_COIN+ENABLE_COIN_DOGE+ENABLE_XMR+ENABLE_XCH:
-                                    user_tx = await store.sql_get_userwallet_by_paymentid(eachTx['payment_id'], eachTx['coin_name'], SERVER_BOT)
-                                    if user_tx and eachTx['coin_name'] in ENABLE_COIN+ENABLE_COIN_DOGE+ENABLE_XMR+ENABLE_XCH:
-                                        user_found = bot.get_user(id=int(user_tx['user_id']))
-                                        if user_found:
+    if config.notify_new_tx.enable_new_no_confirm == 1:
+        key_tx_new = config.redis_setting.prefix_new_tx + 'NOCONFIRM'
+        key_tx_no_confirmed_sent = config.redis_setting.prefix_new_tx + 'NOCONFIRM:SENT'
+        try:
+            openRedis()
+            if redis_conn and redis_conn.llen(key_tx_new) > 0:
+                list_new_tx = redis_conn.lrange(key_tx_new, 0, -1)
+                list_new_tx_sent = redis_conn.lrange(key_tx_no_confirmed_sent, 0, -1) # byte list with b'xxx'
+                # Unique the list
+                list_new_tx = np.unique(list_new_tx).tolist()
+                list_new_tx_sent = np.unique(list_new_tx_sent).tolist()
+                for tx in list_new_tx:
+                    try:
+                        if tx not in list_new_tx_sent:
+                            tx = tx.decode() # decode byte from b'xxx to xxx
+                            key_tx_json = config.redis_setting.prefix_new_tx + tx
+                            eachTx = None
+                            try:
+                                if redis_conn.exists(key_tx_json): eachTx = json.loads(redis_conn.get(key_tx_json).decode())
+                            except Exception as e:
+                                await logchanbot(traceback.format_exc())
+                            if eachTx and eachTx['coin_name'] in ENABLE_COIN+ENABLE_COIN_DOGE+ENABLE_XMR+ENABLE_XCH:
+                                user_tx = await store.sql_get_userwallet_by_paymentid(eachTx['payment_id'], eachTx['coin_name'], SERVER_BOT)
+                                if user_tx and eachTx['coin_name'] in ENABLE_COIN+ENABLE_COIN_DOGE+ENABLE_XMR+ENABLE_XCH:
+                                    user_found = await find_user(int(user_tx['user_id']))
+                                    if user_found:
+                                        try:
+                                            msg = None
+                                            confirmation_number_txt = "{} needs {} confirmations.".format(eachTx['coin_name'], get_confirm_depth(eachTx['coin_name']))
+                                            if eachTx['coin_name'] not in ENABLE_COIN_DOGE:
+                                                msg = "You got a new **pending** deposit: ```" + "Coin: {}\nTx: {}\nAmount: {}\nHeight: {:,.0f}\n{}".format(eachTx['coin_name'], eachTx['txid'], num_format_coin(eachTx['amount'], eachTx['coin_name']), eachTx['height'], confirmation_number_txt) + "```"
+                                            else:
+                                                msg = "You got a new **pending** deposit: ```" + "Coin: {}\nTx: {}\nAmount: {}\nBlock Hash: {}\n{}".format(eachTx['coin_name'], eachTx['txid'], num_format_coin(eachTx['amount'], eachTx['coin_name']), eachTx['blockhash'], confirmation_number_txt) + "```"
+                                            await user_found.send(msg)
+                                        except (discord.Forbidden, discord.errors.Forbidden, discord.errors.HTTPException) as e:
+                                            pass
+                                        # TODO:
+                                        redis_conn.lpush(key_tx_no_confirmed_sent, tx)
+                                    else:
+                                        # try to find if it is guild
+                                        guild_found = await find_guild(int(user_tx['user_id']))
+                                        if guild_found: user_found = await find_user(guild_found.owner_id)
+                                        if guild_found and user_found:
                                             try:
                                                 msg = None
                                                 confirmation_number_txt = "{} needs {} confirmations.".format(eachTx['coin_name'], get_confirm_depth(eachTx['coin_name']))
                                                 if eachTx['coin_name'] not in ENABLE_COIN_DOGE:
-                                                    msg = "You got a new **pending** deposit: ```" + "Coin: {}\nTx: {}\nAmount: {}\nHeight: {:,.0f}\n{}".format(eachTx['coin_name'], eachTx['txid'], num_format_coin(eachTx['amount'], eachTx['coin_name']), eachTx['height'], confirmation_number_txt) + "```"
+                                                    msg = "Your guild got a new **pending** deposit: ```" + "Coin: {}\nTx: {}\nAmount: {}\nHeight: {:,.0f}\n{}".format(eachTx['coin_name'], eachTx['txid'], num_format_coin(eachTx['amount'], eachTx['coin_name']), eachTx['height'], confirmation_number_txt) + "```"
                                                 else:
-                                                    msg = "You got a new **pending** deposit: ```" + "Coin: {}\nTx: {}\nAmount: {}\nBlock Hash: {}\n{}".format(eachTx['coin_name'], eachTx['txid'], num_format_coin(eachTx['amount'], eachTx['coin_name']), eachTx['blockhash'], confirmation_number_txt) + "```"
+                                                    msg = "Your guild got a new **pending** deposit: ```" + "Coin: {}\nTx: {}\nAmount: {}\nBlock Hash: {}\n{}".format(eachTx['coin_name'], eachTx['txid'], num_format_coin(eachTx['amount'], eachTx['coin_name']), eachTx['blockhash'], confirmation_number_txt) + "```"
                                                 await user_found.send(msg)
                                             except (discord.Forbidden, discord.errors.Forbidden, discord.errors.HTTPException) as e:
                                                 pass
-                                            # TODO:
+                                            except Exception as e:
+                                                await logchanbot(traceback.format_exc())
                                             redis_conn.lpush(key_tx_no_confirmed_sent, tx)
                                         else:
-                                            # try to find if it is guild
-                                            guild_found = bot.get_guild(id=int(user_tx['user_id']))
-                                            if guild_found: user_found = bot.get_user(id=guild_found.owner.id)
-                                            if guild_found and user_found:
-                                                try:
-                                                    msg = None
-                                                    confirmation_number_txt = "{} needs {} confirmations.".format(eachTx['coin_name'], get_confirm_depth(eachTx['coin_name']))
-                                                    if eachTx['coin_name'] not in ENABLE_COIN_DOGE:
-                                                        msg = "Your guild got a new **pending** deposit: ```" + "Coin: {}\nTx: {}\nAmount: {}\nHeight: {:,.0f}\n{}".format(eachTx['coin_name'], eachTx['txid'], num_format_coin(eachTx['amount'], eachTx['coin_name']), eachTx['height'], confirmation_number_txt) + "```"
-                                                    else:
-                                                        msg = "Your guild got a new **pending** deposit: ```" + "Coin: {}\nTx: {}\nAmount: {}\nBlock Hash: {}\n{}".format(eachTx['coin_name'], eachTx['txid'], num_format_coin(eachTx['amount'], eachTx['coin_name']), eachTx['blockhash'], confirmation_number_txt) + "```"
-                                                    await user_found.send(msg)
-                                                except (discord.Forbidden, discord.errors.Forbidden, discord.errors.HTTPException) as e:
-                                                    pass
-                                                except Exception as e:
-                                                    await logchanbot(traceback.format_exc())
-                                                redis_conn.lpush(key_tx_no_confirmed_sent, tx)
-                                            else:
-                                                #print('Can not find user id {} to notification **pending** tx: {}'.format(user_tx['user_id'], eachTx['txid']))
-                                                pass
-                                    # TODO: if no user
-                                    # elif eachTx['coin_name'] in ENABLE_COIN+ENABLE_COIN_DOGE+ENABLE_XMR:
-                                    #    redis_conn.lpush(key_tx_no_confirmed_sent, tx)
-                                # if disable coin
-                                else:
-                                    redis_conn.lpush(key_tx_no_confirmed_sent, tx)
-                        except Exception as e:
-                            await logchanbot(traceback.format_exc())
-            except Exception as e:
-                await logchanbot(traceback.format_exc())
-        await asyncio.sleep(INTERVAL_EACH)
+                                            #print('Can not find user id {} to notification **pending** tx: {}'.format(user_tx['user_id'], eachTx['txid']))
+                                            pass
+                                # TODO: if no user
+                                # elif eachTx['coin_name'] in ENABLE_COIN+ENABLE_COIN_DOGE+ENABLE_XMR:
+                                #    redis_conn.lpush(key_tx_no_confirmed_sent, tx)
+                            # if disable coin
+                            else:
+                                redis_conn.lpush(key_tx_no_confirmed_sent, tx)
+                    except Exception as e:
+                        await logchanbot(traceback.format_exc())
+        except Exception as e:
+            await logchanbot(traceback.format_exc())
 
 
 # Notify user
 async def notify_new_tx_user():
-    INTERVAL_EACH = config.interval.notify_tx
-    while not bot.is_closed():
-        await asyncio.sleep(INTERVAL_EACH)
-        pending_tx = await store.sql_get_new_tx_table('NO', 'NO')
-        if pending_tx and len(pending_tx) > 0:
-            # let's notify_new_tx_user
-            for eachTx in pending_tx:
-                try:
-                    if eachTx['coin_name'] in ENABLE_COIN+ENABLE_COIN_DOGE+ENABLE_XMR+ENABLE_COIN_NANO+ENABLE_XCH:
-                        user_tx = await store.sql_get_userwallet_by_paymentid(eachTx['payment_id'], eachTx['coin_name'], SERVER_BOT)
-                        if user_tx and user_tx['user_id']:
-                            user_found = bot.get_user(id=int(user_tx['user_id']))
-                            if user_found:
+    pending_tx = await store.sql_get_new_tx_table('NO', 'NO')
+    if pending_tx and len(pending_tx) > 0:
+        # let's notify_new_tx_user
+        for eachTx in pending_tx:
+            try:
+                if eachTx['coin_name'] in ENABLE_COIN+ENABLE_COIN_DOGE+ENABLE_XMR+ENABLE_COIN_NANO+ENABLE_XCH:
+                    user_tx = await store.sql_get_userwallet_by_paymentid(eachTx['payment_id'], eachTx['coin_name'], SERVER_BOT)
+                    if user_tx and user_tx['user_id']:
+                        user_found = await find_user(int(user_tx['user_id']))
+                        if user_found:
+                            is_notify_failed = False
+                            try:
+                                msg = None
+                                if eachTx['coin_name'] in ENABLE_COIN_NANO:
+                                    msg = "You got a new deposit: ```" + "Coin: {}\nAmount: {}".format(eachTx['coin_name'], num_format_coin(eachTx['amount'], eachTx['coin_name'])) + "```"   
+                                elif eachTx['coin_name'] not in ENABLE_COIN_DOGE:
+                                    msg = "You got a new deposit confirmed: ```" + "Coin: {}\nTx: {}\nAmount: {}\nHeight: {:,.0f}".format(eachTx['coin_name'], eachTx['txid'], num_format_coin(eachTx['amount'], eachTx['coin_name']), eachTx['height']) + "```"                         
+                                else:
+                                    msg = "You got a new deposit confirmed: ```" + "Coin: {}\nTx: {}\nAmount: {}\nBlock Hash: {}".format(eachTx['coin_name'], eachTx['txid'], num_format_coin(eachTx['amount'], eachTx['coin_name']), eachTx['blockhash']) + "```"
+                                await user_found.send(msg)
+                            except (discord.Forbidden, discord.errors.Forbidden, discord.errors.HTTPException) as e:
+                                is_notify_failed = True
+                                pass
+                            except Exception as e:
+                                await logchanbot(traceback.format_exc())
+                            update_notify_tx = await store.sql_update_notify_tx_table(eachTx['payment_id'], user_tx['user_id'], user_found.name, 'YES', 'NO' if is_notify_failed == False else 'YES')
+                        else:
+                            # try to find if it is guild
+                            guild_found = await find_guild(int(user_tx['user_id']))
+                            if guild_found: user_found = await find_user(guild_found.owner_id)
+                            if guild_found and user_found:
                                 is_notify_failed = False
                                 try:
                                     msg = None
                                     if eachTx['coin_name'] in ENABLE_COIN_NANO:
-                                        msg = "You got a new deposit: ```" + "Coin: {}\nAmount: {}".format(eachTx['coin_name'], num_format_coin(eachTx['amount'], eachTx['coin_name'])) + "```"   
+                                        msg = "Your guild got a new deposit: ```" + "Coin: {}\nAmount: {}".format(eachTx['coin_name'], num_format_coin(eachTx['amount'], eachTx['coin_name'])) + "```"   
                                     elif eachTx['coin_name'] not in ENABLE_COIN_DOGE:
-                                        msg = "You got a new deposit confirmed: ```" + "Coin: {}\nTx: {}\nAmount: {}\nHeight: {:,.0f}".format(eachTx['coin_name'], eachTx['txid'], num_format_coin(eachTx['amount'], eachTx['coin_name']), eachTx['height']) + "```"                         
+                                        msg = "Your guild got a new deposit confirmed: ```" + "Coin: {}\nTx: {}\nAmount: {}\nHeight: {:,.0f}".format(eachTx['coin_name'], eachTx['txid'], num_format_coin(eachTx['amount'], eachTx['coin_name']), eachTx['height']) + "```"                         
                                     else:
-                                        msg = "You got a new deposit confirmed: ```" + "Coin: {}\nTx: {}\nAmount: {}\nBlock Hash: {}".format(eachTx['coin_name'], eachTx['txid'], num_format_coin(eachTx['amount'], eachTx['coin_name']), eachTx['blockhash']) + "```"
+                                        msg = "Your guild got a new deposit confirmed: ```" + "Coin: {}\nTx: {}\nAmount: {}\nBlock Hash: {}".format(eachTx['coin_name'], eachTx['txid'], num_format_coin(eachTx['amount'], eachTx['coin_name']), eachTx['blockhash']) + "```"
                                     await user_found.send(msg)
                                 except (discord.Forbidden, discord.errors.Forbidden, discord.errors.HTTPException) as e:
                                     is_notify_failed = True
                                     pass
                                 except Exception as e:
                                     await logchanbot(traceback.format_exc())
-                                update_notify_tx = await store.sql_update_notify_tx_table(eachTx['payment_id'], user_tx['user_id'], user_found.name, 'YES', 'NO' if is_notify_failed == False else 'YES')
+                                update_notify_tx = await store.sql_update_notify_tx_table(eachTx['payment_id'], user_tx['user_id'], guild_found.name, 'YES', 'NO' if is_notify_failed == False else 'YES')
                             else:
-                                # try to find if it is guild
-                                guild_found = bot.get_guild(id=int(user_tx['user_id']))
-                                if guild_found: user_found = bot.get_user(id=guild_found.owner.id)
-                                if guild_found and user_found:
-                                    is_notify_failed = False
-                                    try:
-                                        msg = None
-                                        if eachTx['coin_name'] in ENABLE_COIN_NANO:
-                                            msg = "Your guild got a new deposit: ```" + "Coin: {}\nAmount: {}".format(eachTx['coin_name'], num_format_coin(eachTx['amount'], eachTx['coin_name'])) + "```"   
-                                        elif eachTx['coin_name'] not in ENABLE_COIN_DOGE:
-                                            msg = "Your guild got a new deposit confirmed: ```" + "Coin: {}\nTx: {}\nAmount: {}\nHeight: {:,.0f}".format(eachTx['coin_name'], eachTx['txid'], num_format_coin(eachTx['amount'], eachTx['coin_name']), eachTx['height']) + "```"                         
-                                        else:
-                                            msg = "Your guild got a new deposit confirmed: ```" + "Coin: {}\nTx: {}\nAmount: {}\nBlock Hash: {}".format(eachTx['coin_name'], eachTx['txid'], num_format_coin(eachTx['amount'], eachTx['coin_name']), eachTx['blockhash']) + "```"
-                                        await user_found.send(msg)
-                                    except (discord.Forbidden, discord.errors.Forbidden, discord.errors.HTTPException) as e:
-                                        is_notify_failed = True
-                                        pass
-                                    except Exception as e:
-                                        await logchanbot(traceback.format_exc())
-                                    update_notify_tx = await store.sql_update_notify_tx_table(eachTx['payment_id'], user_tx['user_id'], guild_found.name, 'YES', 'NO' if is_notify_failed == False else 'YES')
-                                else:
-                                    #print('Can not find user id {} to notification tx: {}'.format(user_tx['user_id'], eachTx['txid']))
-                                    pass
-                except Exception as e:
-                    traceback.print_exc(file=sys.stdout)
-                    await logchanbot(traceback.format_exc())
-        await asyncio.sleep(INTERVAL_EACH)
+                                #print('Can not find user id {} to notification tx: {}'.format(user_tx['user_id'], eachTx['txid']))
+                                pass
+            except Exception as e:
+                traceback.print_exc(file=sys.stdout)
+                await logchanbot(traceback.format_exc())
 
 
 # Notify user
 async def notify_new_move_balance_user():
     time_lap = 5
-    while not bot.is_closed():
-        await asyncio.sleep(time_lap)
-        pending_tx = await store.sql_get_move_balance_table('NO', 'NO')
-        if pending_tx and len(pending_tx) > 0:
-            # let's notify_new_tx_user
-            for eachTx in pending_tx:
+    pending_tx = await store.sql_get_move_balance_table('NO', 'NO')
+    if pending_tx and len(pending_tx) > 0:
+        # let's notify_new_tx_user
+        for eachTx in pending_tx:
+            try:
+                if eachTx['coin_name'] in ENABLE_COIN+ENABLE_COIN_DOGE+ENABLE_XMR+ENABLE_COIN_NANO:
+                    if eachTx['to_server'] == SERVER_BOT:
+                        user_found = await find_user(int(eachTx['to_userid']))
+                        if user_found:
+                            is_notify_failed = False
+                            try:
+                                msg = "You got a new tip: ```" + "Coin: {}\nAmount: {}\nFrom: {}@{}".format(eachTx['coin_name'], num_format_coin(eachTx['amount'], eachTx['coin_name']), eachTx['from_name'], eachTx['from_server']) + "```"   
+                                await user_found.send(msg)
+                            except (discord.Forbidden, discord.errors.Forbidden, discord.errors.HTTPException) as e:
+                                is_notify_failed = True
+                            except Exception as e:
+                                await logchanbot(traceback.format_exc())
+                            update_receiver = await store.sql_update_move_balance_table(eachTx['id'], 'RECEIVER')
+                        else:
+                            await asyncio.sleep(time_lap)
+            except Exception as e:
+                await logchanbot(traceback.format_exc())
+
+
+async def trade_complete_sale_notify():
+    # get list of people to notify
+    list_complete_sale_notify = await store.sql_get_completed_sale_notify(SERVER_BOT)
+    if list_complete_sale_notify and len(list_complete_sale_notify) > 0:
+        for each_notify in list_complete_sale_notify:
+            is_notify_failed = False
+            member = await find_user(int(each_notify['userid_sell']))
+            if member and int(each_notify['userid_sell']) != bot_user_id():
+                msg = "**#{}** Order completed!".format(each_notify['order_id'])
                 try:
-                    if eachTx['coin_name'] in ENABLE_COIN+ENABLE_COIN_DOGE+ENABLE_XMR+ENABLE_COIN_NANO:
-                        if eachTx['to_server'] == SERVER_BOT:
-                            user_found = bot.get_user(id=int(eachTx['to_userid']))
-                            if user_found:
-                                is_notify_failed = False
-                                try:
-                                    msg = "You got a new tip: ```" + "Coin: {}\nAmount: {}\nFrom: {}@{}".format(eachTx['coin_name'], num_format_coin(eachTx['amount'], eachTx['coin_name']), eachTx['from_name'], eachTx['from_server']) + "```"   
-                                    await user_found.send(msg)
-                                except (discord.Forbidden, discord.errors.Forbidden, discord.errors.HTTPException) as e:
-                                    is_notify_failed = True
-                                except Exception as e:
-                                    await logchanbot(traceback.format_exc())
-                                update_receiver = await store.sql_update_move_balance_table(eachTx['id'], 'RECEIVER')
-                            else:
-                                await asyncio.sleep(time_lap)
+                    await member.send(msg)
+                except (discord.Forbidden, discord.errors.Forbidden, discord.errors.HTTPException) as e:
+                    is_notify_failed = True
                 except Exception as e:
+                    traceback.print_exc(file=sys.stdout)
                     await logchanbot(traceback.format_exc())
-        await asyncio.sleep(time_lap)
+                update_status = await store.trade_sale_notify_update(each_notify['order_id'], "YES", "YES" if is_notify_failed == True else "NO")
 
 
-async def trade_complete_sale_notify():
-    while True:
-        await asyncio.sleep(30.0)
-        # get list of people to notify
-        list_complete_sale_notify = await store.sql_get_completed_sale_notify(SERVER_BOT)
-        if list_complete_sale_notify and len(list_complete_sale_notify) > 0:
-            for each_notify in list_complete_sale_notify:
-                is_notify_failed = False
-                member = bot.get_user(id=int(each_notify['userid_sell']))
-                if member and int(each_notify['userid_sell']) != bot.user.id:
-                    msg = "**#{}** Order completed!".format(each_notify['order_id'])
-                    try:
-                        await member.send(msg)
-                    except (discord.Forbidden, discord.errors.Forbidden, discord.errors.HTTPException) as e:
-                        is_notify_failed = True
-                    except Exception as e:
-                        traceback.print_exc(file=sys.stdout)
-                        await logchanbot(traceback.format_exc())
-                    update_status = await store.trade_sale_notify_update(each_notify['order_id'], "YES", "YES" if is_notify_failed == True else "NO")
-        await asyncio.sleep(30.0)
+def saving_wallet_setting(coin: str, name: str, default):
+    # per coin override in daemon<COIN>, else interval.<name>
+    return getattr(getattr(config,"daemon"+coin), name, getattr(config.interval, name, default))
 
 
-async def saving_wallet():
-    global LOG_CHAN
-    saving = False
-    botLogChan = bot.get_channel(id=LOG_CHAN)
+async def wallet_save_fingerprint(coin: str):
+    # wallet height and balance, they change when blocks are synced or transfers are made
+    COIN_NAME = coin.upper()
+    walletStatus = await daemonrpc_client.getWalletStatus(COIN_NAME)
+    if COIN_NAME in WALLET_API_COIN:
+        walletBalance = await walletapi.walletapi_get_sum_balances(COIN_NAME)
+    elif get_coin_family(COIN_NAME) == "XMR":
+        walletBalance = await rpc_client.call_aiohttp_wallet('get_balance', COIN_NAME, payload={'all_accounts': True})
+        if walletBalance:
+            walletBalance = {'unlocked': walletBalance['unlocked_balance'], 'locked': walletBalance['balance']}
+    else:
+        walletBalance = await get_sum_balances(COIN_NAME)
+    if walletStatus is None or walletBalance is None:
+        return None
+    height = walletStatus.get('blockCount', walletStatus.get('height'))
+    return json.dumps([height, walletBalance], sort_keys=True)
+
+
+def wallet_save_record(coin: str, status: str, duration: float=None):
+    global WALLET_SAVE_STATS, redis_conn
+    stats = WALLET_SAVE_STATS.setdefault(coin, {'saved': 0, 'skipped': 0, 'failed': 0, 'last_duration': None, \
+                                                'max_duration': 0.0, 'total_duration': 0.0, 'last_ts': None, 'last_status': None})
+    stats[status] += 1
+    stats['last_status'] = status
+    stats['last_ts'] = int(time.time())
+    if duration is not None:
+        stats['last_duration'] = round(duration, 3)
+        stats['total_duration'] += duration
+        stats['max_duration'] = max(stats['max_duration'], duration)
+    try:
+        openRedis()
+        if redis_conn:
+            redis_conn.set("TIPBOT:WALLETSAVE:" + coin, json.dumps(stats))
+    except Exception as e:
+        traceback.print_exc(file=sys.stdout)
+
+
+async def saving_wallet_coin(coin: str, first_delay: float, save_limit):
+    global WALLET_SAVE_FINGERPRINT
+    COIN_NAME = coin.upper()
+    interval = saving_wallet_setting(COIN_NAME, "saving_wallet_interval", config.interval.wallet_balance_update_interval)
+    time_out = saving_wallet_setting(COIN_NAME, "saving_wallet_timeout", 300)
+    await asyncio.sleep(first_delay)
     while not bot.is_closed():
-        while botLogChan is None:
-            botLogChan = bot.get_channel(id=LOG_CHAN)
-            await asyncio.sleep(10)
-        COIN_SAVING = ENABLE_COIN + ENABLE_XMR
-        for COIN_NAME in COIN_SAVING:
-            if is_maintenance_coin(COIN_NAME) or (COIN_NAME in ["BCN"]):
-                continue
-            if (COIN_NAME in ENABLE_COIN + ENABLE_XMR) and saving == False:
+        if is_maintenance_coin(COIN_NAME):
+            await asyncio.sleep(interval)
+            continue
+        try:
+            fingerprint = await wallet_save_fingerprint(COIN_NAME)
+            if fingerprint and fingerprint == WALLET_SAVE_FINGERPRINT.get(COIN_NAME):
+                wallet_save_record(COIN_NAME, 'skipped')
+            else:
                 duration = None
-                saving = True
-                try:
-                    if COIN_NAME in WALLET_API_COIN:
-                        duration = await walletapi.save_walletapi(COIN_NAME)
-                    else:
-                        duration = await rpc_cn_wallet_save(COIN_NAME)
-                except Exception as e:
-                    await logchanbot(traceback.format_exc())
+                async with save_limit:
+                    try:
+                        if COIN_NAME in WALLET_API_COIN:
+                            duration = await asyncio.wait_for(walletapi.save_walletapi(COIN_NAME), timeout=time_out)
+                        else:
+                            duration = await asyncio.wait_for(rpc_cn_wallet_save(COIN_NAME), timeout=time_out)
+                    except asyncio.TimeoutError:
+                        print(f'WARNING: AUTOSAVE FOR {COIN_NAME} TIMEOUT {time_out}s.')
                 if duration:
+                    wallet_save_record(COIN_NAME, 'saved', duration)
+                    if fingerprint:
+                        WALLET_SAVE_FINGERPRINT[COIN_NAME] = fingerprint
                     if duration > 30:
-                        await botLogChan.send(f'INFO: AUTOSAVE FOR **{COIN_NAME}** TOOK **{round(duration, 3)}s**.')
-                    elif duration > 5:
-                        print(f'INFO: AUTOSAVE FOR **{COIN_NAME}** TOOK **{round(duration, 3)}s**.')
+                        await logchanbot(f'INFO: AUTOSAVE FOR {COIN_NAME} TOOK {round(duration, 3)}s.')
                 else:
-                    await botLogChan.send(f'WARNING: AUTOSAVE FOR **{COIN_NAME}** FAILED.')
-                saving = False
-            await asyncio.sleep(config.interval.saving_wallet_sleep)
-        await asyncio.sleep(config.interval.wallet_balance_update_interval)
+                    wallet_save_record(COIN_NAME, 'failed')
+                    await logchanbot(f'WARNING: AUTOSAVE FOR {COIN_NAME} FAILED.')
+        except Exception as e:
+            await logchanbot(traceback.format_exc())
+        await asyncio.sleep(interval)
+
+
+async def saving_wallet():
+    # Each coin saves on its own schedule, started staggered by saving_wallet_sleep
+    save_limit = asyncio.Semaphore(int(getattr(config.interval, "saving_wallet_concurrent", 2)))
+    coin_tasks = []
+    i = 0
+    for COIN_NAME in ENABLE_COIN + ENABLE_XMR:
+        if COIN_NAME in ["BCN"]:
+            continue
+        coin_tasks.append(saving_wallet_coin(COIN_NAME, i * config.interval.saving_wallet_sleep, save_limit))
+        i += 1
+    # gathered, so losing scanner leadership stops every coin
+    await asyncio.gather(*coin_tasks)
+
+
+async def register_tip_receiver(user_id: str, coin: str, coin_family: str):
+    user_to = await store.sql_get_userwallet(user_id, coin)
+    if user_to is None:
+        if coin_family == "ERC-20":
+            w = await create_address_eth()
+            userregister = await store.sql_register_user(user_id, coin, SERVER_BOT, 0, w)
+        elif coin_family == "TRC-20":
+            result = await store.create_address_trx()
+            userregister = await store.sql_register_user(user_id, coin, SERVER_BOT, 0, result)
+        else:
+            userregister = await store.sql_register_user(user_id, coin, SERVER_BOT, 0)
+
+
+async def prepare_tip_receivers(member_ids, coin: str, coin_family: str):
+    # Make sure every receiver has a wallet, existing ones are looked up in bulk
+    # and missing ones registered in one insert where the coin allows.
+    user_ids = [str(member_id) for member_id in member_ids]
+    wallets = await store.sql_get_userwallet_multiple(user_ids, coin, SERVER_BOT)
+    if wallets is None:
+        missing = user_ids
+    else:
+        missing = [user_id for user_id in user_ids if user_id not in wallets]
+        if len(missing) > 0 and coin_family not in ["ERC-20", "TRC-20"]:
+            if await store.sql_register_user_multiple(missing, coin, SERVER_BOT):
+                missing = []
+    for user_id in missing:
+        await register_tip_receiver(user_id, coin, coin_family)
+    return user_ids
 
 
 # Multiple tip
@@ -19407,7 +19762,7 @@ async def _tip(ctx, amount, coin: str, if_guild: bool=False):
     elif COIN_NAME in ENABLE_COIN_TRC:
         coin_family = "TRC-20"
     else:
-        coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+        coin_family = get_coin_family(COIN_NAME)
 
     if coin_family == "ERC-20" or coin_family == "TRC-20":
         real_amount = float(amount)
@@ -19638,7 +19993,7 @@ async def _tip_talker(ctx, amount, list_talker, if_guild: bool=False, coin: str
     elif COIN_NAME in ENABLE_COIN_TRC:
         coin_family = "TRC-20"
     else:
-        coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+        coin_family = get_coin_family(COIN_NAME)
     try:
         amount = Decimal(amount)
     except ValueError:
@@ -19719,29 +20074,18 @@ async def _tip_talker(ctx, amount, list_talker, if_guild: bool=False, coin: str
 
     list_receivers = []
     addresses = []
-    guild_members = ctx.guild.members
+    list_talker_ids = []
     for member_id in list_talker:
         try:
-            member = bot.get_user(id=int(member_id))
-            if member and member in guild_members and ctx.message.author.id != member.id:
-                user_to = await store.sql_get_userwallet(str(member_id), COIN_NAME)
-                if user_to is None:
-                    if coin_family == "ERC-20":
-                        w = await create_address_eth()
-                        userregister = await store.sql_register_user(str(member_id), COIN_NAME, SERVER_BOT, 0, w)
-                    elif coin_family == "TRC-20":
-                        result = await store.create_address_trx()
-                        userregister = await store.sql_register_user(str(member_id), COIN_NAME, SERVER_BOT, 0, result)
-                    else:
-                        userregister = await store.sql_register_user(str(member_id), COIN_NAME, SERVER_BOT, 0)
-                    user_to = await store.sql_get_userwallet(str(member_id), COIN_NAME)
-                try:
-                    list_receivers.append(str(member_id))
-                except Exception as e:
-                    await logchanbot(traceback.format_exc())
-                    print('Failed creating wallet for tip talk for userid: {}'.format(member_id))
+            member = ctx.guild.get_member(int(member_id))
+            if member and ctx.message.author.id != member.id:
+                list_talker_ids.append(member_id)
         except Exception as e:
             await logchanbot(traceback.format_exc())
+    try:
+        list_receivers = await prepare_tip_receivers(list_talker_ids, COIN_NAME, coin_family)
+    except Exception as e:
+        await logchanbot(traceback.format_exc())
 
     # Check number of receivers.
     if len(list_receivers) > config.tipallMax:
@@ -19959,7 +20303,7 @@ async def _tip_react(reaction, user, amount, coin: str):
     elif COIN_NAME in ENABLE_COIN_TRC:
         coin_family = "TRC-20"
     else:
-        coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+        coin_family = get_coin_family(COIN_NAME)
 
     if COIN_NAME in ENABLE_COIN_ERC+ENABLE_COIN_TRC:
         token_info = await store.get_token_info(COIN_NAME)
@@ -20021,7 +20365,7 @@ async def _tip_react(reaction, user, amount, coin: str):
                     result = await store.create_address_trx()
                     userregister = await store.sql_register_user(str(member.id), COIN_NAME, SERVER_BOT, 0, result)
                 else:
-                    coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+                    coin_family = get_coin_family(COIN_NAME)
                     userregister = await store.sql_register_user(str(member.id), COIN_NAME, SERVER_BOT, 0)
                 user_to = await store.sql_get_userwallet(str(member.id), COIN_NAME)
 
@@ -20323,7 +20667,7 @@ async def bot_faucet(ctx):
                 result = await store.create_address_trx()
                 wallet = await store.sql_register_user(str(bot.user.id), COIN_NAME, SERVER_BOT, 0, result)
             else:
-                coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+                coin_family = get_coin_family(COIN_NAME)
                 wallet = await store.sql_register_user(str(bot.user.id), COIN_NAME, SERVER_BOT, 0)
         userdata_balance = await store.sql_user_balance(str(bot.user.id), COIN_NAME)
         xfer_in = 0
@@ -20341,7 +20685,7 @@ async def bot_faucet(ctx):
         elif COIN_NAME in ENABLE_COIN_TRC:
             coin_family = "TRC-20"
         else:
-            coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")           
+            coin_family = get_coin_family(COIN_NAME)           
         try:
             if COIN_NAME in get_game_stat and coin_family in ["TRTL", "BCN", "XMR", "NANO", "XCH"]:
                 actual_balance = actual_balance - int(get_game_stat[COIN_NAME])
@@ -20367,24 +20711,42 @@ async def bot_faucet(ctx):
     return table.table
 
 
-async def store_action_list():
+async def drain_redis_list(key: str, sql_add_func, chunk_size: int=1000):
+    # Items are moved atomically in chunks from key to key_processing, stored, then
+    # key_processing is deleted. Anything pushed meanwhile stays in key, and a chunk
+    # left in key_processing by a failed insert or crash is retried first next time.
+    # Inserts are INSERT IGNORE, so a retry does not duplicate rows.
+    key_processing = key + "_processing"
+    num_stored = 0
     while True:
-        interval_action_list = 60
-        try:
-            openRedis()
-            key = config.redis_setting.prefix_action_tx
-            if redis_conn and redis_conn.llen(key) > 0:
-                temp_action_list = []
-                for each in redis_conn.lrange(key, 0, -1):
-                    temp_action_list.append(tuple(json.loads(each)))
-                num_add = await store.sql_add_logs_tx(temp_action_list)
-                if num_add > 0:
-                    redis_conn.delete(key)
-                else:
-                    print(f"Failed delete {key}")
-        except Exception as e:
-            await logchanbot(traceback.format_exc())
-        await asyncio.sleep(interval_action_list)
+        if redis_conn.llen(key_processing) == 0:
+            num_item = min(redis_conn.llen(key), chunk_size)
+            if num_item == 0:
+                break
+            pipe = redis_conn.pipeline(transaction=True)
+            for i in range(num_item):
+                pipe.rpoplpush(key, key_processing)
+            pipe.execute()
+        temp_list = []
+        for each in redis_conn.lrange(key_processing, 0, -1):
+            temp_list.append(tuple(json.loads(each)))
+        num_add = await sql_add_func(temp_list)
+        if num_add is None:
+            print(f"Failed to store {key_processing}, will retry.")
+            break
+        redis_conn.delete(key_processing)
+        num_stored += len(temp_list)
+    return num_stored
+
+
+async def store_action_list():
+    try:
+        openRedis()
+        key = config.redis_setting.prefix_action_tx
+        if redis_conn:
+            await drain_redis_list(key, store.sql_add_logs_tx)
+    except Exception as e:
+        await logchanbot(traceback.format_exc())
 
 
 async def add_tx_action_redis(action: str, delete_temp: bool = False):
@@ -20418,109 +20780,153 @@ async def get_guild_prefix_msg(message):
         return serverinfo['prefix']
 
 
-async def add_msg_redis(msg: str, delete_temp: bool = False):
+async def flush_msg_redis():
+    # on_message only appends to MSG_REDIS_BUFFER, they are pushed here in one LPUSH
+    global MSG_REDIS_BUFFER
+    while True:
+        if len(MSG_REDIS_BUFFER) > 0:
+            messages = MSG_REDIS_BUFFER
+            MSG_REDIS_BUFFER = []
+            try:
+                openRedis()
+                if redis_conn:
+                    redis_conn.lpush(config.redis_setting.prefix_discord_msg, *[json.dumps(each) for each in messages])
+            except Exception as e:
+                await logchanbot(traceback.format_exc())
+        await asyncio.sleep(1)
+
+
+async def store_message_list():
     try:
         openRedis()
         key = config.redis_setting.prefix_discord_msg
         if redis_conn:
-            if delete_temp:
-                redis_conn.delete(key)
-            else:
-                redis_conn.lpush(key, msg)
+            await drain_redis_list(key, store.sql_add_messages)
     except Exception as e:
         await logchanbot(traceback.format_exc())
 
 
-async def store_message_list():
+def miningpoolstat_session():
+    global MININGPOOLSTAT_SESSION
+    if MININGPOOLSTAT_SESSION is None or MININGPOOLSTAT_SESSION.closed:
+        MININGPOOLSTAT_SESSION = aiohttp.ClientSession()
+    return MININGPOOLSTAT_SESSION
+
+
+async def interaction_run():
+    # sessions need the gateway to fetch their messages
+    await bot.wait_until_ready()
+    try:
+        restored = await INTERACTION.restore(lambda session: bot.get_channel(id=session['channel_id']) is not None)
+        if restored > 0:
+            await logchanbot('[Discord] restored {} interactive session(s).'.format(restored))
+    except Exception as e:
+        await logchanbot(traceback.format_exc())
+    await INTERACTION.run()
+
+
+async def update_db_pool_metrics():
     while True:
-        interval_msg_list = 30 # in second
         try:
             openRedis()
-            key = config.redis_setting.prefix_discord_msg
-            if redis_conn and redis_conn.llen(key) > 0 :
-                temp_msg_list = []
-                for each in redis_conn.lrange(key, 0, -1):
-                    temp_msg_list.append(tuple(json.loads(each)))
-                try:
-                    num_add = await store.sql_add_messages(temp_msg_list)
-                except Exception as e:
-                    await logchanbot(traceback.format_exc())
-                if num_add and num_add > 0:
-                    redis_conn.delete(key)
-                else:
-                    redis_conn.delete(key)
-                    print(f"Failed delete {key}")
+            if redis_conn:
+                redis_conn.set("TIPBOT:DBPOOL" if WORKER_NAME == "main" else "TIPBOT:DBPOOL:" + WORKER_NAME, json.dumps(store.sql_pool_metrics()))
         except Exception as e:
             await logchanbot(traceback.format_exc())
-        await asyncio.sleep(interval_msg_list)
+        await asyncio.sleep(60)
 
 
 async def get_miningpool_coinlist():
     global redis_conn, redis_expired
-    while True:
-        interval_msg_list = 1800 # in second
+    try:
+        openRedis()
         try:
-            openRedis()
-            try:
-                async with aiohttp.ClientSession() as cs:
-                    async with cs.get(config.miningpoolstat.coinlist_link, timeout=config.miningpoolstat.timeout) as r:
-                        if r.status == 200:
-                            res_data = await r.read()
-                            res_data = res_data.decode('utf-8')
-                            res_data = res_data.replace("var coin_list = ", "").replace(";", "")
-                            decoded_data = json.loads(res_data)
-                            await cs.close()
-                            key = "TIPBOT:MININGPOOL:"
-                            key_hint = "TIPBOT:MININGPOOL:SHORTNAME:"
-                            if decoded_data and len(decoded_data) > 0:
-                                # print(decoded_data)
-                                for kc, cat in decoded_data.items():
-                                    if not isinstance(cat, int) and not isinstance(cat, str):
-                                        for k, v in cat.items():
-                                            # Should have no expire.
-                                            redis_conn.set((key+k).upper(), json.dumps(v))
-                                            redis_conn.set((key_hint+v['s']).upper(), k.upper())
-            except asyncio.TimeoutError:
-                print('TIMEOUT: Fetching from miningpoolstats')
-            except Exception:
-                await logchanbot(traceback.format_exc())
-        except Exception as e:
+            cs = miningpoolstat_session()
+            async with cs.get(config.miningpoolstat.coinlist_link, timeout=config.miningpoolstat.timeout) as r:
+                if r.status == 200:
+                    res_data = await r.read()
+                    res_data = res_data.decode('utf-8')
+                    res_data = res_data.replace("var coin_list = ", "").replace(";", "")
+                    decoded_data = json.loads(res_data)
+                    key = "TIPBOT:MININGPOOL:"
+                    key_hint = "TIPBOT:MININGPOOL:SHORTNAME:"
+                    if decoded_data and len(decoded_data) > 0:
+                        # Should have no expire. All in one round trip.
+                        pipe = redis_conn.pipeline(transaction=False)
+                        for kc, cat in decoded_data.items():
+                            if not isinstance(cat, int) and not isinstance(cat, str):
+                                for k, v in cat.items():
+                                    pipe.set((key+k).upper(), json.dumps(v))
+                                    pipe.set((key_hint+v['s']).upper(), k.upper())
+                        pipe.execute()
+        except asyncio.TimeoutError:
+            print('TIMEOUT: Fetching from miningpoolstats')
+        except Exception:
             await logchanbot(traceback.format_exc())
-        await asyncio.sleep(interval_msg_list)
+    except Exception as e:
+        await logchanbot(traceback.format_exc())
 
 
-async def get_miningpoolstat_coin(coin: str):
-    global redis_conn, redis_expired
+async def fetch_miningpoolstat_coin(coin: str):
+    global redis_conn
     COIN_NAME = coin.upper()
     key = "TIPBOT:MININGPOOLDATA:" + COIN_NAME
-    if redis_conn and redis_conn.exists(key):
-        return json.loads(redis_conn.get(key).decode())
-    else:
+    try:
+        openRedis()
         try:
-            openRedis()
-            try:
-                link = config.miningpoolstat.coinapi.replace("COIN_NAME", coin.lower())
-                print(f"Fetching {link}")
-                async with aiohttp.ClientSession() as cs:
-                    async with cs.get(link, timeout=config.miningpoolstat.timeout) as r:
-                        if r.status == 200:
-                            res_data = await r.read()
-                            res_data = res_data.decode('utf-8')
-                            decoded_data = json.loads(res_data)
-                            await cs.close()
-                            if decoded_data and len(decoded_data) > 0 and 'data' in decoded_data:
-                                redis_conn.set(key, json.dumps(decoded_data), ex=config.miningpoolstat.expired)
-                                return decoded_data
-                            else:
-                                print(f'MININGPOOLSTAT: Error {link} Fetching from miningpoolstats')
-                                return None
-            except asyncio.TimeoutError:
-                print(f'TIMEOUT: Fetching from miningpoolstats {COIN_NAME}')
-            except Exception:
-                await logchanbot(traceback.format_exc())
-        except Exception as e:
+            link = config.miningpoolstat.coinapi.replace("COIN_NAME", coin.lower())
+            print(f"Fetching {link}")
+            cs = miningpoolstat_session()
+            async with cs.get(link, timeout=config.miningpoolstat.timeout) as r:
+                if r.status == 200:
+                    res_data = await r.read()
+                    res_data = res_data.decode('utf-8')
+                    decoded_data = json.loads(res_data)
+                    if decoded_data and len(decoded_data) > 0 and 'data' in decoded_data:
+                        # data is kept for the stale window, :FRESH marks it fresh
+                        pipe = redis_conn.pipeline(transaction=True)
+                        pipe.set(key, json.dumps(decoded_data), ex=MININGPOOLSTAT_STALE)
+                        pipe.set(key + ":FRESH", 1, ex=config.miningpoolstat.expired)
+                        pipe.execute()
+                        return decoded_data
+                    else:
+                        print(f'MININGPOOLSTAT: Error {link} Fetching from miningpoolstats')
+                        return None
+        except asyncio.TimeoutError:
+            print(f'TIMEOUT: Fetching from miningpoolstats {COIN_NAME}')
+        except Exception:
             await logchanbot(traceback.format_exc())
-        return None
+    except Exception as e:
+        await logchanbot(traceback.format_exc())
+    return None
+
+
+async def get_miningpoolstat_coin(coin: str):
+    global redis_conn, MININGPOOLSTAT_FETCHING
+    COIN_NAME = coin.upper()
+    key = "TIPBOT:MININGPOOLDATA:" + COIN_NAME
+    cached = None
+    try:
+        openRedis()
+        if redis_conn:
+            pipe = redis_conn.pipeline(transaction=False)
+            pipe.get(key)
+            pipe.exists(key + ":FRESH")
+            cached, is_fresh = pipe.execute()
+            if cached and is_fresh:
+                return json.loads(cached.decode())
+    except Exception as e:
+        await logchanbot(traceback.format_exc())
+    # Only one upstream fetch per coin, later callers wait on the same one
+    fetching = MININGPOOLSTAT_FETCHING.get(COIN_NAME)
+    if fetching is None:
+        fetching = asyncio.ensure_future(fetch_miningpoolstat_coin(COIN_NAME))
+        MININGPOOLSTAT_FETCHING[COIN_NAME] = fetching
+        fetching.add_done_callback(lambda f: MININGPOOLSTAT_FETCHING.pop(COIN_NAME, None))
+    if cached:
+        # stale while refreshing
+        return json.loads(cached.decode())
+    return await asyncio.shield(fetching)
 
 
 # function to return if input string is ascii
@@ -20657,25 +21063,61 @@ def get_max_sell(coin: str, token_info = None):
 ## END OF Section of Trade
 
 
+async def scanner_job_error(name: str, error: str):
+    await logchanbot(f'[Job] {name} failed:\n{error}')
+
+
+async def report_scanner_health():
+    # runs next to SCANNER_JOBS, not in it, so bot_worker.py --job still reports
+    while True:
+        try:
+            openRedis()
+            if redis_conn:
+                redis_conn.set("TIPBOT:JOBS:" + WORKER_NAME, json.dumps(SCANNER_JOBS.health()), ex=300)
+        except Exception as e:
+            await logchanbot(traceback.format_exc())
+        await asyncio.sleep(60)
+
+
+def job_interval(name: str, default: float):
+    # config jobs: <name>: seconds, overrides the default interval
+    return getattr(getattr(config, "jobs", None), name, default)
+
+
+# Global background jobs, run by one process only: the bot, the scanner leader among
+# shard workers, or bot_worker.py
+SCANNER_JOBS = JobRegistry(on_error=scanner_job_error)
+SCANNER_JOBS.add("saving_wallet", saving_wallet)
+SCANNER_JOBS.add("update_balance", update_balance, job_interval("update_balance", config.interval.update_balance))
+SCANNER_JOBS.add("update_block_height", update_block_height, job_interval("update_block_height", 5))
+SCANNER_JOBS.add("notify_new_tx_user", notify_new_tx_user, job_interval("notify_new_tx_user", config.interval.notify_tx), config.interval.notify_tx)
+SCANNER_JOBS.add("notify_new_tx_user_noconfirmation", notify_new_tx_user_noconfirmation, job_interval("notify_new_tx_user_noconfirmation", config.interval.notify_tx), config.interval.notify_tx)
+SCANNER_JOBS.add("store_action_list", store_action_list, job_interval("store_action_list", 60))
+SCANNER_JOBS.add("store_message_list", store_message_list, job_interval("store_message_list", 30))
+SCANNER_JOBS.add("get_miningpool_coinlist", get_miningpool_coinlist, job_interval("get_miningpool_coinlist", 1800))
+SCANNER_JOBS.add("unlocked_move_pending_erc_trx", unlocked_move_pending_erc_trx, job_interval("unlocked_move_pending_erc_trx", config.interval.update_balance), config.interval.update_balance)
+SCANNER_JOBS.add("erc_trx_notify_new_confirmed_spendable", erc_trx_notify_new_confirmed_spendable, job_interval("erc_trx_notify_new_confirmed_spendable", config.interval.update_balance), config.interval.update_balance)
+SCANNER_JOBS.add("notify_new_move_balance_user", notify_new_move_balance_user, job_interval("notify_new_move_balance_user", 5), 5)
+SCANNER_JOBS.add("trade_complete_sale_notify", trade_complete_sale_notify, job_interval("trade_complete_sale_notify", 30), 30)
+
+
 @click.command()
 def main():
-    bot.loop.create_task(saving_wallet())
-    bot.loop.create_task(update_user_guild())
-    bot.loop.create_task(update_balance())
-    bot.loop.create_task(update_block_height())
-    bot.loop.create_task(notify_new_tx_user())
-    bot.loop.create_task(notify_new_tx_user_noconfirmation())
-    bot.loop.create_task(store_action_list())
-    bot.loop.create_task(store_message_list())
-    bot.loop.create_task(get_miningpool_coinlist())
-
-    bot.loop.create_task(unlocked_move_pending_erc_trx())
-    bot.loop.create_task(erc_trx_notify_new_confirmed_spendable())
-
-    bot.loop.create_task(notify_new_move_balance_user())
-    bot.loop.create_task(check_raffle_status())
-
-    bot.loop.create_task(trade_complete_sale_notify())
+    # TIPBOT_SCANNERS=0 when bot_worker.py runs the scanners
+    if SHARD_IDS is None and RUN_SCANNERS:
+        bot.loop.create_task(background_job(SCANNER_JOBS.run()))
+        bot.loop.create_task(report_scanner_health())
+    elif RUN_SCANNERS:
+        leader = RedisLeader(interaction_redis, "TIPBOT:LEADER:SCANNERS", worker_id="{}:{}".format(WORKER_NAME, os.getpid()))
+        bot.loop.create_task(leader.run([lambda: background_job(SCANNER_JOBS.run()), report_scanner_health]))
+
+    # jobs for this process' own guilds
+    bot.loop.create_task(background_job(update_user_guild()))
+    bot.loop.create_task(background_job(check_raffle_status()))
+    bot.loop.create_task(background_job(update_db_pool_metrics()))
+    bot.loop.create_task(interaction_run())
+    bot.loop.create_task(freetip_render())
+    bot.loop.create_task(flush_msg_redis())
 
     bot.run(config.discord.token, reconnect=True)
 
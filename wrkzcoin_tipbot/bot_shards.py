@@ -0,0 +1,66 @@
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import click
+
+
+# Run the Discord bot as several processes, each with its own range of shards.
+# Every worker takes part in the election for the background scanners (see leader.py),
+# unless --no-scanners is given, then another service has to run them.
+def shard_ranges(shard_count: int, workers: int):
+    per_worker, extra = divmod(shard_count, workers)
+    ranges = []
+    first = 0
+    for i in range(workers):
+        size = per_worker + (1 if i < extra else 0)
+        if size > 0:
+            ranges.append((first, first + size - 1))
+        first += size
+    return ranges
+
+
+def start_worker(first: int, last: int, shard_count: int, scanners: bool):
+    env = dict(os.environ)
+    env['TIPBOT_SHARD_IDS'] = "{}-{}".format(first, last)
+    env['TIPBOT_SHARD_COUNT'] = str(shard_count)
+    env['TIPBOT_SCANNERS'] = "1" if scanners else "0"
+    bot_py = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bot.py")
+    return subprocess.Popen([sys.executable, bot_py], env=env)
+
+
+@click.command()
+@click.option('--shard-count', type=int, required=True, help='Total number of shards.')
+@click.option('--workers', type=int, required=True, help='Number of worker processes.')
+@click.option('--scanners/--no-scanners', default=True, help='Run background scanners in one of the workers.')
+def main(shard_count: int, workers: int, scanners: bool):
+    workers_running = {}
+    for first, last in shard_ranges(shard_count, workers):
+        workers_running[(first, last)] = start_worker(first, last, shard_count, scanners)
+        print("Started shards {}-{} of {}, pid {}".format(first, last, shard_count, workers_running[(first, last)].pid))
+        # Discord allows one IDENTIFY per 5s
+        time.sleep(5 * (last - first + 1))
+
+    stopping = []
+    def stop(signum, frame):
+        stopping.append(signum)
+        for proc in workers_running.values():
+            proc.terminate()
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    # restart a worker which died, until we are told to stop
+    while len(stopping) == 0:
+        for (first, last), proc in list(workers_running.items()):
+            if proc.poll() is not None and len(stopping) == 0:
+                print("Shards {}-{} exited with {}, restarting".format(first, last, proc.returncode))
+                workers_running[(first, last)] = start_worker(first, last, shard_count, scanners)
+        time.sleep(5)
+    for proc in workers_running.values():
+        proc.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,7 @@
 #!/usr/bin/python3.6
 import sys
 from config import config
-import store
+import store, db_pool
 import time
 import asyncio
 
@@ -55,5 +55,5 @@ async def update_balance():
             print('Done update balance: '+ coinItem.upper().strip()+ ' duration (s): '+str(end - start))
             time.sleep(INTERVAL_EACH)
 loop = asyncio.get_event_loop()  
-loop.run_until_complete(update_balance())  
+loop.run_until_complete(db_pool.background_job(update_balance()))  
 loop.close()
\ No newline at end of file
@@ -0,0 +1,65 @@
+import asyncio
+import os
+import signal
+import sys, traceback
+
+import click
+
+from config import config
+import db_pool
+import bot as tipbot
+
+
+# Run the background scanners of bot.py (SCANNER_JOBS) outside the Discord process.
+# Start the bot itself with TIPBOT_SCANNERS=0 so they do not run twice.
+# Discord is only used over REST here, to DM users about deposits and sales.
+async def run_worker(names, stop_timeout: int):
+    bot = tipbot.bot
+    # bot.user is only set on a gateway connect, jobs read the id from BOT_USER_ID
+    data = await bot.http.static_login(config.discord.token.strip(), bot=True)
+    tipbot.BOT_USER_ID = int(data['id'])
+    tipbot.REST_LOOKUP = True
+    tipbot.WORKER_NAME = "worker_{}".format(os.getpid())
+
+    stop = asyncio.Event()
+    loop = asyncio.get_event_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+
+    tipbot.SCANNER_JOBS.start(names)
+    metrics = asyncio.ensure_future(tipbot.update_db_pool_metrics())
+    health = asyncio.ensure_future(tipbot.report_scanner_health())
+    print("Worker {} started: {}".format(tipbot.WORKER_NAME, ", ".join(names) if names else "all jobs"))
+    await stop.wait()
+
+    print("Stopping, waiting up to {}s for running jobs".format(stop_timeout))
+    metrics.cancel()
+    health.cancel()
+    await tipbot.SCANNER_JOBS.stop(stop_timeout)
+    await bot.http.close()
+
+
+@click.command()
+@click.option('--job', 'names', multiple=True, help='Run only this job, can be repeated.')
+@click.option('--list', 'list_jobs', is_flag=True, help='List jobs and exit.')
+@click.option('--stop-timeout', default=60, help='Seconds to let running jobs finish on shutdown.')
+def main(names, list_jobs: bool, stop_timeout: int):
+    if list_jobs:
+        for name, job in tipbot.SCANNER_JOBS.jobs.items():
+            print("{}: {}".format(name, "every {}s".format(job.interval) if job.interval else "long running"))
+        return
+    unknown = [name for name in names if name not in tipbot.SCANNER_JOBS.jobs]
+    if len(unknown) > 0:
+        print("Unknown job(s): {}".format(", ".join(unknown)))
+        sys.exit(1)
+    loop = asyncio.get_event_loop()
+    try:
+        loop.run_until_complete(db_pool.background_job(run_worker(list(names), stop_timeout)))
+    except Exception as e:
+        traceback.print_exc(file=sys.stdout)
+    finally:
+        loop.close()
+
+
+if __name__ == '__main__':
+    main()
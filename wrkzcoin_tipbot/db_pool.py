@@ -0,0 +1,170 @@
+import bisect
+import contextvars
+import time
+
+import aiomysql
+from aiomysql.cursors import DictCursor
+
+
+# Workload of the running task, background jobs set it once when they start and
+# every task they spawn inherits it.
+workload = contextvars.ContextVar('db_pool_workload', default='interactive')
+
+# seconds
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram(object):
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+
+    def snapshot(self):
+        # cumulative counts per upper bound, as Prometheus does
+        buckets = {}
+        total = 0
+        for bound, numb in zip([str(b) for b in self.buckets] + ['+Inf'], self.counts):
+            total += numb
+            buckets[bound] = total
+        return {'buckets': buckets, 'count': self.count, 'sum': round(self.sum, 6), 'max': round(self.max, 6)}
+
+
+class PoolStats(object):
+    def __init__(self, minsize: int, maxsize: int):
+        self.minsize = minsize
+        self.maxsize = maxsize
+        self.in_use = 0
+        self.max_in_use = 0
+        self.waiting = 0
+        self.acquire_wait = Histogram()
+        self.query = Histogram()
+
+
+    def snapshot(self):
+        return {'minsize': self.minsize, 'maxsize': self.maxsize, 'in_use': self.in_use,
+                'max_in_use': self.max_in_use, 'waiting': self.waiting,
+                'acquire_wait': self.acquire_wait.snapshot(), 'query': self.query.snapshot()}
+
+
+class TimedDictCursor(DictCursor):
+    # executemany goes through execute, so each statement is timed once
+    async def execute(self, query, args=None):
+        start = time.time()
+        try:
+            return await super().execute(query, args)
+        finally:
+            stats = getattr(self.connection, 'pool_stats', None)
+            if stats:
+                stats.query.observe(time.time() - start)
+
+
+class _Acquire(object):
+    def __init__(self, pool, stats):
+        self.pool = pool
+        self.stats = stats
+        self.conn = None
+
+
+    async def __aenter__(self):
+        start = time.time()
+        self.stats.waiting += 1
+        try:
+            self.conn = await self.pool.acquire()
+        finally:
+            self.stats.waiting -= 1
+        self.stats.acquire_wait.observe(time.time() - start)
+        self.stats.in_use += 1
+        self.stats.max_in_use = max(self.stats.max_in_use, self.stats.in_use)
+        self.conn.pool_stats = self.stats
+        return self.conn
+
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.stats.in_use -= 1
+        await self.pool.release(self.conn)
+        self.conn = None
+
+
+# One aiomysql pool per workload, so background scans can not take the connections
+# user commands wait for. Used like an aiomysql pool: async with pool.acquire() as conn
+class WorkloadPool(object):
+    def __init__(self, pools, sizes, default: str):
+        self.pools = pools
+        self.default = default
+        self.stats = {name: PoolStats(sizes[name][0], sizes[name][1]) for name in pools}
+
+
+    def name(self):
+        name = workload.get()
+        return name if name in self.pools else self.default
+
+
+    def acquire(self):
+        name = self.name()
+        return _Acquire(self.pools[name], self.stats[name])
+
+
+    def metrics(self):
+        return {name: stats.snapshot() for name, stats in self.stats.items()}
+
+
+class _FallbackAcquire(object):
+    def __init__(self, pool, fallback):
+        self.pool = pool
+        self.fallback = fallback
+        self.acquire = None
+
+
+    async def __aenter__(self):
+        self.acquire = self.pool.acquire()
+        try:
+            return await self.acquire.__aenter__()
+        except Exception as e:
+            # nothing was taken from pool, ask fallback instead
+            self.acquire = self.fallback.acquire()
+            return await self.acquire.__aenter__()
+
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return await self.acquire.__aexit__(exc_type, exc, tb)
+
+
+# Read pool on a replica that hands out connections of fallback (the primary)
+# when the replica can not give one.
+class FallbackPool(object):
+    def __init__(self, pool, fallback):
+        self.pool = pool
+        self.fallback = fallback
+
+
+    def acquire(self):
+        return _FallbackAcquire(self.pool, self.fallback)
+
+
+    def metrics(self):
+        return self.pool.metrics()
+
+
+async def create_workload_pool(sizes, default: str, **kwargs):
+    # sizes is workload => (minsize, maxsize)
+    pools = {}
+    for name, (minsize, maxsize) in sizes.items():
+        pools[name] = await aiomysql.create_pool(minsize=minsize, maxsize=maxsize, cursorclass=TimedDictCursor, **kwargs)
+    return WorkloadPool(pools, sizes, default)
+
+
+async def background_job(coro):
+    # run coro on the background pools
+    workload.set('background')
+    return await coro
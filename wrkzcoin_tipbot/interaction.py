@@ -0,0 +1,169 @@
+import asyncio
+import json
+import time
+import sys, traceback
+
+
+# Hashed timing wheel. A deadline sits in the slot of its tick, deadlines more than
+# one turn away stay in their slot for later turns. add and cancel are O(1),
+# advance only visits the slots of ticks passed since last call.
+class TimeWheel(object):
+    def __init__(self, slots: int=512, tick: float=1.0, clock=time.time):
+        self.slots = [dict() for i in range(slots)]
+        self.tick = tick
+        self.clock = clock
+        self.current = int(clock() // tick)
+        # key => slot index
+        self.where = {}
+
+
+    def add(self, key, deadline: float):
+        self.cancel(key)
+        index = max(int(deadline // self.tick), self.current) % len(self.slots)
+        self.slots[index][key] = deadline
+        self.where[key] = index
+
+
+    def cancel(self, key):
+        index = self.where.pop(key, None)
+        if index is not None:
+            self.slots[index].pop(key, None)
+
+
+    def advance(self):
+        now = self.clock()
+        now_tick = int(now // self.tick)
+        if now_tick - self.current >= len(self.slots):
+            indexes = range(len(self.slots))
+        else:
+            indexes = [t % len(self.slots) for t in range(self.current, now_tick + 1)]
+        self.current = now_tick
+        due = []
+        for index in indexes:
+            slot = self.slots[index]
+            for key, deadline in list(slot.items()):
+                if deadline <= now:
+                    del slot[key]
+                    del self.where[key]
+                    due.append(key)
+        return due
+
+
+# Interactive sessions (a prompt waiting for reactions until a deadline) keyed by
+# message id. Reactions are routed with one dict lookup instead of each prompt
+# holding a bot.wait_for listener. Sessions are plain dicts saved in a
+# redis hash so they are restored after a restart.
+# Handlers per kind, all coroutines:
+#   on_reaction(session, payload), on_expire(session), on_restore(session)
+class InteractionRegistry(object):
+    def __init__(self, redis_func, key: str="TIPBOT:INTERACTION", clock=time.time):
+        # redis_func() returns a redis connection or None
+        self.redis_func = redis_func
+        self.key = key
+        self.clock = clock
+        self.sessions = {}
+        self.kinds = {}
+        self.wheel = TimeWheel(clock=clock)
+        # message ids changed since last pop_dirty
+        self.dirty = set()
+
+
+    def register_kind(self, kind: str, on_reaction=None, on_expire=None, on_restore=None):
+        self.kinds[kind] = {'on_reaction': on_reaction, 'on_expire': on_expire, 'on_restore': on_restore}
+
+
+    def open(self, kind: str, message_id: int, channel_id: int, user_id: int, expire_ts: float, data=None):
+        session = {'kind': kind, 'message_id': message_id, 'channel_id': channel_id,
+                   'user_id': user_id, 'expire_ts': expire_ts, 'data': data if data is not None else {}}
+        self.sessions[message_id] = session
+        self.wheel.add(message_id, expire_ts)
+        self.save(session)
+        return session
+
+
+    def get(self, message_id: int):
+        return self.sessions.get(message_id)
+
+
+    def touch(self, message_id: int):
+        if message_id in self.sessions:
+            self.dirty.add(message_id)
+
+
+    def pop_dirty(self):
+        dirty = [self.sessions[message_id] for message_id in self.dirty if message_id in self.sessions]
+        self.dirty = set()
+        return dirty
+
+
+    def close(self, message_id: int):
+        session = self.sessions.pop(message_id, None)
+        self.wheel.cancel(message_id)
+        self.dirty.discard(message_id)
+        try:
+            redis_conn = self.redis_func()
+            if redis_conn:
+                redis_conn.hdel(self.key, str(message_id))
+        except Exception as e:
+            traceback.print_exc(file=sys.stdout)
+        return session
+
+
+    def save(self, session):
+        try:
+            redis_conn = self.redis_func()
+            if redis_conn:
+                redis_conn.hset(self.key, str(session['message_id']), json.dumps(session))
+        except Exception as e:
+            traceback.print_exc(file=sys.stdout)
+
+
+    async def _handle(self, session, name: str, *args):
+        handler = self.kinds.get(session['kind'], {}).get(name)
+        if handler is None:
+            return False
+        try:
+            await handler(session, *args)
+        except Exception as e:
+            traceback.print_exc(file=sys.stdout)
+        return True
+
+
+    async def dispatch_reaction(self, payload):
+        session = self.sessions.get(payload.message_id)
+        if session is None:
+            return False
+        return await self._handle(session, 'on_reaction', payload)
+
+
+    def expire_due(self):
+        # session is closed before on_expire runs, a crash there does not run it twice
+        tasks = []
+        for message_id in self.wheel.advance():
+            session = self.close(message_id)
+            if session:
+                tasks.append(asyncio.ensure_future(self._handle(session, 'on_expire')))
+        return tasks
+
+
+    async def restore(self, owns=None):
+        # owns(session) tells if this process serves the session's channel
+        redis_conn = self.redis_func()
+        if redis_conn is None:
+            return 0
+        restored = 0
+        for message_id, data in redis_conn.hgetall(self.key).items():
+            session = json.loads(data)
+            if session['kind'] not in self.kinds or (owns and not owns(session)):
+                continue
+            self.sessions[session['message_id']] = session
+            self.wheel.add(session['message_id'], session['expire_ts'])
+            await self._handle(session, 'on_restore')
+            restored += 1
+        return restored
+
+
+    async def run(self):
+        while True:
+            self.expire_due()
+            await asyncio.sleep(self.wheel.tick)
@@ -0,0 +1,111 @@
+import asyncio
+import time
+import sys, traceback
+
+
+class Job(object):
+    def __init__(self, name: str, func, interval: float=None, first_delay: float=0):
+        # func() is a coroutine doing one pass, run every interval seconds.
+        # interval None is for a job which keeps running by itself.
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.first_delay = first_delay
+        self.running = False
+        self.runs = 0
+        self.failures = 0
+        self.last_start = None
+        self.last_end = None
+        self.last_duration = None
+        self.last_error = None
+
+
+    def health(self):
+        # stale: a periodic pass has not finished for three intervals
+        stale = False
+        if self.interval and self.last_start:
+            last_seen = self.last_end if self.last_end and not self.running else self.last_start
+            stale = time.time() - last_seen > 3 * self.interval + self.first_delay
+        return {'interval': self.interval, 'running': self.running, 'runs': self.runs, 'failures': self.failures,
+                'last_start': self.last_start, 'last_end': self.last_end,
+                'last_duration': round(self.last_duration, 3) if self.last_duration is not None else None,
+                'last_error': self.last_error, 'stale': stale}
+
+
+# Periodic background jobs. Shared by bot.py and bot_worker.py so both run the same
+# set, each with its own interval. stop() lets passes in progress finish.
+class JobRegistry(object):
+    def __init__(self, on_error=None):
+        # on_error(name, traceback_text) is a coroutine
+        self.jobs = {}
+        self.tasks = {}
+        self.on_error = on_error
+        self.stopping = False
+
+
+    def add(self, name: str, func, interval: float=None, first_delay: float=0):
+        self.jobs[name] = Job(name, func, interval, first_delay)
+
+
+    async def _run_job(self, job):
+        await asyncio.sleep(job.first_delay)
+        while not self.stopping:
+            job.running = True
+            job.last_start = time.time()
+            try:
+                await job.func()
+                job.runs += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                job.failures += 1
+                job.last_error = traceback.format_exc()
+                traceback.print_exc(file=sys.stdout)
+                if self.on_error:
+                    await self.on_error(job.name, job.last_error)
+            finally:
+                job.running = False
+                job.last_end = time.time()
+                job.last_duration = job.last_end - job.last_start
+            if job.interval is None or self.stopping:
+                break
+            await asyncio.sleep(job.interval)
+
+
+    def start(self, names=None):
+        self.stopping = False
+        for name, job in self.jobs.items():
+            if names and name not in names:
+                continue
+            if name not in self.tasks or self.tasks[name].done():
+                self.tasks[name] = asyncio.ensure_future(self._run_job(job))
+        return list(self.tasks.values())
+
+
+    async def stop(self, timeout: float=30):
+        # cancel sleeping jobs, wait up to timeout for running passes
+        self.stopping = True
+        for name, task in self.tasks.items():
+            if not self.jobs[name].running or self.jobs[name].interval is None:
+                task.cancel()
+        tasks = list(self.tasks.values())
+        if len(tasks) > 0:
+            done, pending = await asyncio.wait(tasks, timeout=timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self.tasks = {}
+
+
+    async def run(self, names=None):
+        # run until cancelled, cancelling stops every job
+        try:
+            await asyncio.gather(*self.start(names))
+        finally:
+            for task in self.tasks.values():
+                task.cancel()
+            self.tasks = {}
+
+
+    def health(self):
+        return {name: job.health() for name, job in self.jobs.items()}
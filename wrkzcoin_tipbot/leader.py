@@ -0,0 +1,144 @@
+import asyncio
+import uuid
+import sys, traceback
+
+
+# Extend or drop the lock only while it is still ours
+RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('expire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+# Redis lock based leader election between bot worker processes. The leader renews
+# its lock every ttl/3, a worker which can not renew stops its jobs before the lock
+# expires so two workers never run them at the same time.
+class RedisLeader(object):
+    def __init__(self, redis_func, key: str, ttl: int=30, worker_id: str=None):
+        # redis_func() returns a redis connection or None
+        self.redis_func = redis_func
+        self.key = key
+        self.ttl = ttl
+        self.worker_id = worker_id if worker_id else uuid.uuid4().hex
+        self.is_leader = False
+
+
+    def try_acquire(self):
+        redis_conn = self.redis_func()
+        if redis_conn is None:
+            self.is_leader = False
+        elif self.is_leader:
+            self.is_leader = bool(redis_conn.eval(RENEW_SCRIPT, 1, self.key, self.worker_id, self.ttl))
+        else:
+            self.is_leader = bool(redis_conn.set(self.key, self.worker_id, nx=True, ex=self.ttl))
+        return self.is_leader
+
+
+    def release(self):
+        redis_conn = self.redis_func()
+        if redis_conn and self.is_leader:
+            redis_conn.eval(RELEASE_SCRIPT, 1, self.key, self.worker_id)
+        self.is_leader = False
+
+
+    async def run(self, jobs):
+        # jobs are functions returning a coroutine, started on becoming leader and
+        # cancelled when leadership is lost
+        tasks = []
+        try:
+            while True:
+                try:
+                    leader = self.try_acquire()
+                except Exception as e:
+                    traceback.print_exc(file=sys.stdout)
+                    leader = False
+                    self.is_leader = False
+                if leader and len(tasks) == 0:
+                    print("Worker {} is leader of {}, starting {} job(s).".format(self.worker_id, self.key, len(jobs)))
+                    tasks = [asyncio.ensure_future(job()) for job in jobs]
+                elif not leader and len(tasks) > 0:
+                    print("Worker {} lost {}, stopping jobs.".format(self.worker_id, self.key))
+                    for task in tasks:
+                        task.cancel()
+                    tasks = []
+                await asyncio.sleep(self.ttl / 3)
+        finally:
+            for task in tasks:
+                task.cancel()
+            try:
+                self.release()
+            except Exception as e:
+                traceback.print_exc(file=sys.stdout)
+
+
+class UserBusy(Exception):
+    pass
+
+
+# A set of user ids held in redis, one key per user, shared by all bot worker
+# processes. Used as TX_IN_PROCESS with the list methods the commands use: `in`,
+# append, remove. append raises UserBusy when another worker holds the user
+# between our `in` check and the append. Keys expire after ttl in case a worker
+# dies with a user held.
+class RedisUserSet(object):
+    def __init__(self, redis_func, prefix: str, ttl: int=900, worker_id: str=None):
+        self.redis_func = redis_func
+        self.prefix = prefix
+        self.ttl = ttl
+        self.worker_id = worker_id if worker_id else uuid.uuid4().hex
+        # users held by this worker
+        self.held = set()
+
+
+    def _key(self, user_id):
+        return "{}:{}".format(self.prefix, user_id)
+
+
+    def _redis(self):
+        redis_conn = self.redis_func()
+        if redis_conn is None:
+            # not knowing what other workers hold, no one goes through
+            raise UserBusy("redis unavailable")
+        return redis_conn
+
+
+    def __contains__(self, user_id):
+        return user_id in self.held or bool(self._redis().exists(self._key(user_id)))
+
+
+    def append(self, user_id):
+        if not self._redis().set(self._key(user_id), self.worker_id, nx=True, ex=self.ttl):
+            raise UserBusy(str(user_id))
+        self.held.add(user_id)
+
+
+    def remove(self, user_id):
+        # only releases our own hold, `in` is also true for other workers' users
+        if user_id not in self.held:
+            return
+        self.held.discard(user_id)
+        try:
+            self._redis().eval(RELEASE_SCRIPT, 1, self._key(user_id), self.worker_id)
+        except Exception as e:
+            traceback.print_exc(file=sys.stdout)
+
+
+    def clear(self):
+        for user_id in list(self.held):
+            self.remove(user_id)
+
+
+    def __len__(self):
+        return len(self.held)
+
+
+    def __iter__(self):
+        return iter(list(self.held))
@@ -0,0 +1,85 @@
+import asyncio
+import heapq
+import time
+import sys, traceback
+
+
+# Time-ordered heap of raffle deadlines. Each raffle has at most one live deadline,
+# rescheduling leaves the old heap entry behind and it is skipped when popped.
+# clock is injectable so deadlines can be driven by a fake clock.
+class RaffleScheduler(object):
+    DONE = "DONE"
+
+    def __init__(self, handler, clock=time.time, retry_delay: float=60):
+        # handler(raffle_id) is a coroutine returning next deadline timestamp, or DONE when the
+        # raffle is finished. None or an exception retries after retry_delay.
+        self.handler = handler
+        self.clock = clock
+        self.retry_delay = retry_delay
+        self.heap = []
+        self.deadlines = {}
+        self.wakeup = None
+
+
+    def schedule(self, raffle_id: int, fire_ts: float):
+        self.deadlines[raffle_id] = fire_ts
+        heapq.heappush(self.heap, (fire_ts, raffle_id))
+        if self.wakeup:
+            self.wakeup.set()
+
+
+    def cancel(self, raffle_id: int):
+        self.deadlines.pop(raffle_id, None)
+
+
+    def _drop_stale(self):
+        while len(self.heap) > 0 and self.deadlines.get(self.heap[0][1]) != self.heap[0][0]:
+            heapq.heappop(self.heap)
+
+
+    def pop_due(self):
+        now = self.clock()
+        due = []
+        self._drop_stale()
+        while len(self.heap) > 0 and self.heap[0][0] <= now:
+            fire_ts, raffle_id = heapq.heappop(self.heap)
+            del self.deadlines[raffle_id]
+            due.append(raffle_id)
+            self._drop_stale()
+        return due
+
+
+    def next_delay(self):
+        self._drop_stale()
+        if len(self.heap) == 0:
+            return None
+        return max(0, self.heap[0][0] - self.clock())
+
+
+    async def fire(self, raffle_id: int):
+        next_ts = None
+        try:
+            next_ts = await self.handler(raffle_id)
+        except Exception as e:
+            traceback.print_exc(file=sys.stdout)
+        if next_ts == self.DONE:
+            return
+        if not next_ts:
+            next_ts = self.clock() + self.retry_delay
+        self.schedule(raffle_id, next_ts)
+
+
+    async def run_due(self):
+        # Each due raffle is processed in its own task, a slow draw does not hold back others
+        return [asyncio.ensure_future(self.fire(raffle_id)) for raffle_id in self.pop_due()]
+
+
+    async def run(self):
+        self.wakeup = asyncio.Event()
+        while True:
+            self.wakeup.clear()
+            await self.run_due()
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=self.next_delay())
+            except asyncio.TimeoutError:
+                pass
@@ -6,6 +6,7 @@ import sys, traceback
 import redis, json
 import uuid, time
 import asyncio
+import functools
 
 
 from generic_xmr.address_msr import address_msr as address_msr
@@ -82,6 +83,11 @@ async def logchanbot(content: str):
         traceback.print_exc(file=sys.stdout)
 
 
+async def reddit_message(to_user: str, subject: str, message_text: str):
+    # praw calls are blocking, keep them off the event loop
+    return await asyncio.get_event_loop().run_in_executor(None, functools.partial(reddit.redditor(to_user).message, subject, message_text))
+
+
 # Notify user
 async def notify_new_move_balance_user():
     time_lap = 5
@@ -99,7 +105,7 @@ async def notify_new_move_balance_user():
                                     eachTx['amount'] = float(eachTx['amount'])
                                 message_text = "You got a tip deposit:\n\nCoin: {}\nAmount: {}\nFrom: {}@{} ({})".format(eachTx['coin_name'], num_format_coin(eachTx['amount'], eachTx['coin_name']), eachTx['from_userid'], eachTx['from_server'], eachTx['from_name'])
                                 try:
-                                    reddit.redditor(eachTx['to_userid']).message("You got a tip deposit {}".format(eachTx['coin_name']), message_text)
+                                    await reddit_message(eachTx['to_userid'], "You got a tip deposit {}".format(eachTx['coin_name']), message_text)
                                 except Exception as e:
                                     print(traceback.format_exc())
                                     await logchanbot(traceback.format_exc())
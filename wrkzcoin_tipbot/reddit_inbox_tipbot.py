@@ -6,6 +6,7 @@ import sys, traceback
 import redis, json
 import uuid, time
 import asyncio
+import functools, threading
 
 
 from generic_xmr.address_msr import address_msr as address_msr
@@ -44,6 +45,10 @@ ENABLE_COIN_ERC = config.reddit.Enable_Coin_ERC.split(",")
 ENABLE_COIN_NANO = config.telegram.Enable_Coin_Nano.split(",")
 SERVER = 'REDDIT'
 WITHDRAW_IN_PROCESS = []
+# inbox stream => queue => workers
+INBOX_QUEUE_SIZE = 1000
+INBOX_WORKERS = 8
+INBOX_AUTHOR_LOCKS = {}
 redis_pool = None
 redis_conn = None
 redis_expired = 120
@@ -81,622 +86,653 @@ async def logchanbot(content: str):
     except Exception as e:
         traceback.print_exc(file=sys.stdout)
 
-async def run_inbox_monitor():
+async def reddit_reply(item, reply_message: str):
+    # praw calls are blocking, keep them off the event loop
+    return await asyncio.get_event_loop().run_in_executor(None, item.reply, reply_message)
+
+
+async def reddit_message(to_user: str, subject: str, message_text: str):
+    return await asyncio.get_event_loop().run_in_executor(None, functools.partial(reddit.redditor(to_user).message, subject, message_text))
+
+
+async def process_inbox_item(item):
     global ENABLE_COIN
-    async def add_reddit_msg(item):
-        try:
-            add_msg = await store.reddit_insert_msg(item.id, item.name, item.author.name, item.dest.name, item.body, item.body_html, int(item.created))
-            return True
-        except Exception as e:
-            traceback.print_exc(file=sys.stdout)
-            await logchanbot(traceback.format_exc())
-    while True:
-        try:
-            for item in reddit.inbox.stream():
-                #print(vars(item))
-                #print("============")
-                #print(item)
-                check_msg = await store.reddit_check_exist(item.name)
-                if check_msg:
-                    continue
+    #print(vars(item))
+    #print("============")
+    #print(item)
+    check_msg = await store.reddit_check_exist(item.name)
+    if check_msg:
+        return
+    else:
+        #print('Found Author %s' % item.author.name)
+        commands = item.body.split(" ")
+        #print(commands[0])
+        if commands[0].lower() == '!help':
+            reply_message = 'Help\n\n Reply with command in the body of text:\n\n  '
+            reply_message += '!balance - get your balance\n\n  '
+            reply_message += '!tip <amount> <coin name> <user>\n\n  '
+            reply_message += '!deposit <coin name>\n\n  '
+            reply_message += '!send <amount> <address> [coin name]\n\n  '
+            reply_message += '!tipto <amount> <coinname> <user@discord|telegram>\n\n  '
+            await reddit_reply(item, reply_message)
+
+        elif commands[0].lower() == '!deposit':
+            if commands[1]:
+                COIN_NAME = commands[1].upper()
+                if COIN_NAME not in ENABLE_COIN:
+                    reply_message = f'{COIN_NAME} is not supported. Please choose one of {config.reddit.Enable_Reddit_Coin}'
                 else:
-                    #print('Found Author %s' % item.author.name)
-                    commands = item.body.split(" ")
-                    #print(commands[0])
-                    if commands[0].lower() == '!help':
-                        reply_message = 'Help\n\n Reply with command in the body of text:\n\n  '
-                        reply_message += '!balance - get your balance\n\n  '
-                        reply_message += '!tip <amount> <coin name> <user>\n\n  '
-                        reply_message += '!deposit <coin name>\n\n  '
-                        reply_message += '!send <amount> <address> [coin name]\n\n  '
-                        reply_message += '!tipto <amount> <coinname> <user@discord|telegram>\n\n  '
-                        item.reply(reply_message)
-
-                    elif commands[0].lower() == '!deposit':
-                        if commands[1]:
-                            COIN_NAME = commands[1].upper()
-                            if COIN_NAME not in ENABLE_COIN:
-                                reply_message = f'{COIN_NAME} is not supported. Please choose one of {config.reddit.Enable_Reddit_Coin}'
-                            else:
-                                user_addr = await store.sql_get_userwallet(item.author.name, COIN_NAME, SERVER)
-                                if user_addr is None:
-                                    if COIN_NAME in ENABLE_COIN_ERC:
-                                        w = create_eth_wallet()
-                                        userregister = await store.sql_register_user(item.author.name, COIN_NAME, SERVER, 0, w)
-                                    else:
-                                        userregister = await store.sql_register_user(item.author.name, COIN_NAME, SERVER, 0)
-                                    user_addr = await store.sql_get_userwallet(item.author.name, COIN_NAME, SERVER)
-                                reply_message = f'DEPOSIT {COIN_NAME} INFO:\n\n  '
-                                reply_message += 'Deposit:\n\n' + user_addr['balance_wallet_address']            
+                    user_addr = await store.sql_get_userwallet(item.author.name, COIN_NAME, SERVER)
+                    if user_addr is None:
+                        if COIN_NAME in ENABLE_COIN_ERC:
+                            w = create_eth_wallet()
+                            userregister = await store.sql_register_user(item.author.name, COIN_NAME, SERVER, 0, w)
                         else:
-                            reply_message = 'Please use !deposit <coin name>'
-                        item.reply(reply_message)
-
-                    elif commands[0].lower() == '!balance' or commands[0].lower() == '!bal':
-                        message_text = ""
-                        coin_str = "\n"
-                        for COIN_ITEM in [coinItem.upper() for coinItem in ENABLE_COIN]:
-                            wallet = await store.sql_get_userwallet(item.author.name, COIN_ITEM, SERVER)
-                            if wallet is None:
-                                if COIN_ITEM in ENABLE_COIN_ERC:
-                                    w = create_eth_wallet()
-                                    userregister = await store.sql_register_user(item.author.name, COIN_ITEM, SERVER, 0, w)
-                                else:
-                                    userregister = await store.sql_register_user(item.author.name, COIN_ITEM, SERVER,0)
-                                wallet = await store.sql_get_userwallet(item.author.name, COIN_ITEM, SERVER)
-                            if COIN_ITEM in ENABLE_COIN_ERC:
-                                coin_family = "ERC-20"
-                            else:
-                                coin_family = getattr(getattr(config,"daemon"+COIN_ITEM),"coin_family","TRTL")
-                            if wallet is None:
-                                await logchanbot(f'[Reddit] A user call !balance {COIN_ITEM} failed')
-                                balance_actual = "N/A"
-                            else:
-                                userdata_balance = await store.sql_user_balance(item.author.name, COIN_ITEM, SERVER)
-                                xfer_in = 0
-                                if COIN_ITEM not in ENABLE_COIN_ERC:
-                                    xfer_in = await store.sql_user_balance_get_xfer_in(item.author.name, COIN_ITEM, SERVER)
-                                if COIN_ITEM in ENABLE_COIN_DOGE+ENABLE_COIN_ERC:
-                                    actual_balance = float(xfer_in) + float(userdata_balance['Adjust'])
-                                elif COIN_ITEM in ENABLE_COIN_NANO:
-                                    actual_balance = int(xfer_in) + int(userdata_balance['Adjust'])
-                                    actual_balance = round(actual_balance / get_decimal(COIN_ITEM), 6) * get_decimal(COIN_ITEM)
-                                else:
-                                    actual_balance = int(xfer_in) + int(userdata_balance['Adjust'])
-                                balance_actual = num_format_coin(actual_balance, COIN_ITEM)
-                                # Negative check
-                                try:
-                                    if actual_balance < 0:
-                                        msg_negative = '[Reddit] Negative balance detected:\nUser: '+item.author.name+'\nCoin: '+COIN_ITEM+'\nAtomic Balance: '+str(actual_balance)
-                                        await logchanbot(msg_negative)
-                                except Exception as e:
-                                    await logchanbot(traceback.format_exc())
-                            coin_str += COIN_ITEM + ": " + balance_actual + COIN_ITEM + "\n\n"
-                        message_text = 'YOUR BALANCE SHEET:\n\n' + coin_str
-                        item.reply(message_text)
+                            userregister = await store.sql_register_user(item.author.name, COIN_NAME, SERVER, 0)
+                        user_addr = await store.sql_get_userwallet(item.author.name, COIN_NAME, SERVER)
+                    reply_message = f'DEPOSIT {COIN_NAME} INFO:\n\n  '
+                    reply_message += 'Deposit:\n\n' + user_addr['balance_wallet_address']            
+            else:
+                reply_message = 'Please use !deposit <coin name>'
+            await reddit_reply(item, reply_message)
+
+        elif commands[0].lower() == '!balance' or commands[0].lower() == '!bal':
+            message_text = ""
+            coin_str = "\n"
+            for COIN_ITEM in [coinItem.upper() for coinItem in ENABLE_COIN]:
+                wallet = await store.sql_get_userwallet(item.author.name, COIN_ITEM, SERVER)
+                if wallet is None:
+                    if COIN_ITEM in ENABLE_COIN_ERC:
+                        w = create_eth_wallet()
+                        userregister = await store.sql_register_user(item.author.name, COIN_ITEM, SERVER, 0, w)
+                    else:
+                        userregister = await store.sql_register_user(item.author.name, COIN_ITEM, SERVER,0)
+                    wallet = await store.sql_get_userwallet(item.author.name, COIN_ITEM, SERVER)
+                if COIN_ITEM in ENABLE_COIN_ERC:
+                    coin_family = "ERC-20"
+                else:
+                    coin_family = getattr(getattr(config,"daemon"+COIN_ITEM),"coin_family","TRTL")
+                if wallet is None:
+                    await logchanbot(f'[Reddit] A user call !balance {COIN_ITEM} failed')
+                    balance_actual = "N/A"
+                else:
+                    userdata_balance = await store.sql_user_balance(item.author.name, COIN_ITEM, SERVER)
+                    xfer_in = 0
+                    if COIN_ITEM not in ENABLE_COIN_ERC:
+                        xfer_in = await store.sql_user_balance_get_xfer_in(item.author.name, COIN_ITEM, SERVER)
+                    if COIN_ITEM in ENABLE_COIN_DOGE+ENABLE_COIN_ERC:
+                        actual_balance = float(xfer_in) + float(userdata_balance['Adjust'])
+                    elif COIN_ITEM in ENABLE_COIN_NANO:
+                        actual_balance = int(xfer_in) + int(userdata_balance['Adjust'])
+                        actual_balance = round(actual_balance / get_decimal(COIN_ITEM), 6) * get_decimal(COIN_ITEM)
+                    else:
+                        actual_balance = int(xfer_in) + int(userdata_balance['Adjust'])
+                    balance_actual = num_format_coin(actual_balance, COIN_ITEM)
+                    # Negative check
+                    try:
+                        if actual_balance < 0:
+                            msg_negative = '[Reddit] Negative balance detected:\nUser: '+item.author.name+'\nCoin: '+COIN_ITEM+'\nAtomic Balance: '+str(actual_balance)
+                            await logchanbot(msg_negative)
+                    except Exception as e:
+                        await logchanbot(traceback.format_exc())
+                coin_str += COIN_ITEM + ": " + balance_actual + COIN_ITEM + "\n\n"
+            message_text = 'YOUR BALANCE SHEET:\n\n' + coin_str
+            await reddit_reply(item, message_text)
+            add_msg = await store.reddit_insert_msg(item.id, item.name, item.author.name, item.dest.name, item.body, item.body_html, int(item.created))
+            return
+        elif commands[0].lower() == '!send':
+            # !send amount coin address
+            try:
+                if len(commands) < 4:
+                    reply_message = "Please use !send amount coin address"
+                    await reddit_reply(item, reply_message)
+                    add_msg = await store.reddit_insert_msg(item.id, item.name, item.author.name, item.dest.name, item.body, item.body_html, int(item.created))
+                    return
+                else:
+                    amount = commands[1].replace(",", "")
+                    wallet_address = commands[3]
+                    if wallet_address.isalnum() == False:
+                        wallet_address = None
+                    try:
+                        amount = Decimal(amount)
+                    except Exception as e:
+                        reply_message = "Invalid amount."
+                        amount = None
+                        await reddit_reply(item, reply_message)
                         add_msg = await store.reddit_insert_msg(item.id, item.name, item.author.name, item.dest.name, item.body, item.body_html, int(item.created))
-                        continue
-                    elif commands[0].lower() == '!send':
-                        # !send amount coin address
-                        try:
-                            if len(commands) < 4:
+                        return
+                    COIN_NAME = commands[2].upper()
+                    if COIN_NAME not in ENABLE_COIN:
+                        reply_message = f'{COIN_NAME} is not supported. Please choose one of {config.reddit.Enable_Reddit_Coin}'
+                        COIN_NAME = None
+                    else:
+                        if is_maintenance_coin(COIN_NAME) or not is_coin_txable(COIN_NAME):
+                            reply_message = f"{COIN_NAME} under maintenance or disable."
+                            await reddit_reply(item, reply_message)
+                            add_msg = await store.reddit_insert_msg(item.id, item.name, item.author.name, item.dest.name, item.body, item.body_html, int(item.created))
+                            return
+                        else:
+                            if amount is None or wallet_address is None or COIN_NAME is None:
                                 reply_message = "Please use !send amount coin address"
-                                item.reply(reply_message)
+                                await reddit_reply(item, reply_message)
                                 add_msg = await store.reddit_insert_msg(item.id, item.name, item.author.name, item.dest.name, item.body, item.body_html, int(item.created))
-                                continue
+                                return
                             else:
-                                amount = commands[1].replace(",", "")
-                                wallet_address = commands[3]
-                                if wallet_address.isalnum() == False:
-                                    wallet_address = None
-                                try:
-                                    amount = Decimal(amount)
-                                except Exception as e:
-                                    reply_message = "Invalid amount."
-                                    amount = None
-                                    item.reply(reply_message)
+                                # add redis action
+                                random_string = str(uuid.uuid4())
+                                await add_tx_action_redis(json.dumps([random_string, "SEND", item.author.name, item.author.name, float("%.3f" % time.time()), item.body, SERVER, "START"]), False)
+                                check_in = await store.coin_check_balance_address_in_users(wallet_address, COIN_NAME)
+                                if check_in:
+                                    reply_message = "You can not send to this address:\n\n" + wallet_address
+                                    await reddit_reply(item, reply_message)
                                     add_msg = await store.reddit_insert_msg(item.id, item.name, item.author.name, item.dest.name, item.body, item.body_html, int(item.created))
-                                    continue
-                                COIN_NAME = commands[2].upper()
-                                if COIN_NAME not in ENABLE_COIN:
-                                    reply_message = f'{COIN_NAME} is not supported. Please choose one of {config.reddit.Enable_Reddit_Coin}'
-                                    COIN_NAME = None
+                                    return
                                 else:
-                                    if is_maintenance_coin(COIN_NAME) or not is_coin_txable(COIN_NAME):
-                                        reply_message = f"{COIN_NAME} under maintenance or disable."
-                                        item.reply(reply_message)
+                                    COIN_NAME_CHECK = get_cn_coin_from_address(wallet_address)
+                                    if not COIN_NAME_CHECK:
+                                        reply_message = "Unknown coin name:\n\n" + wallet_address
+                                        await reddit_reply(item, reply_message)
                                         add_msg = await store.reddit_insert_msg(item.id, item.name, item.author.name, item.dest.name, item.body, item.body_html, int(item.created))
-                                        continue
+                                        return
+                                    elif COIN_NAME_CHECK != COIN_NAME:
+                                        reply_message = "Error getting address and coin name from:\n\n" + wallet_address
+                                        await reddit_reply(item, reply_message)
+                                        add_msg = await store.reddit_insert_msg(item.id, item.name, item.author.name, item.dest.name, item.body, item.body_html, int(item.created))
+                                        return
                                     else:
-                                        if amount is None or wallet_address is None or COIN_NAME is None:
-                                            reply_message = "Please use !send amount coin address"
-                                            item.reply(reply_message)
-                                            add_msg = await store.reddit_insert_msg(item.id, item.name, item.author.name, item.dest.name, item.body, item.body_html, int(item.created))
-                                            continue
+                                        # get coin family
+                                        if COIN_NAME in ENABLE_COIN_ERC:
+                                            coin_family = "ERC-20"
                                         else:
-                                            # add redis action
-                                            random_string = str(uuid.uuid4())
-                                            await add_tx_action_redis(json.dumps([random_string, "SEND", item.author.name, item.author.name, float("%.3f" % time.time()), item.body, SERVER, "START"]), False)
-                                            check_in = await store.coin_check_balance_address_in_users(wallet_address, COIN_NAME)
-                                            if check_in:
-                                                reply_message = "You can not send to this address:\n\n" + wallet_address
-                                                item.reply(reply_message)
+                                            coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+                                        if coin_family == "TRTL" or coin_family == "DOGE":
+                                            addressLength = get_addrlen(COIN_NAME)
+                                            IntaddressLength = 0
+                                            paymentid = None
+                                            CoinAddress = None
+
+                                            userdata_balance = await store.sql_user_balance(item.author.name, COIN_NAME, SERVER)
+                                            xfer_in = 0
+                                            if COIN_NAME not in ENABLE_COIN_ERC:
+                                                xfer_in = await store.sql_user_balance_get_xfer_in(item.author.name, COIN_NAME, SERVER)
+                                            if COIN_NAME in ENABLE_COIN_DOGE+ENABLE_COIN_ERC:
+                                                actual_balance = float(xfer_in) + float(userdata_balance['Adjust'])
+                                            elif COIN_NAME in ENABLE_COIN_NANO:
+                                                actual_balance = int(xfer_in) + int(userdata_balance['Adjust'])
+                                                actual_balance = round(actual_balance / get_decimal(COIN_NAME), 6) * get_decimal(COIN_NAME)
+                                            else:
+                                                actual_balance = int(xfer_in) + int(userdata_balance['Adjust'])
+                                            # Negative check
+                                            try:
+                                                if actual_balance < 0:
+                                                    msg_negative = '[Reddit] Negative balance detected:\nUser: '+item.author.name+'\nCoin: '+COIN_NAME+'\nAtomic Balance: '+str(actual_balance)
+                                                    await logchanbot(msg_negative)
+                                            except Exception as e:
+                                                await logchanbot(traceback.format_exc())
+
+                                            if COIN_NAME in ENABLE_COIN_ERC:
+                                                token_info = await store.get_token_info(COIN_NAME)
+                                                confim_depth = token_info['deposit_confirm_depth']
+                                                Min_Tip = token_info['real_min_tip']
+                                                Max_Tip = token_info['real_max_tip']
+                                                Min_Tx = token_info['real_min_tx']
+                                                Max_Tx = token_info['real_max_tx']
+                                                real_amount = amount
+                                                NetFee = token_info['real_withdraw_fee']
+                                            else:
+                                                confim_depth = get_confirm_depth(COIN_NAME)
+                                                Min_Tip = get_min_mv_amount(COIN_NAME)
+                                                Max_Tip = get_max_mv_amount(COIN_NAME)
+                                                Min_Tx = get_min_tx_amount(COIN_NAME)
+                                                Max_Tx = get_max_tx_amount(COIN_NAME)
+                                                real_amount = int(amount * get_decimal(COIN_NAME)) if coin_family in ["BCN", "XMR", "TRTL", "NANO"] else float(amount)
+                                                NetFee = get_reserved_fee(coin = COIN_NAME)
+                                            message_text = ''
+                                            valid_amount = True
+                                            if real_amount + NetFee > actual_balance:
+                                                message_text = '\nNot enough reserved fee / Insufficient balance to send ' + num_format_coin(real_amount, COIN_NAME) + COIN_NAME + ' to ' + wallet_address
+                                                valid_amount = False
+                                            elif real_amount > Max_Tx:
+                                                message_text = '\nTransactions cannot be bigger than ' + num_format_coin(Max_Tx, COIN_NAME) + COIN_NAME
+                                                valid_amount = False
+                                            elif real_amount < Min_Tx:
+                                                message_text = '\nTransactions cannot be smaller than ' + num_format_coin(Min_Tx, COIN_NAME) + COIN_NAME
+                                                valid_amount = False
+                                            if valid_amount == False:
+                                                await reddit_reply(item, message_text)
                                                 add_msg = await store.reddit_insert_msg(item.id, item.name, item.author.name, item.dest.name, item.body, item.body_html, int(item.created))
-                                                continue
+                                                return
                                             else:
-                                                COIN_NAME_CHECK = get_cn_coin_from_address(wallet_address)
-                                                if not COIN_NAME_CHECK:
-                                                    reply_message = "Unknown coin name:\n\n" + wallet_address
-                                                    item.reply(reply_message)
-                                                    add_msg = await store.reddit_insert_msg(item.id, item.name, item.author.name, item.dest.name, item.body, item.body_html, int(item.created))
-                                                    continue
-                                                elif COIN_NAME_CHECK != COIN_NAME:
-                                                    reply_message = "Error getting address and coin name from:\n\n" + wallet_address
-                                                    item.reply(reply_message)
-                                                    add_msg = await store.reddit_insert_msg(item.id, item.name, item.author.name, item.dest.name, item.body, item.body_html, int(item.created))
-                                                    continue
-                                                else:
-                                                    # get coin family
-                                                    if COIN_NAME in ENABLE_COIN_ERC:
-                                                        coin_family = "ERC-20"
-                                                    else:
-                                                        coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
-                                                    if coin_family == "TRTL" or coin_family == "DOGE":
-                                                        addressLength = get_addrlen(COIN_NAME)
-                                                        IntaddressLength = 0
-                                                        paymentid = None
-                                                        CoinAddress = None
-
-                                                        userdata_balance = await store.sql_user_balance(item.author.name, COIN_NAME, SERVER)
-                                                        xfer_in = 0
-                                                        if COIN_NAME not in ENABLE_COIN_ERC:
-                                                            xfer_in = await store.sql_user_balance_get_xfer_in(item.author.name, COIN_NAME, SERVER)
-                                                        if COIN_NAME in ENABLE_COIN_DOGE+ENABLE_COIN_ERC:
-                                                            actual_balance = float(xfer_in) + float(userdata_balance['Adjust'])
-                                                        elif COIN_NAME in ENABLE_COIN_NANO:
-                                                            actual_balance = int(xfer_in) + int(userdata_balance['Adjust'])
-                                                            actual_balance = round(actual_balance / get_decimal(COIN_NAME), 6) * get_decimal(COIN_NAME)
-                                                        else:
-                                                            actual_balance = int(xfer_in) + int(userdata_balance['Adjust'])
-                                                        # Negative check
-                                                        try:
-                                                            if actual_balance < 0:
-                                                                msg_negative = '[Reddit] Negative balance detected:\nUser: '+item.author.name+'\nCoin: '+COIN_NAME+'\nAtomic Balance: '+str(actual_balance)
-                                                                await logchanbot(msg_negative)
-                                                        except Exception as e:
-                                                            await logchanbot(traceback.format_exc())
-
-                                                        if COIN_NAME in ENABLE_COIN_ERC:
-                                                            token_info = await store.get_token_info(COIN_NAME)
-                                                            confim_depth = token_info['deposit_confirm_depth']
-                                                            Min_Tip = token_info['real_min_tip']
-                                                            Max_Tip = token_info['real_max_tip']
-                                                            Min_Tx = token_info['real_min_tx']
-                                                            Max_Tx = token_info['real_max_tx']
-                                                            real_amount = amount
-                                                            NetFee = token_info['real_withdraw_fee']
-                                                        else:
-                                                            confim_depth = get_confirm_depth(COIN_NAME)
-                                                            Min_Tip = get_min_mv_amount(COIN_NAME)
-                                                            Max_Tip = get_max_mv_amount(COIN_NAME)
-                                                            Min_Tx = get_min_tx_amount(COIN_NAME)
-                                                            Max_Tx = get_max_tx_amount(COIN_NAME)
-                                                            real_amount = int(amount * get_decimal(COIN_NAME)) if coin_family in ["BCN", "XMR", "TRTL", "NANO"] else float(amount)
-                                                            NetFee = get_reserved_fee(coin = COIN_NAME)
-                                                        message_text = ''
-                                                        valid_amount = True
-                                                        if real_amount + NetFee > actual_balance:
-                                                            message_text = '\nNot enough reserved fee / Insufficient balance to send ' + num_format_coin(real_amount, COIN_NAME) + COIN_NAME + ' to ' + wallet_address
-                                                            valid_amount = False
-                                                        elif real_amount > Max_Tx:
-                                                            message_text = '\nTransactions cannot be bigger than ' + num_format_coin(Max_Tx, COIN_NAME) + COIN_NAME
-                                                            valid_amount = False
-                                                        elif real_amount < Min_Tx:
-                                                            message_text = '\nTransactions cannot be smaller than ' + num_format_coin(Min_Tx, COIN_NAME) + COIN_NAME
-                                                            valid_amount = False
-                                                        if valid_amount == False:
-                                                            item.reply(message_text)
+                                                if coin_family == "TRTL":
+                                                    IntaddressLength = get_intaddrlen(COIN_NAME)
+                                                    if len(wallet_address) == int(addressLength):
+                                                        valid_address = addressvalidation.validate_address_cn(wallet_address, COIN_NAME)
+                                                        if valid_address is None:
+                                                            message_text = "Invalid address:\n\n: " + wallet_address
+                                                            await reddit_reply(item, message_text)
                                                             add_msg = await store.reddit_insert_msg(item.id, item.name, item.author.name, item.dest.name, item.body, item.body_html, int(item.created))
-                                                            continue
+                                                            return
                                                         else:
-                                                            if coin_family == "TRTL":
-                                                                IntaddressLength = get_intaddrlen(COIN_NAME)
-                                                                if len(wallet_address) == int(addressLength):
-                                                                    valid_address = addressvalidation.validate_address_cn(wallet_address, COIN_NAME)
-                                                                    if valid_address is None:
-                                                                        message_text = "Invalid address:\n\n: " + wallet_address
-                                                                        item.reply(message_text)
-                                                                        add_msg = await store.reddit_insert_msg(item.id, item.name, item.author.name, item.dest.name, item.body, item.body_html, int(item.created))
-                                                                        continue
-                                                                    else:
-                                                                        user_from = await store.sql_get_userwallet(item.author.name, COIN_NAME, SERVER)
-                                                                        if user_from is None:
-                                                                            userregister = await store.sql_register_user(item.author.name, COIN_NAME, SERVER, 0)
-                                                                            user_from = await store.sql_get_userwallet(item.author.name, COIN_NAME, SERVER)
-                                                                        CoinAddress = wallet_address
-                                                                elif len(wallet_address) == int(IntaddressLength): 
-                                                                    # use integrated address
-                                                                    valid_address = addressvalidation.validate_integrated_cn(wallet_address, COIN_NAME)
-                                                                    if valid_address == 'invalid':
-                                                                        message_text = "Invalid address:\n\n" + wallet_address
-                                                                        item.reply(message_text)
-                                                                        add_msg = await store.reddit_insert_msg(item.id, item.name, item.author.name, item.dest.name, item.body, item.body_html, int(item.created))
-                                                                        continue
-                                                                    elif len(valid_address) == 2:
-                                                                        address_paymentID = wallet_address
-                                                                        CoinAddress = valid_address['address']
-                                                                        paymentid = valid_address['integrated_id']
-
-                                                                main_address = getattr(getattr(config,"daemon"+COIN_NAME),"MainAddress")
-                                                                if CoinAddress and CoinAddress == main_address:
-                                                                    # Not allow to send to own main address
-                                                                    message_text = "You can not send to:\n\n" + wallet_address
-                                                                    item.reply(message_text)
-                                                                    add_msg = await store.reddit_insert_msg(item.id, item.name, item.author.name, item.dest.name, item.body, item.body_html, int(item.created))
-                                                                    continue
-                                                                else:
-                                                                    tip = None
-                                                                    if item.author.name not in WITHDRAW_IN_PROCESS:
-                                                                        WITHDRAW_IN_PROCESS.append(item.author.name)
-                                                                    else:
-                                                                        message_text = "You have another tx in progress."
-                                                                        item.reply(message_text)
-                                                                        add_msg = await store.reddit_insert_msg(item.id, item.name, item.author.name, item.dest.name, item.body, item.body_html, int(item.created))
-                                                                        continue
-                                                                    if paymentid:
-                                                                        try:
-                                                                            tip = await store.sql_external_cn_single_id(item.author.name, CoinAddress, real_amount, paymentid, COIN_NAME, SERVER)
-                                                                            await logchanbot(f'[Reddit] User {item.author.name} send tx out {num_format_coin(real_amount, COIN_NAME)}{COIN_NAME}')
-                                                                        except Exception as e:
-                                                                            traceback.print_exc(file=sys.stdout)
-                                                                    else:
-                                                                        try:
-                                                                            tip = await store.sql_external_cn_single(item.author.name, CoinAddress, real_amount, COIN_NAME, SERVER)
-                                                                            await logchanbot(f'[Reddit] User {item.author.name} send tx out {num_format_coin(real_amount, COIN_NAME)}{COIN_NAME}')
-                                                                        except Exception as e:
-                                                                            traceback.print_exc(file=sys.stdout)
-                                                                    if item.author.name in WITHDRAW_IN_PROCESS:
-                                                                        await asyncio.sleep(1)
-                                                                        WITHDRAW_IN_PROCESS.remove(item.author.name)
-                                                                    if tip:
-                                                                        tip_tx_tipper = "\nTransaction hash: {}".format(tip['transactionHash'])
-                                                                        tip_tx_tipper += "\nTx Fee: {}{}".format(num_format_coin(tip['fee'], COIN_NAME), COIN_NAME)
-                                                                        await add_tx_action_redis(json.dumps([random_string, "SEND", item.author.name, item.author.name, float("%.3f" % time.time()), item.body, SERVER, "COMPLETE"]), False)
-                                                                        message_text = f"You have sent {num_format_coin(real_amount, COIN_NAME)}{COIN_NAME}:\n\n" + tip_tx_tipper
-                                                                        item.reply(message_text)
-                                                                        add_msg = await store.reddit_insert_msg(item.id, item.name, item.author.name, item.dest.name, item.body, item.body_html, int(item.created))
-                                                                        continue
-                                                                    else:
-                                                                        message_text = f"Internal error for sending {num_format_coin(real_amount, COIN_NAME)}{COIN_NAME}"
-                                                                        item.reply(message_text)
-                                                                        add_msg = await store.reddit_insert_msg(item.id, item.name, item.author.name, item.dest.name, item.body, item.body_html, int(item.created))
-                                                                        continue
-                                                            elif coin_family == "DOGE":
-                                                                valid_address = await doge_validaddress(str(wallet_address), COIN_NAME)
-                                                                if 'isvalid' in valid_address:
-                                                                    if str(valid_address['isvalid']) != "True":
-                                                                        message_text = "Invalid address:\n\n" + wallet_address
-                                                                        item.reply(message_text)
-                                                                        add_msg = await store.reddit_insert_msg(item.id, item.name, item.author.name, item.dest.name, item.body, item.body_html, int(item.created))
-                                                                        continue
-                                                                    else:
-                                                                        sendTx = None
-                                                                        if item.author.name not in WITHDRAW_IN_PROCESS:
-                                                                            WITHDRAW_IN_PROCESS.append(mitem.author.name)
-                                                                        else:
-                                                                            message_text = "You have another tx in progress."
-                                                                            item.reply(message_text)
-                                                                            add_msg = await store.reddit_insert_msg(item.id, item.name, item.author.name, item.dest.name, item.body, item.body_html, int(item.created))
-                                                                            continue
-                                                                        try:
-                                                                            NetFee = get_tx_fee(coin = COIN_NAME)
-                                                                            sendTx = await store.sql_external_doge_single(item.author.name, real_amount, NetFee, wallet_address, COIN_NAME, 'SEND', SERVER)
-                                                                            await logchanbot(f'[Reddit] User {item.author.name} send tx out {num_format_coin(real_amount, COIN_NAME)}{COIN_NAME}')
-                                                                        except Exception as e:
-                                                                            traceback.print_exc(file=sys.stdout)
-
-                                                                        if item.author.name in WITHDRAW_IN_PROCESS:
-                                                                            await asyncio.sleep(1)
-                                                                            WITHDRAW_IN_PROCESS.remove(item.author.name)
-                                                                        if sendTx:
-                                                                            tx_text = "\nTransaction hash: {}".format(sendTx)
-                                                                            tx_text += "\nNetwork fee deducted from the amount."
-                                                                            
-                                                                            message_text = f"You have sent {num_format_coin(real_amount, COIN_NAME)}{COIN_NAME}:\n\n" + tx_text
-                                                                            item.reply(message_text)
-                                                                            add_msg = await store.reddit_insert_msg(item.id, item.name, item.author.name, item.dest.name, item.body, item.body_html, int(item.created))
-                                                                            continue
-                                                                        else:
-                                                                            message_text = f"Internal error for sending {num_format_coin(real_amount, COIN_NAME)}{COIN_NAME}"
-                                                                            item.reply(message_text)
-                                                                            add_msg = await store.reddit_insert_msg(item.id, item.name, item.author.name, item.dest.name, item.body, item.body_html, int(item.created))
-                                                                            continue
-                                                    else:
-                                                        message_text = "Not supported yet. Check back later."
-                                                        item.reply(message_text)
+                                                            user_from = await store.sql_get_userwallet(item.author.name, COIN_NAME, SERVER)
+                                                            if user_from is None:
+                                                                userregister = await store.sql_register_user(item.author.name, COIN_NAME, SERVER, 0)
+                                                                user_from = await store.sql_get_userwallet(item.author.name, COIN_NAME, SERVER)
+                                                            CoinAddress = wallet_address
+                                                    elif len(wallet_address) == int(IntaddressLength): 
+                                                        # use integrated address
+                                                        valid_address = addressvalidation.validate_integrated_cn(wallet_address, COIN_NAME)
+                                                        if valid_address == 'invalid':
+                                                            message_text = "Invalid address:\n\n" + wallet_address
+                                                            await reddit_reply(item, message_text)
+                                                            add_msg = await store.reddit_insert_msg(item.id, item.name, item.author.name, item.dest.name, item.body, item.body_html, int(item.created))
+                                                            return
+                                                        elif len(valid_address) == 2:
+                                                            address_paymentID = wallet_address
+                                                            CoinAddress = valid_address['address']
+                                                            paymentid = valid_address['integrated_id']
+
+                                                    main_address = getattr(getattr(config,"daemon"+COIN_NAME),"MainAddress")
+                                                    if CoinAddress and CoinAddress == main_address:
+                                                        # Not allow to send to own main address
+                                                        message_text = "You can not send to:\n\n" + wallet_address
+                                                        await reddit_reply(item, message_text)
                                                         add_msg = await store.reddit_insert_msg(item.id, item.name, item.author.name, item.dest.name, item.body, item.body_html, int(item.created))
-                                                        continue
-                        except Exception as e:
-                            traceback.print_exc(file=sys.stdout)
-                            await logchanbot(traceback.format_exc())
-                    elif commands[0].lower() == '!tipto':
-                        # !tipto amount coin user@server
-                        try:
-                            if len(commands) < 4:
-                                reply_message = "Please use !tipto amount coin user@server\n\nExample: !tipto 10,000 wrkz xxxxx@discord"
-                            else:
-                                amount = commands[1].replace(",", "")
-                                try:
-                                    amount = Decimal(amount)
-                                except Exception as e:
-                                    reply_message = "Invalid amount."
-                                    amount = None
-                                COIN_NAME = commands[2].upper()
-                                if COIN_NAME not in ENABLE_COIN:
-                                    reply_message = f'{COIN_NAME} is not supported. Please choose one of {config.reddit.Enable_Reddit_Coin}'
-                                    COIN_NAME = None
-                                else:
-                                    if not is_coin_tipable(COIN_NAME) or is_maintenance_coin(COIN_NAME):
-                                        reply_message = f"TIPPING is currently disable for {COIN_NAME}."
-                                        item.reply(reply_message)
-                                    else:
-                                        to_user = commands[3]
-                                        userid = None
-                                        serverto = None
-                                        try:
-                                            userid = to_user.split("@")[0]
-                                            serverto = to_user.split("@")[1].upper()
-                                        except Exception as e:
-                                            pass
-                                        if serverto and serverto not in ["DISCORD", "TELEGRAM"]:
-                                            reply_message = f'Unsupported or unknown **{serverto}**'
-                                            item.reply(reply_message)
-                                        if userid is None or serverto is None or amount is None or COIN_NAME is None:
-                                            reply_message = "Please use !tipto amount coin user@server\n\nExample: !tipto 10,000 wrkz xxxxx@discord"
-                                            item.reply(reply_message)
-                                        else:
-                                            to_otheruser = await store.sql_get_userwallet(userid, COIN_NAME, serverto)
-                                            if to_otheruser is None:
-                                                reply_message = f'User {userid} is not in our DB for {serverto}!'
-                                                item.reply(reply_message)
-                                            else:
-                                                if COIN_NAME in ENABLE_COIN_ERC:
-                                                    coin_family = "ERC-20"
-                                                else:
-                                                    coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
-                                                userdata_balance = await store.sql_user_balance(item.author.name, COIN_NAME, SERVER)
-                                                xfer_in = 0
-                                                if COIN_NAME not in ENABLE_COIN_ERC:
-                                                    xfer_in = await store.sql_user_balance_get_xfer_in(item.author.name, COIN_NAME, SERVER)
-                                                if COIN_NAME in ENABLE_COIN_DOGE+ENABLE_COIN_ERC:
-                                                    actual_balance = float(xfer_in) + float(userdata_balance['Adjust'])
-                                                elif COIN_NAME in ENABLE_COIN_NANO:
-                                                    actual_balance = int(xfer_in) + int(userdata_balance['Adjust'])
-                                                    actual_balance = round(actual_balance / get_decimal(COIN_NAME), 6) * get_decimal(COIN_NAME)
-                                                else:
-                                                    actual_balance = int(xfer_in) + int(userdata_balance['Adjust'])
-                                                # Negative check
-                                                try:
-                                                    if actual_balance < 0:
-                                                        msg_negative = '[Reddit] Negative balance detected:\nUser: '+item.author.name+'\nCoin: '+COIN_NAME+'\nAtomic Balance: '+str(actual_balance)
-                                                        await logchanbot(msg_negative)
-                                                except Exception as e:
-                                                    traceback.print_exc(file=sys.stdout)
-                                                    await logchanbot(traceback.format_exc())
-                                                if COIN_NAME in ENABLE_COIN_ERC:
-                                                    token_info = await store.get_token_info(COIN_NAME)
-                                                    confim_depth = token_info['deposit_confirm_depth']
-                                                    Min_Tip = token_info['real_min_tip']
-                                                    Max_Tip = token_info['real_max_tip']
-                                                    Min_Tx = token_info['real_min_tx']
-                                                    Max_Tx = token_info['real_max_tx']
-                                                    real_amount = amount
-                                                    decimal_pts = token_info['token_decimal']
-                                                else:
-                                                    confim_depth = get_confirm_depth(COIN_NAME)
-                                                    Min_Tip = get_min_mv_amount(COIN_NAME)
-                                                    Max_Tip = get_max_mv_amount(COIN_NAME)
-                                                    Min_Tx = get_min_tx_amount(COIN_NAME)
-                                                    Max_Tx = get_max_tx_amount(COIN_NAME)
-                                                    real_amount = int(amount * get_decimal(COIN_NAME)) if coin_family in ["BCN", "XMR", "TRTL", "NANO"] else float(amount)
-                                                    decimal_pts = int(math.log10(get_decimal(COIN_NAME)))
-                                                valid_amount = True
-                                                if real_amount > actual_balance:
-                                                    reply_message = 'Insufficient balance to send tip of ' + num_format_coin(real_amount, COIN_NAME) + COIN_NAME + ' to ' + userid
-                                                    valid_amount = False
-                                                elif real_amount > Max_Tip:
-                                                    reply_message = 'Transactions cannot be bigger than ' + num_format_coin(Max_Tip, COIN_NAME) + COIN_NAME
-                                                    valid_amount = False
-                                                elif real_amount < Min_Tip:
-                                                    reply_message = 'Transactions cannot be smaller than ' + num_format_coin(Min_Tip, COIN_NAME) + COIN_NAME
-                                                    valid_amount = False
-                                                if valid_amount == False:
-                                                    item.reply(reply_message)
-                                                else:
-                                                    tipto = None
-                                                    try:
+                                                        return
+                                                    else:
+                                                        tip = None
                                                         if item.author.name not in WITHDRAW_IN_PROCESS:
                                                             WITHDRAW_IN_PROCESS.append(item.author.name)
                                                         else:
-                                                            reply_message = "You have another tx in progress."
-                                                            item.reply(reply_message)
-                                                        try:
-                                                            tipto = await store.sql_tipto_crossing(COIN_NAME, item.author.name, item.author.name, 
-                                                                                                   SERVER, userid, userid, serverto, real_amount, decimal_pts)
-                                                            # Update tipstat
+                                                            message_text = "You have another tx in progress."
+                                                            await reddit_reply(item, message_text)
+                                                            add_msg = await store.reddit_insert_msg(item.id, item.name, item.author.name, item.dest.name, item.body, item.body_html, int(item.created))
+                                                            return
+                                                        if paymentid:
+                                                            try:
+                                                                tip = await store.sql_external_cn_single_id(item.author.name, CoinAddress, real_amount, paymentid, COIN_NAME, SERVER)
+                                                                await logchanbot(f'[Reddit] User {item.author.name} send tx out {num_format_coin(real_amount, COIN_NAME)}{COIN_NAME}')
+                                                            except Exception as e:
+                                                                traceback.print_exc(file=sys.stdout)
+                                                        else:
                                                             try:
-                                                                update_tipstat = await store.sql_user_get_tipstat(item.author.name, COIN_NAME, True, SERVER)
-                                                                update_tipstat = await store.sql_user_get_tipstat(userid, COIN_NAME, True, serverto)
+                                                                tip = await store.sql_external_cn_single(item.author.name, CoinAddress, real_amount, COIN_NAME, SERVER)
+                                                                await logchanbot(f'[Reddit] User {item.author.name} send tx out {num_format_coin(real_amount, COIN_NAME)}{COIN_NAME}')
                                                             except Exception as e:
                                                                 traceback.print_exc(file=sys.stdout)
-                                                                await logchanbot(traceback.format_exc())
-                                                            await logchanbot('[Reddit] {} tipto {}{} to **{}**'.format(item.author.name, num_format_coin(real_amount, COIN_NAME), COIN_NAME, to_user))
-                                                        except Exception as e:
-                                                            traceback.print_exc(file=sys.stdout)
-                                                            await logchanbot(traceback.format_exc())
-                                                    except Exception as e:
-                                                        traceback.print_exc(file=sys.stdout)
-                                                        await logchanbot(traceback.format_exc())
-                                                    if tipto:
-                                                        reply_message = f"You sent a new tip to {to_user}:\n\n"+ "Amount: {}{}".format(num_format_coin(real_amount, COIN_NAME), COIN_NAME)
-                                                        try:
-                                                            item.reply(reply_message)
-                                                        except Exception as e:
-                                                            traceback.print_exc(file=sys.stdout)
-                                                            await logchanbot(traceback.print_exc(file=sys.stdout))
                                                         if item.author.name in WITHDRAW_IN_PROCESS:
                                                             await asyncio.sleep(1)
                                                             WITHDRAW_IN_PROCESS.remove(item.author.name)
-                        except Exception as e:
-                            traceback.print_exc(file=sys.stdout)
-                            await logchanbot(traceback.format_exc())
-                    elif commands[0].lower() == '!tip':
-                        # !tip amount coin user
-                        try:
-                            if len(commands) < 4:
-                                reply_message = "Please use !tip amount coin user\n\nExample: !tip 10,000 wrkz wrkzdev"
+                                                        if tip:
+                                                            tip_tx_tipper = "\nTransaction hash: {}".format(tip['transactionHash'])
+                                                            tip_tx_tipper += "\nTx Fee: {}{}".format(num_format_coin(tip['fee'], COIN_NAME), COIN_NAME)
+                                                            await add_tx_action_redis(json.dumps([random_string, "SEND", item.author.name, item.author.name, float("%.3f" % time.time()), item.body, SERVER, "COMPLETE"]), False)
+                                                            message_text = f"You have sent {num_format_coin(real_amount, COIN_NAME)}{COIN_NAME}:\n\n" + tip_tx_tipper
+                                                            await reddit_reply(item, message_text)
+                                                            add_msg = await store.reddit_insert_msg(item.id, item.name, item.author.name, item.dest.name, item.body, item.body_html, int(item.created))
+                                                            return
+                                                        else:
+                                                            message_text = f"Internal error for sending {num_format_coin(real_amount, COIN_NAME)}{COIN_NAME}"
+                                                            await reddit_reply(item, message_text)
+                                                            add_msg = await store.reddit_insert_msg(item.id, item.name, item.author.name, item.dest.name, item.body, item.body_html, int(item.created))
+                                                            return
+                                                elif coin_family == "DOGE":
+                                                    valid_address = await doge_validaddress(str(wallet_address), COIN_NAME)
+                                                    if 'isvalid' in valid_address:
+                                                        if str(valid_address['isvalid']) != "True":
+                                                            message_text = "Invalid address:\n\n" + wallet_address
+                                                            await reddit_reply(item, message_text)
+                                                            add_msg = await store.reddit_insert_msg(item.id, item.name, item.author.name, item.dest.name, item.body, item.body_html, int(item.created))
+                                                            return
+                                                        else:
+                                                            sendTx = None
+                                                            if item.author.name not in WITHDRAW_IN_PROCESS:
+                                                                WITHDRAW_IN_PROCESS.append(mitem.author.name)
+                                                            else:
+                                                                message_text = "You have another tx in progress."
+                                                                await reddit_reply(item, message_text)
+                                                                add_msg = await store.reddit_insert_msg(item.id, item.name, item.author.name, item.dest.name, item.body, item.body_html, int(item.created))
+                                                                return
+                                                            try:
+                                                                NetFee = get_tx_fee(coin = COIN_NAME)
+                                                                sendTx = await store.sql_external_doge_single(item.author.name, real_amount, NetFee, wallet_address, COIN_NAME, 'SEND', SERVER)
+                                                                await logchanbot(f'[Reddit] User {item.author.name} send tx out {num_format_coin(real_amount, COIN_NAME)}{COIN_NAME}')
+                                                            except Exception as e:
+                                                                traceback.print_exc(file=sys.stdout)
+
+                                                            if item.author.name in WITHDRAW_IN_PROCESS:
+                                                                await asyncio.sleep(1)
+                                                                WITHDRAW_IN_PROCESS.remove(item.author.name)
+                                                            if sendTx:
+                                                                tx_text = "\nTransaction hash: {}".format(sendTx)
+                                                                tx_text += "\nNetwork fee deducted from the amount."
+
+                                                                message_text = f"You have sent {num_format_coin(real_amount, COIN_NAME)}{COIN_NAME}:\n\n" + tx_text
+                                                                await reddit_reply(item, message_text)
+                                                                add_msg = await store.reddit_insert_msg(item.id, item.name, item.author.name, item.dest.name, item.body, item.body_html, int(item.created))
+                                                                return
+                                                            else:
+                                                                message_text = f"Internal error for sending {num_format_coin(real_amount, COIN_NAME)}{COIN_NAME}"
+                                                                await reddit_reply(item, message_text)
+                                                                add_msg = await store.reddit_insert_msg(item.id, item.name, item.author.name, item.dest.name, item.body, item.body_html, int(item.created))
+                                                                return
+                                        else:
+                                            message_text = "Not supported yet. Check back later."
+                                            await reddit_reply(item, message_text)
+                                            add_msg = await store.reddit_insert_msg(item.id, item.name, item.author.name, item.dest.name, item.body, item.body_html, int(item.created))
+                                            return
+            except Exception as e:
+                traceback.print_exc(file=sys.stdout)
+                await logchanbot(traceback.format_exc())
+        elif commands[0].lower() == '!tipto':
+            # !tipto amount coin user@server
+            try:
+                if len(commands) < 4:
+                    reply_message = "Please use !tipto amount coin user@server\n\nExample: !tipto 10,000 wrkz xxxxx@discord"
+                else:
+                    amount = commands[1].replace(",", "")
+                    try:
+                        amount = Decimal(amount)
+                    except Exception as e:
+                        reply_message = "Invalid amount."
+                        amount = None
+                    COIN_NAME = commands[2].upper()
+                    if COIN_NAME not in ENABLE_COIN:
+                        reply_message = f'{COIN_NAME} is not supported. Please choose one of {config.reddit.Enable_Reddit_Coin}'
+                        COIN_NAME = None
+                    else:
+                        if not is_coin_tipable(COIN_NAME) or is_maintenance_coin(COIN_NAME):
+                            reply_message = f"TIPPING is currently disable for {COIN_NAME}."
+                            await reddit_reply(item, reply_message)
+                        else:
+                            to_user = commands[3]
+                            userid = None
+                            serverto = None
+                            try:
+                                userid = to_user.split("@")[0]
+                                serverto = to_user.split("@")[1].upper()
+                            except Exception as e:
+                                pass
+                            if serverto and serverto not in ["DISCORD", "TELEGRAM"]:
+                                reply_message = f'Unsupported or unknown **{serverto}**'
+                                await reddit_reply(item, reply_message)
+                            if userid is None or serverto is None or amount is None or COIN_NAME is None:
+                                reply_message = "Please use !tipto amount coin user@server\n\nExample: !tipto 10,000 wrkz xxxxx@discord"
+                                await reddit_reply(item, reply_message)
                             else:
-                                valid_amount = True
-                                amount = commands[1].replace(",", "")
-                                try:
-                                    amount = Decimal(amount)
-                                except Exception as e:
-                                    traceback.print_exc(file=sys.stdout)
-                                    valid_amount = False
-                                    reply_message = "Invalid amount."
-                                    amount = None
-                                    item.reply(reply_message)
-                                COIN_NAME = commands[2].upper()
-                                if COIN_NAME not in ENABLE_COIN:
-                                    reply_message = f'{COIN_NAME} is not supported. Please choose one of {config.reddit.Enable_Reddit_Coin}'
-                                    item.reply(reply_message)
-                                    COIN_NAME = None
+                                to_otheruser = await store.sql_get_userwallet(userid, COIN_NAME, serverto)
+                                if to_otheruser is None:
+                                    reply_message = f'User {userid} is not in our DB for {serverto}!'
+                                    await reddit_reply(item, reply_message)
                                 else:
-                                    if not is_coin_tipable(COIN_NAME) or is_maintenance_coin(COIN_NAME):
-                                        reply_message = f"TIPPING is currently disable for {COIN_NAME}."
-                                        item.reply(reply_message)
+                                    if COIN_NAME in ENABLE_COIN_ERC:
+                                        coin_family = "ERC-20"
                                     else:
-                                        to_user = commands[3]
-                                        userto = await store.sql_get_userwallet(to_user, COIN_NAME, SERVER)
-                                        if userto is None:
-                                            reply_message = f"Can not find user {to_user} in our DB"
-                                            to_user = None
-                                            item.reply(reply_message)
-                                    if (amount is None or COIN_NAME is None) and to_user:
-                                        reply_message = "Please use !tip amount coin user\n\nExample: !tip 10,000 wrkz wrkzdev"
-                                        item.reply(reply_message)
+                                        coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+                                    userdata_balance = await store.sql_user_balance(item.author.name, COIN_NAME, SERVER)
+                                    xfer_in = 0
+                                    if COIN_NAME not in ENABLE_COIN_ERC:
+                                        xfer_in = await store.sql_user_balance_get_xfer_in(item.author.name, COIN_NAME, SERVER)
+                                    if COIN_NAME in ENABLE_COIN_DOGE+ENABLE_COIN_ERC:
+                                        actual_balance = float(xfer_in) + float(userdata_balance['Adjust'])
+                                    elif COIN_NAME in ENABLE_COIN_NANO:
+                                        actual_balance = int(xfer_in) + int(userdata_balance['Adjust'])
+                                        actual_balance = round(actual_balance / get_decimal(COIN_NAME), 6) * get_decimal(COIN_NAME)
                                     else:
-                                        if COIN_NAME in ENABLE_COIN_ERC:
-                                            coin_family = "ERC-20"
-                                        else:
-                                            coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
-                                        user_from = await store.sql_get_userwallet(item.author.name, COIN_NAME, SERVER)
-                                        userdata_balance = await store.sql_user_balance(item.author.name, COIN_NAME, SERVER)
-                                        xfer_in = 0
-                                        if COIN_NAME not in ENABLE_COIN_ERC:
-                                            xfer_in = await store.sql_user_balance_get_xfer_in(item.author.name, COIN_NAME, SERVER)
-                                        if COIN_NAME in ENABLE_COIN_DOGE+ENABLE_COIN_ERC:
-                                            actual_balance = float(xfer_in) + float(userdata_balance['Adjust'])
-                                        elif COIN_NAME in ENABLE_COIN_NANO:
-                                            actual_balance = int(xfer_in) + int(userdata_balance['Adjust'])
-                                            actual_balance = round(actual_balance / get_decimal(COIN_NAME), 6) * get_decimal(COIN_NAME)
-                                        else:
-                                            actual_balance = int(xfer_in) + int(userdata_balance['Adjust'])
-                                        # Negative check
+                                        actual_balance = int(xfer_in) + int(userdata_balance['Adjust'])
+                                    # Negative check
+                                    try:
+                                        if actual_balance < 0:
+                                            msg_negative = '[Reddit] Negative balance detected:\nUser: '+item.author.name+'\nCoin: '+COIN_NAME+'\nAtomic Balance: '+str(actual_balance)
+                                            await logchanbot(msg_negative)
+                                    except Exception as e:
+                                        traceback.print_exc(file=sys.stdout)
+                                        await logchanbot(traceback.format_exc())
+                                    if COIN_NAME in ENABLE_COIN_ERC:
+                                        token_info = await store.get_token_info(COIN_NAME)
+                                        confim_depth = token_info['deposit_confirm_depth']
+                                        Min_Tip = token_info['real_min_tip']
+                                        Max_Tip = token_info['real_max_tip']
+                                        Min_Tx = token_info['real_min_tx']
+                                        Max_Tx = token_info['real_max_tx']
+                                        real_amount = amount
+                                        decimal_pts = token_info['token_decimal']
+                                    else:
+                                        confim_depth = get_confirm_depth(COIN_NAME)
+                                        Min_Tip = get_min_mv_amount(COIN_NAME)
+                                        Max_Tip = get_max_mv_amount(COIN_NAME)
+                                        Min_Tx = get_min_tx_amount(COIN_NAME)
+                                        Max_Tx = get_max_tx_amount(COIN_NAME)
+                                        real_amount = int(amount * get_decimal(COIN_NAME)) if coin_family in ["BCN", "XMR", "TRTL", "NANO"] else float(amount)
+                                        decimal_pts = int(math.log10(get_decimal(COIN_NAME)))
+                                    valid_amount = True
+                                    if real_amount > actual_balance:
+                                        reply_message = 'Insufficient balance to send tip of ' + num_format_coin(real_amount, COIN_NAME) + COIN_NAME + ' to ' + userid
+                                        valid_amount = False
+                                    elif real_amount > Max_Tip:
+                                        reply_message = 'Transactions cannot be bigger than ' + num_format_coin(Max_Tip, COIN_NAME) + COIN_NAME
+                                        valid_amount = False
+                                    elif real_amount < Min_Tip:
+                                        reply_message = 'Transactions cannot be smaller than ' + num_format_coin(Min_Tip, COIN_NAME) + COIN_NAME
+                                        valid_amount = False
+                                    if valid_amount == False:
+                                        await reddit_reply(item, reply_message)
+                                    else:
+                                        tipto = None
                                         try:
-                                            if actual_balance < 0:
-                                                msg_negative = '[Reddit] Negative balance detected:\nUser: '+item.author.name+'\nCoin: '+COIN_NAME+'\nAtomic Balance: '+str(actual_balance)
-                                                await logchanbot(msg_negative)
-                                        except Exception as e:
-                                            traceback.print_exc(file=sys.stdout)
-                                            await logchanbot(traceback.format_exc())
-                                        if COIN_NAME in ENABLE_COIN_ERC:
-                                            token_info = await store.get_token_info(COIN_NAME)
-                                            confim_depth = token_info['deposit_confirm_depth']
-                                            Min_Tip = token_info['real_min_tip']
-                                            Max_Tip = token_info['real_max_tip']
-                                            Min_Tx = token_info['real_min_tx']
-                                            Max_Tx = token_info['real_max_tx']
-                                            real_amount = amount
-                                            decimal_pts = token_info['token_decimal']
-                                        else:
-                                            confim_depth = get_confirm_depth(COIN_NAME)
-                                            Min_Tip = get_min_mv_amount(COIN_NAME)
-                                            Max_Tip = get_max_mv_amount(COIN_NAME)
-                                            Min_Tx = get_min_tx_amount(COIN_NAME)
-                                            Max_Tx = get_max_tx_amount(COIN_NAME)
-                                            real_amount = int(Decimal(amount) * get_decimal(COIN_NAME)) if coin_family in ["BCN", "XMR", "TRTL", "NANO"] else float(amount)
-                                            decimal_pts = int(math.log10(get_decimal(COIN_NAME)))
-                                        message_text = ''
-                                        if real_amount > actual_balance:
-                                            message_text = 'Insufficient balance to send tip of ' + num_format_coin(real_amount, COIN_NAME) + COIN_NAME + ' to ' + to_user
-                                            valid_amount = False
-                                        elif real_amount > Max_Tip:
-                                            message_text = 'Transactions cannot be bigger than ' + num_format_coin(Max_Tip, COIN_NAME) + COIN_NAME
-                                            valid_amount = False
-                                        elif real_amount < Min_Tip:
-                                            message_text = 'Transactions cannot be smaller than ' + num_format_coin(Min_Tip, COIN_NAME) + COIN_NAME
-                                            valid_amount = False
-                                        if valid_amount == False:
-                                            item.reply(reply_message)
-                                        else:
-                                            tip = None
+                                            if item.author.name not in WITHDRAW_IN_PROCESS:
+                                                WITHDRAW_IN_PROCESS.append(item.author.name)
+                                            else:
+                                                reply_message = "You have another tx in progress."
+                                                await reddit_reply(item, reply_message)
                                             try:
-                                                if item.author.name not in WITHDRAW_IN_PROCESS:
-                                                    WITHDRAW_IN_PROCESS.append(item.author.name)
-                                                else:
-                                                    message_text = "You have another tx in progress."
-                                                    item.reply(reply_message)
+                                                tipto = await store.sql_tipto_crossing(COIN_NAME, item.author.name, item.author.name, 
+                                                                                       SERVER, userid, userid, serverto, real_amount, decimal_pts)
+                                                # Update tipstat
                                                 try:
-                                                    if coin_family in ["TRTL", "BCN"]:
-                                                        tip = await store.sql_mv_cn_single(item.author.name, to_user, real_amount, 'TIP', COIN_NAME, SERVER)
-                                                    elif coin_family == "XMR":
-                                                        tip = await store.sql_mv_xmr_single(item.author.name, to_user, real_amount, COIN_NAME, "TIP", SERVER)
-                                                    elif coin_family == "DOGE":
-                                                        tip = await store.sql_mv_doge_single(item.author.name, to_user, real_amount, COIN_NAME, "TIP", SERVER)
-                                                    elif coin_family == "NANO":
-                                                        tip = await store.sql_mv_nano_single(item.author.name, to_user, real_amount, COIN_NAME, "TIP", SERVER)
-                                                    elif coin_family == "ERC-20":
-                                                        tip = await store.sql_mv_erc_single(item.author.name, to_user, real_amount, COIN_NAME, "TIP", token_info['contract'], SERVER)
+                                                    update_tipstat = await store.sql_user_get_tipstat(item.author.name, COIN_NAME, True, SERVER)
+                                                    update_tipstat = await store.sql_user_get_tipstat(userid, COIN_NAME, True, serverto)
                                                 except Exception as e:
                                                     traceback.print_exc(file=sys.stdout)
                                                     await logchanbot(traceback.format_exc())
-
-                                                message_text = f"You sent a new tip to {to_user}:\n\n" + "Amount: {}{}".format(num_format_coin(real_amount, COIN_NAME), COIN_NAME)
-                                                to_message_text = f"You got a new tip from /u/{item.author.name}:\n\n" + "Amount: {}{}".format(num_format_coin(real_amount, COIN_NAME), COIN_NAME)
-                                                if tip:
-                                                    if to_user not in ["BotTips"]:
-                                                        try:
-                                                            reddit.redditor(to_user).message(f"You get a new tip from /u/{item.author.name}", to_message_text)
-                                                        except Exception as e:
-                                                            traceback.print_exc(file=sys.stdout)
-                                                            await logchanbot(traceback.print_exc(file=sys.stdout))
-                                                    if str(item.author.name) not in ["BotTips"]:
-                                                        try:
-                                                            item.reply(message_text)
-                                                        except Exception as e:
-                                                            await logchanbot(traceback.print_exc(file=sys.stdout))
+                                                await logchanbot('[Reddit] {} tipto {}{} to **{}**'.format(item.author.name, num_format_coin(real_amount, COIN_NAME), COIN_NAME, to_user))
+                                            except Exception as e:
+                                                traceback.print_exc(file=sys.stdout)
+                                                await logchanbot(traceback.format_exc())
+                                        except Exception as e:
+                                            traceback.print_exc(file=sys.stdout)
+                                            await logchanbot(traceback.format_exc())
+                                        if tipto:
+                                            reply_message = f"You sent a new tip to {to_user}:\n\n"+ "Amount: {}{}".format(num_format_coin(real_amount, COIN_NAME), COIN_NAME)
+                                            try:
+                                                await reddit_reply(item, reply_message)
                                             except Exception as e:
                                                 traceback.print_exc(file=sys.stdout)
                                                 await logchanbot(traceback.print_exc(file=sys.stdout))
                                             if item.author.name in WITHDRAW_IN_PROCESS:
                                                 await asyncio.sleep(1)
                                                 WITHDRAW_IN_PROCESS.remove(item.author.name)
-                        except Exception as e:
-                            traceback.print_exc(file=sys.stdout)
-                            await logchanbot(traceback.format_exc())
+            except Exception as e:
+                traceback.print_exc(file=sys.stdout)
+                await logchanbot(traceback.format_exc())
+        elif commands[0].lower() == '!tip':
+            # !tip amount coin user
+            try:
+                if len(commands) < 4:
+                    reply_message = "Please use !tip amount coin user\n\nExample: !tip 10,000 wrkz wrkzdev"
+                else:
+                    valid_amount = True
+                    amount = commands[1].replace(",", "")
+                    try:
+                        amount = Decimal(amount)
+                    except Exception as e:
+                        traceback.print_exc(file=sys.stdout)
+                        valid_amount = False
+                        reply_message = "Invalid amount."
+                        amount = None
+                        await reddit_reply(item, reply_message)
+                    COIN_NAME = commands[2].upper()
+                    if COIN_NAME not in ENABLE_COIN:
+                        reply_message = f'{COIN_NAME} is not supported. Please choose one of {config.reddit.Enable_Reddit_Coin}'
+                        await reddit_reply(item, reply_message)
+                        COIN_NAME = None
+                    else:
+                        if not is_coin_tipable(COIN_NAME) or is_maintenance_coin(COIN_NAME):
+                            reply_message = f"TIPPING is currently disable for {COIN_NAME}."
+                            await reddit_reply(item, reply_message)
+                        else:
+                            to_user = commands[3]
+                            userto = await store.sql_get_userwallet(to_user, COIN_NAME, SERVER)
+                            if userto is None:
+                                reply_message = f"Can not find user {to_user} in our DB"
+                                to_user = None
+                                await reddit_reply(item, reply_message)
+                        if (amount is None or COIN_NAME is None) and to_user:
                             reply_message = "Please use !tip amount coin user\n\nExample: !tip 10,000 wrkz wrkzdev"
-                            item.reply(reply_message)
-                #Add message to database
-                try:
-                    add_msg = await store.reddit_insert_msg(item.id, item.name, item.author.name, item.dest.name, item.body, item.body_html, int(item.created))
-                except Exception as e:
-                    traceback.print_exc(file=sys.stdout)
-                    await logchanbot(traceback.format_exc())
-        except:
+                            await reddit_reply(item, reply_message)
+                        else:
+                            if COIN_NAME in ENABLE_COIN_ERC:
+                                coin_family = "ERC-20"
+                            else:
+                                coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+                            user_from = await store.sql_get_userwallet(item.author.name, COIN_NAME, SERVER)
+                            userdata_balance = await store.sql_user_balance(item.author.name, COIN_NAME, SERVER)
+                            xfer_in = 0
+                            if COIN_NAME not in ENABLE_COIN_ERC:
+                                xfer_in = await store.sql_user_balance_get_xfer_in(item.author.name, COIN_NAME, SERVER)
+                            if COIN_NAME in ENABLE_COIN_DOGE+ENABLE_COIN_ERC:
+                                actual_balance = float(xfer_in) + float(userdata_balance['Adjust'])
+                            elif COIN_NAME in ENABLE_COIN_NANO:
+                                actual_balance = int(xfer_in) + int(userdata_balance['Adjust'])
+                                actual_balance = round(actual_balance / get_decimal(COIN_NAME), 6) * get_decimal(COIN_NAME)
+                            else:
+                                actual_balance = int(xfer_in) + int(userdata_balance['Adjust'])
+                            # Negative check
+                            try:
+                                if actual_balance < 0:
+                                    msg_negative = '[Reddit] Negative balance detected:\nUser: '+item.author.name+'\nCoin: '+COIN_NAME+'\nAtomic Balance: '+str(actual_balance)
+                                    await logchanbot(msg_negative)
+                            except Exception as e:
+                                traceback.print_exc(file=sys.stdout)
+                                await logchanbot(traceback.format_exc())
+                            if COIN_NAME in ENABLE_COIN_ERC:
+                                token_info = await store.get_token_info(COIN_NAME)
+                                confim_depth = token_info['deposit_confirm_depth']
+                                Min_Tip = token_info['real_min_tip']
+                                Max_Tip = token_info['real_max_tip']
+                                Min_Tx = token_info['real_min_tx']
+                                Max_Tx = token_info['real_max_tx']
+                                real_amount = amount
+                                decimal_pts = token_info['token_decimal']
+                            else:
+                                confim_depth = get_confirm_depth(COIN_NAME)
+                                Min_Tip = get_min_mv_amount(COIN_NAME)
+                                Max_Tip = get_max_mv_amount(COIN_NAME)
+                                Min_Tx = get_min_tx_amount(COIN_NAME)
+                                Max_Tx = get_max_tx_amount(COIN_NAME)
+                                real_amount = int(Decimal(amount) * get_decimal(COIN_NAME)) if coin_family in ["BCN", "XMR", "TRTL", "NANO"] else float(amount)
+                                decimal_pts = int(math.log10(get_decimal(COIN_NAME)))
+                            message_text = ''
+                            if real_amount > actual_balance:
+                                message_text = 'Insufficient balance to send tip of ' + num_format_coin(real_amount, COIN_NAME) + COIN_NAME + ' to ' + to_user
+                                valid_amount = False
+                            elif real_amount > Max_Tip:
+                                message_text = 'Transactions cannot be bigger than ' + num_format_coin(Max_Tip, COIN_NAME) + COIN_NAME
+                                valid_amount = False
+                            elif real_amount < Min_Tip:
+                                message_text = 'Transactions cannot be smaller than ' + num_format_coin(Min_Tip, COIN_NAME) + COIN_NAME
+                                valid_amount = False
+                            if valid_amount == False:
+                                await reddit_reply(item, reply_message)
+                            else:
+                                tip = None
+                                try:
+                                    if item.author.name not in WITHDRAW_IN_PROCESS:
+                                        WITHDRAW_IN_PROCESS.append(item.author.name)
+                                    else:
+                                        message_text = "You have another tx in progress."
+                                        await reddit_reply(item, reply_message)
+                                    try:
+                                        if coin_family in ["TRTL", "BCN"]:
+                                            tip = await store.sql_mv_cn_single(item.author.name, to_user, real_amount, 'TIP', COIN_NAME, SERVER)
+                                        elif coin_family == "XMR":
+                                            tip = await store.sql_mv_xmr_single(item.author.name, to_user, real_amount, COIN_NAME, "TIP", SERVER)
+                                        elif coin_family == "DOGE":
+                                            tip = await store.sql_mv_doge_single(item.author.name, to_user, real_amount, COIN_NAME, "TIP", SERVER)
+                                        elif coin_family == "NANO":
+                                            tip = await store.sql_mv_nano_single(item.author.name, to_user, real_amount, COIN_NAME, "TIP", SERVER)
+                                        elif coin_family == "ERC-20":
+                                            tip = await store.sql_mv_erc_single(item.author.name, to_user, real_amount, COIN_NAME, "TIP", token_info['contract'], SERVER)
+                                    except Exception as e:
+                                        traceback.print_exc(file=sys.stdout)
+                                        await logchanbot(traceback.format_exc())
+
+                                    message_text = f"You sent a new tip to {to_user}:\n\n" + "Amount: {}{}".format(num_format_coin(real_amount, COIN_NAME), COIN_NAME)
+                                    to_message_text = f"You got a new tip from /u/{item.author.name}:\n\n" + "Amount: {}{}".format(num_format_coin(real_amount, COIN_NAME), COIN_NAME)
+                                    if tip:
+                                        if to_user not in ["BotTips"]:
+                                            try:
+                                                await reddit_message(to_user, f"You get a new tip from /u/{item.author.name}", to_message_text)
+                                            except Exception as e:
+                                                traceback.print_exc(file=sys.stdout)
+                                                await logchanbot(traceback.print_exc(file=sys.stdout))
+                                        if str(item.author.name) not in ["BotTips"]:
+                                            try:
+                                                await reddit_reply(item, message_text)
+                                            except Exception as e:
+                                                await logchanbot(traceback.print_exc(file=sys.stdout))
+                                except Exception as e:
+                                    traceback.print_exc(file=sys.stdout)
+                                    await logchanbot(traceback.print_exc(file=sys.stdout))
+                                if item.author.name in WITHDRAW_IN_PROCESS:
+                                    await asyncio.sleep(1)
+                                    WITHDRAW_IN_PROCESS.remove(item.author.name)
+            except Exception as e:
+                traceback.print_exc(file=sys.stdout)
+                await logchanbot(traceback.format_exc())
+                reply_message = "Please use !tip amount coin user\n\nExample: !tip 10,000 wrkz wrkzdev"
+                await reddit_reply(item, reply_message)
+    #Add message to database
+    try:
+        add_msg = await store.reddit_insert_msg(item.id, item.name, item.author.name, item.dest.name, item.body, item.body_html, int(item.created))
+    except Exception as e:
+        traceback.print_exc(file=sys.stdout)
+        await logchanbot(traceback.format_exc())
+
+
+def inbox_stream_thread(loop, queue):
+    # praw stream is blocking, it runs in its own thread and feeds the asyncio queue
+    while True:
+        try:
+            for item in reddit.inbox.stream():
+                asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+        except Exception as e:
             traceback.print_exc(file=sys.stdout)
-            await logchanbot(traceback.format_exc())
             print('Lost connection - restart')
+            time.sleep(5)
+
+
+async def inbox_worker(queue):
+    while True:
+        item = await queue.get()
+        try:
+            # messages of the same author are handled in order
+            author_name = item.author.name if item.author else ""
+            if author_name not in INBOX_AUTHOR_LOCKS:
+                INBOX_AUTHOR_LOCKS[author_name] = asyncio.Lock()
+            async with INBOX_AUTHOR_LOCKS[author_name]:
+                await process_inbox_item(item)
+        except Exception as e:
+            traceback.print_exc(file=sys.stdout)
+            await logchanbot(traceback.format_exc())
+        finally:
+            queue.task_done()
+
+
+async def run_inbox_monitor():
+    queue = asyncio.Queue(maxsize=INBOX_QUEUE_SIZE)
+    stream_thread = threading.Thread(target=inbox_stream_thread, args=(asyncio.get_event_loop(), queue), daemon=True)
+    stream_thread.start()
+    await asyncio.gather(*[inbox_worker(queue) for i in range(INBOX_WORKERS)])
     return True
 
 
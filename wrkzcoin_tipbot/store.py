@@ -3,6 +3,7 @@ import discord
 
 from typing import List, Dict
 from datetime import datetime
+from collections import deque, OrderedDict
 import time
 import simplejson as json
 import asyncio
@@ -11,6 +12,7 @@ import aiomysql
 from aiomysql.cursors import DictCursor
 
 import daemonrpc_client, rpc_client, wallet, walletapi, addressvalidation
+import db_pool
 from config import config
 import sys, traceback
 import os.path
@@ -56,6 +58,16 @@ FEE_PER_BYTE_COIN = config.Fee_Per_Byte_Coin.split(",")
 
 pool = None
 pool_cmc = None
+# reads that tolerate replica lag, same as pool when no mysql_replica is configured
+pool_read = None
+# reads go to the primary until then if the replica pool could not be created
+pool_read_retry_ts = 0
+REPLICA_RETRY_WAIT = 60
+# workload => (minsize, maxsize), user commands and background jobs use separate pools
+POOL_SIZE = {
+    'interactive': (int(getattr(config.mysql, "pool_minsize", 6)), int(getattr(config.mysql, "pool_maxsize", 12))),
+    'background': (int(getattr(config.mysql, "pool_bg_minsize", 2)), int(getattr(config.mysql, "pool_bg_maxsize", 6)))
+}
 
 #conn = None
 sys.path.append("..")
@@ -105,22 +117,74 @@ async def openConnection():
     global pool
     try:
         if pool is None:
-            pool = await aiomysql.create_pool(host=config.mysql.host, port=3306, minsize=6, maxsize=12, 
-                                                   user=config.mysql.user, password=config.mysql.password,
-                                                   db=config.mysql.db, autocommit=True, cursorclass=DictCursor)
+            pool = await db_pool.create_workload_pool(POOL_SIZE, 'interactive', host=config.mysql.host, port=3306,
+                                                      user=config.mysql.user, password=config.mysql.password,
+                                                      db=config.mysql.db, autocommit=True)
     except:
         print("ERROR: Unexpected error: Could not connect to MySql instance.")
         await logchanbot(traceback.format_exc())
 
 
+# openConnection_read
+async def openConnection_read():
+    global pool_read, pool_read_retry_ts
+    has_replica = getattr(config, "mysql_replica", None) is not None
+    if pool_read is None or (has_replica and pool_read is pool and time.time() > pool_read_retry_ts):
+        await openConnection()
+        if not has_replica:
+            pool_read = pool
+            return
+        try:
+            replica = await db_pool.create_workload_pool(POOL_SIZE, 'interactive', host=config.mysql_replica.host, port=3306,
+                                                         user=config.mysql_replica.user, password=config.mysql_replica.password,
+                                                         db=config.mysql_replica.db, autocommit=True)
+            pool_read = db_pool.FallbackPool(replica, pool) if pool else replica
+        except:
+            # read from the primary meanwhile, try the replica again later
+            pool_read = pool
+            pool_read_retry_ts = time.time() + REPLICA_RETRY_WAIT
+            print("ERROR: Unexpected error: Could not connect to MySql replica instance.")
+            await logchanbot(traceback.format_exc())
+
+
+def sql_pool_metrics():
+    # acquire wait, in use and query latency per pool
+    metrics = {}
+    if pool:
+        metrics['mysql'] = pool.metrics()
+    if pool_read and pool_read is not pool:
+        metrics['mysql_replica'] = pool_read.metrics()
+    if pool_cmc:
+        metrics['mysql_cmc'] = pool_cmc.metrics()
+    metrics['userwallet_cache'] = userwallet_cache_metrics()
+    return metrics
+
+
+# rows per multi-row INSERT for multi-recipient tips
+MV_TX_CHUNK = 1000
+
+
+async def executemany_chunked(conn, cur, sql: str, rows, chunk_size: int=MV_TX_CHUNK):
+    # All chunks in one transaction, either every recipient is credited or none
+    await conn.begin()
+    try:
+        for i in range(0, len(rows), chunk_size):
+            await cur.executemany(sql, rows[i:i+chunk_size])
+        await conn.commit()
+    except Exception as e:
+        await conn.rollback()
+        raise e
+
+
 # openConnection_cmc
 async def openConnection_cmc():
     global pool_cmc
     try:
         if pool_cmc is None:
-            pool_cmc = await aiomysql.create_pool(host=config.mysql_cmc.host, port=3306, minsize=2, maxsize=4, 
-                                                       user=config.mysql_cmc.user, password=config.mysql_cmc.password,
-                                                       db=config.mysql_cmc.db, cursorclass=DictCursor)
+            pool_size = {'cmc': (int(getattr(config.mysql_cmc, "pool_minsize", 2)), int(getattr(config.mysql_cmc, "pool_maxsize", 4)))}
+            pool_cmc = await db_pool.create_workload_pool(pool_size, 'cmc', host=config.mysql_cmc.host, port=3306,
+                                                          user=config.mysql_cmc.user, password=config.mysql_cmc.password,
+                                                          db=config.mysql_cmc.db)
     except:
         print("ERROR: Unexpected error: Could not connect to MySql instance.")
         await logchanbot(traceback.format_exc())
@@ -147,12 +211,12 @@ async def get_all_user_balance_address(coin: str):
         await openConnection()
         async with pool.acquire() as conn:
             async with conn.cursor() as cur:
-                sql = """ SELECT `coin_name`, `balance_wallet_address`, `balance_wallet_address_ch`,`privateSpendKey` FROM `cn_user` WHERE `coin_name` = %s"""
+                sql = """ SELECT `balance_wallet_address`, `balance_wallet_address_ch` FROM `cn_user` WHERE `coin_name` = %s"""
                 await cur.execute(sql, (coin))
                 result = await cur.fetchall()
                 listAddr=[]
                 for row in result:
-                    listAddr.append({'address':row['balance_wallet_address'], 'scanHeight': row['balance_wallet_address_ch'], 'privateSpendKey': decrypt_string(row['privateSpendKey'])})
+                    listAddr.append({'address':row['balance_wallet_address'], 'scanHeight': row['balance_wallet_address_ch']})
                 return listAddr
     except Exception as e:
         await logchanbot(traceback.format_exc())
@@ -163,7 +227,7 @@ async def sql_nano_update_balances(coin: str):
     global pool, redis_conn
     updated = 0
     COIN_NAME = coin.upper()
-    coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","BAN")
+    coin_family = wallet.get_coin_family(COIN_NAME, "BAN")
     get_balance = await wallet.nano_get_wallet_balance_elements(COIN_NAME)
     all_user_info = await sql_nano_get_user_wallets(COIN_NAME)
     all_deposit_address = {}
@@ -209,10 +273,48 @@ async def sql_nano_update_balances(coin: str):
     return updated
 
 
+# Balance reads in flight, (userID, COIN_NAME) => {(name, user_server): future}.
+# Concurrent reads of the same balance share one query set. A write drops the
+# entry with balance_changed, reads after it start a new one.
+balance_inflight = {}
+
+
+async def balance_single_flight(name: str, userID: str, coin: str, user_server: str, compute):
+    key = (str(userID), coin.upper())
+    flight_key = (name, user_server.upper())
+    flights = balance_inflight.setdefault(key, {})
+    future = flights.get(flight_key)
+    if future is None:
+        future = asyncio.ensure_future(compute())
+        flights[flight_key] = future
+        def done(f):
+            flights_now = balance_inflight.get(key)
+            if flights_now and flights_now.get(flight_key) is f:
+                del flights_now[flight_key]
+                if len(flights_now) == 0:
+                    del balance_inflight[key]
+        future.add_done_callback(done)
+    # a cancelled caller does not cancel the query for the others
+    result = await asyncio.shield(future)
+    return dict(result) if isinstance(result, dict) else result
+
+
+def balance_changed(coin: str, userIDs):
+    # after a committed write to the balance of these users
+    COIN_NAME = coin.upper()
+    for userID in userIDs:
+        balance_inflight.pop((str(userID), COIN_NAME), None)
+
+
 async def sql_user_balance_get_xfer_in(userID: str, coin: str, user_server: str = 'DISCORD'):
+    return await balance_single_flight("xfer_in", userID, coin, user_server,
+                                       lambda: _sql_user_balance_get_xfer_in(userID, coin, user_server))
+
+
+async def _sql_user_balance_get_xfer_in(userID: str, coin: str, user_server: str = 'DISCORD'):
     global pool, redis_pool, redis_conn, redis_expired
     COIN_NAME = coin.upper()
-    coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+    coin_family = wallet.get_coin_family(COIN_NAME)
 
     key = config.redis_setting.prefix_xfer_in + userID + ":" + COIN_NAME
     try:
@@ -294,7 +396,7 @@ async def sql_user_get_tipstat(userID: str, coin: str, update: bool=False, user_
     elif COIN_NAME in ENABLE_COIN_TRC:
         coin_family = "TRC-20"
     else:
-        coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+        coin_family = wallet.get_coin_family(COIN_NAME)
     key = f"TIPBOT:TIPSTAT_{COIN_NAME}:" + f"{user_server}_{userID}"
     if update == False:
         try:
@@ -409,6 +511,11 @@ async def sql_user_balance_adjust(userID: str, coin: str, update: bool=False, us
 
 
 async def sql_user_balance(userID: str, coin: str, user_server: str = 'DISCORD'):
+    return await balance_single_flight("balance", userID, coin, user_server,
+                                       lambda: _sql_user_balance(userID, coin, user_server))
+
+
+async def _sql_user_balance(userID: str, coin: str, user_server: str = 'DISCORD'):
     global pool
     user_server = user_server.upper()
     if user_server not in ['DISCORD', 'TELEGRAM', 'REDDIT']:
@@ -425,7 +532,7 @@ async def sql_user_balance(userID: str, coin: str, user_server: str = 'DISCORD')
     elif COIN_NAME in ENABLE_COIN_TRC:
         coin_family = "TRC-20"
     else:
-        coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+        coin_family = wallet.get_coin_family(COIN_NAME)
     try:
         await openConnection()
         async with pool.acquire() as conn:
@@ -1051,7 +1158,7 @@ async def sql_user_balance(userID: str, coin: str, user_server: str = 'DISCORD')
 async def sql_nano_get_user_wallets(coin: str):
     global pool
     COIN_NAME = coin.upper()
-    coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","BAN")
+    coin_family = wallet.get_coin_family(COIN_NAME, "BAN")
     try:
         await openConnection()
         async with pool.acquire() as conn:
@@ -1069,7 +1176,7 @@ async def sql_nano_get_user_wallets(coin: str):
 async def sql_mv_nano_single(user_from: str, to_user: str, amount: float, coin: str, tiptype: str, user_server: str = 'DISCORD'):
     global pool
     COIN_NAME = coin.upper()
-    coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","NANO")
+    coin_family = wallet.get_coin_family(COIN_NAME, "NANO")
     if coin_family != "NANO":
         return False
     user_server = user_server.upper()
@@ -1083,6 +1190,8 @@ async def sql_mv_nano_single(user_from: str, to_user: str, amount: float, coin:
                           VALUES (%s, %s, %s, %s, %s, %s, %s, %s) """
                 await cur.execute(sql, (COIN_NAME, user_from, to_user, amount, wallet.get_decimal(COIN_NAME), tiptype.upper(), int(time.time()), user_server))
                 await conn.commit()
+                balance_changed(COIN_NAME, [user_from, to_user])
+                add_countLastTip(user_from)
                 return True
     except Exception as e:
         await logchanbot(traceback.format_exc())
@@ -1093,24 +1202,22 @@ async def sql_mv_nano_multiple(user_from: str, user_tos, amount_each: float, coi
     # user_tos is array "account1", "account2", ....
     global pool
     COIN_NAME = coin.upper()
-    coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","NANO")
+    coin_family = wallet.get_coin_family(COIN_NAME, "NANO")
     if coin_family != "NANO":
         return False
     if tiptype.upper() not in ["TIPS", "TIPALL", "FREETIP", "FREETIPS", "GUILDTIP"]:
         return False
-    values_str = []
     currentTs = int(time.time())
-    for item in user_tos:
-        values_str.append(f"('{COIN_NAME}', '{user_from}', '{item}', {amount_each}, {wallet.get_decimal(COIN_NAME)}, '{tiptype.upper()}', {currentTs})\n")
-    values_sql = "VALUES " + ",".join(values_str)
+    rows = [(COIN_NAME, user_from, item, amount_each, wallet.get_decimal(COIN_NAME), tiptype.upper(), currentTs) for item in user_tos]
     try:
         await openConnection()
         async with pool.acquire() as conn:
             async with conn.cursor() as cur:
                 sql = """ INSERT INTO nano_mv_tx (`coin_name`, `from_userid`, `to_userid`, `amount`, `decimal`, `type`, `date`) 
-                          """+values_sql+""" """
-                await cur.execute(sql,)
-                await conn.commit()
+                          VALUES (%s, %s, %s, %s, %s, %s, %s) """
+                await executemany_chunked(conn, cur, sql, rows)
+                balance_changed(COIN_NAME, [user_from] + list(user_tos))
+                add_countLastTip(user_from, len(user_tos))
                 return True
     except Exception as e:
         await logchanbot(traceback.format_exc())
@@ -1120,7 +1227,7 @@ async def sql_mv_nano_multiple(user_from: str, user_tos, amount_each: float, coi
 async def sql_external_nano_single(user_from: str, amount: int, to_address: str, coin: str, tiptype: str):
     global pool
     COIN_NAME = coin.upper()
-    coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","NANO")
+    coin_family = wallet.get_coin_family(COIN_NAME, "NANO")
     if coin_family != "NANO":
         return False
     if tiptype.upper() not in ["SEND", "WITHDRAW"]:
@@ -1140,6 +1247,7 @@ async def sql_external_nano_single(user_from: str, amount: int, to_address: str,
                                       VALUES (%s, %s, %s, %s, %s, %s, %s, %s) """
                             await cur.execute(sql, (COIN_NAME, user_from, amount, wallet.get_decimal(COIN_NAME), to_address, tiptype.upper(), int(time.time()), tx_hash['block'],))
                             await conn.commit()
+                            balance_changed(COIN_NAME, [user_from])
                             return tx_hash
     except Exception as e:
         await logchanbot(traceback.format_exc())
@@ -1150,7 +1258,7 @@ async def sql_block_height(coin: str):
     global pool, redis_conn
     updateTime = int(time.time())
     COIN_NAME = coin.upper()
-    coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+    coin_family = wallet.get_coin_family(COIN_NAME)
 
     gettopblock = None
     timeout = 60
@@ -1185,7 +1293,7 @@ async def sql_update_balances(coin: str = None):
     global pool, redis_conn
     updateTime = int(time.time())
     COIN_NAME = coin.upper()
-    coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+    coin_family = wallet.get_coin_family(COIN_NAME)
 
     gettopblock = None
     timeout = 60
@@ -1644,6 +1752,7 @@ async def sql_credit(user_from: str, to_user: str, amount: float, coin: str, rea
                           VALUES (%s, %s, %s, %s, %s, %s, %s) """
                 await cur.execute(sql, (COIN_NAME, user_from, to_user, amount, wallet.get_decimal(COIN_NAME), int(time.time()), reason,))
                 await conn.commit()
+                balance_changed(COIN_NAME, [user_from, to_user])
                 return True
     except Exception as e:
         await logchanbot(traceback.format_exc())
@@ -1664,7 +1773,7 @@ async def sql_register_user(userID, coin: str, user_server: str = 'DISCORD', cha
     elif COIN_NAME in ENABLE_COIN_TRC:
         coin_family = "TRC-20"
     else:
-        coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+        coin_family = wallet.get_coin_family(COIN_NAME)
     try:
         await openConnection()
         async with pool.acquire() as conn:
@@ -1775,6 +1884,7 @@ async def sql_register_user(userID, coin: str, user_server: str = 'DISCORD', cha
                             await cur.execute(sql, (COIN_NAME, token_info['contract'], str(userID), w['base58check_address'], w['hex_address'], int(time.time()), 
                                               token_info['token_decimal'], encrypt_string(w['private_key']), encrypt_string(w['public_key']), user_server))
                             await conn.commit()
+                    await redis_delete_userwallet(str(userID), COIN_NAME, user_server)
                     return balance_address
                 else:
                     return result
@@ -1793,7 +1903,7 @@ async def sql_update_user_chat_id(userID, coin: str, chat_id: int, user_server:
     elif COIN_NAME in ENABLE_COIN_TRC:
         coin_family = "TRC-20"
     else:
-        coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+        coin_family = wallet.get_coin_family(COIN_NAME)
     try:
         await openConnection()
         async with pool.acquire() as conn:
@@ -1822,6 +1932,7 @@ async def sql_update_user_chat_id(userID, coin: str, chat_id: int, user_server:
                     sql = """ UPDATE trx_user SET chat_id=%s WHERE `user_id`=%s AND `token_name` = %s AND `user_server`=%s LIMIT 1 """               
                     await cur.execute(sql, (chat_id, str(userID), COIN_NAME, user_server))
                     await conn.commit()
+                await userwallet_write_through(str(userID), COIN_NAME, user_server, {'chat_id': chat_id})
                 return True
     except Exception as e:
         await logchanbot(traceback.format_exc())
@@ -1841,7 +1952,7 @@ async def sql_update_user(userID, user_wallet_address, coin: str, user_server: s
     elif COIN_NAME in ENABLE_COIN_TRC:
         coin_family = "TRC-20"
     else:
-        coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+        coin_family = wallet.get_coin_family(COIN_NAME)
     try:
         await openConnection()
         async with pool.acquire() as conn:
@@ -1874,27 +1985,148 @@ async def sql_update_user(userID, user_wallet_address, coin: str, user_server: s
                     sql = """ UPDATE trx_user SET user_wallet_address=%s WHERE `user_id`=%s AND `token_name` = %s AND `user_server`=%s LIMIT 1 """               
                     await cur.execute(sql, (user_wallet_address, str(userID), COIN_NAME, user_server))
                     await conn.commit()
+                await userwallet_write_through(str(userID), COIN_NAME, user_server, {'user_wallet_address': user_wallet_address})
                 return user_wallet_address  # return userwallet
     except Exception as e:
         await logchanbot(traceback.format_exc())
     return False
 
 
+# sql_get_userwallet rows are cached in redis with a bounded LRU per process in front.
+# Bump USERWALLET_CACHE_VER when the cached row changes, old keys are then never read.
+# Other processes (shards, worker, Telegram, Reddit) publish the keys they change on
+# USERWALLET_INVALIDATE, without that subscription the LRU is not used.
+USERWALLET_CACHE_VER = 2
+USERWALLET_LRU_SIZE = int(getattr(config.redis_setting, "userwallet_lru_size", 10000))
+USERWALLET_LRU_TTL = int(getattr(config.redis_setting, "userwallet_lru_ttl", 60))
+USERWALLET_INVALIDATE = "TIPBOT:USERWALLET:INVALIDATE"
+# keys and balance scan columns, callers never read them from this row
+USERWALLET_NO_CACHE = ['seed', 'private_key', 'public_key', 'actual_balance', 'called_Update']
+# key => (expire ts, row)
+userwallet_lru = OrderedDict()
+# keys published by other processes, filled by the pubsub thread
+userwallet_dropped = deque()
+userwallet_pubsub = None
+# bumped on each invalidation, a read started before it does not cache its row
+userwallet_gen = 0
+userwallet_stats = {'lru_hit': 0, 'redis_hit': 0, 'miss': 0}
+
+
+def userwallet_key(userID: str, COIN_NAME: str, user_server: str):
+    return "{}v{}:{}_{}:{}".format(config.redis_setting.prefix_get_userwallet, USERWALLET_CACHE_VER, user_server, userID, COIN_NAME)
+
+
+def _userwallet_subscribe():
+    global userwallet_pubsub
+    if userwallet_pubsub is not None:
+        if userwallet_pubsub.is_alive():
+            return True
+        # invalidations may have been missed while it was down
+        userwallet_pubsub = None
+        userwallet_lru.clear()
+    try:
+        openRedis()
+        if redis_conn is None:
+            return False
+        pubsub = redis_conn.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{USERWALLET_INVALIDATE: lambda message: userwallet_dropped.append(message['data'])})
+        userwallet_pubsub = pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+        return True
+    except Exception as e:
+        traceback.print_exc(file=sys.stdout)
+    return False
+
+
+def _userwallet_lru_put(key: str, wallet_res):
+    if USERWALLET_LRU_SIZE <= 0 or not _userwallet_subscribe():
+        return
+    userwallet_lru[key] = (time.time() + USERWALLET_LRU_TTL, dict(wallet_res))
+    userwallet_lru.move_to_end(key)
+    while len(userwallet_lru) > USERWALLET_LRU_SIZE:
+        userwallet_lru.popitem(last=False)
+
+
+def userwallet_cache_get(key: str):
+    # returns a copy, callers may change the row
+    while len(userwallet_dropped) > 0:
+        userwallet_lru.pop(userwallet_dropped.popleft(), None)
+    cached = userwallet_lru.get(key)
+    if cached and cached[0] > time.time() and _userwallet_subscribe():
+        userwallet_lru.move_to_end(key)
+        userwallet_stats['lru_hit'] += 1
+        return dict(cached[1])
+    try:
+        openRedis()
+        if redis_conn:
+            data = redis_conn.get(key)
+            if data:
+                wallet_res = json.loads(data)
+                userwallet_stats['redis_hit'] += 1
+                _userwallet_lru_put(key, wallet_res)
+                return wallet_res
+    except Exception as e:
+        traceback.print_exc(file=sys.stdout)
+    userwallet_stats['miss'] += 1
+    return None
+
+
+def userwallet_cache_set(key: str, wallet_res, gen: int):
+    if gen != userwallet_gen:
+        return
+    openRedis()
+    if redis_conn:
+        redis_conn.set(key, json.dumps(wallet_res), ex=config.redis_setting.get_userwallet_time)
+    _userwallet_lru_put(key, wallet_res)
+
+
+def userwallet_cache_metrics():
+    lookups = sum(userwallet_stats.values())
+    hits = userwallet_stats['lru_hit'] + userwallet_stats['redis_hit']
+    return dict(userwallet_stats, lru_size=len(userwallet_lru),
+                hit_ratio=round(hits / lookups, 4) if lookups > 0 else None)
+
+
 async def redis_delete_userwallet(userID: str, coin: str, user_server: str = 'DISCORD'):
-    global redis_conn, redis_pool
+    global redis_conn, userwallet_gen
     COIN_NAME = coin.upper()
     user_server = user_server.upper()
     if user_server not in ['DISCORD', 'TELEGRAM', 'REDDIT']:
         return
-    key = config.redis_setting.prefix_get_userwallet + user_server + "_" + userID + ":" + COIN_NAME
+    key = userwallet_key(str(userID), COIN_NAME, user_server)
+    userwallet_gen += 1
+    userwallet_lru.pop(key, None)
     try:
-        if redis_conn is None: redis_conn = redis.Redis(connection_pool=redis_pool)
-        if redis_conn and redis_conn.exists(key): redis_conn.delete(key)
+        openRedis()
+        if redis_conn:
+            redis_conn.delete(key)
+            redis_conn.publish(USERWALLET_INVALIDATE, key)
     except Exception as e:
         await logchanbot(traceback.format_exc())
     return True
 
 
+async def userwallet_write_through(userID: str, coin: str, user_server: str, changes):
+    # after an UPDATE of a wallet row: other processes drop their copy, the cached
+    # row gets the new values
+    global redis_conn
+    key = userwallet_key(str(userID), coin.upper(), user_server.upper())
+    data = None
+    try:
+        openRedis()
+        if redis_conn:
+            data = redis_conn.get(key)
+    except Exception as e:
+        traceback.print_exc(file=sys.stdout)
+    await redis_delete_userwallet(userID, coin, user_server)
+    if data:
+        wallet_res = json.loads(data)
+        wallet_res.update(changes)
+        try:
+            userwallet_cache_set(key, wallet_res, userwallet_gen)
+        except Exception as e:
+            await logchanbot(traceback.format_exc())
+
+
 async def coin_check_balance_address_in_users(address: str, coin: str):
     global pool
     COIN_NAME = coin.upper()
@@ -1905,7 +2137,7 @@ async def coin_check_balance_address_in_users(address: str, coin: str):
         coin_family = "TRC-20"
         return await trx_check_balance_address_in_users(address, COIN_NAME)
     else:
-        coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+        coin_family = wallet.get_coin_family(COIN_NAME)
     if coin_family in ["TRTL", "BCN"]:
         tb_name = "cnoff_user_paymentid"
         field_name = "int_address"
@@ -1948,18 +2180,14 @@ async def sql_get_userwallet(userID: str, coin: str, user_server: str = 'DISCORD
     elif COIN_NAME in ENABLE_COIN_TRC:
         coin_family = "TRC-20"
     else:
-        coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+        coin_family = wallet.get_coin_family(COIN_NAME)
 
-    key = config.redis_setting.prefix_get_userwallet + user_server + "_" + userID + ":" + COIN_NAME
-    try:
-        if redis_conn is None: redis_conn = redis.Redis(connection_pool=redis_pool)
-        if redis_conn and redis_conn.exists(key):
-            pass
-            #return json.loads(redis_conn.get(key))
-    except Exception as e:
-        await logchanbot(traceback.format_exc())
+    key = userwallet_key(str(userID), COIN_NAME, user_server)
+    wallet_res = userwallet_cache_get(key)
+    if wallet_res:
+        return wallet_res
 
-    wallet_res = None
+    gen = userwallet_gen
     try:
         await openConnection()
         async with pool.acquire() as conn:
@@ -2012,12 +2240,11 @@ async def sql_get_userwallet(userID: str, coin: str, user_server: str = 'DISCORD
                         userwallet['lastUpdate'] = result['paymentid_ts']
                     else:
                         userwallet['lastUpdate'] = 0
+                    for each in USERWALLET_NO_CACHE:
+                        userwallet.pop(each, None)
                     wallet_res = userwallet
-                    # store in redis
                     try:
-                        openRedis()
-                        if redis_conn:
-                            redis_conn.set(key, json.dumps(wallet_res), ex=config.redis_setting.get_userwallet_time)
+                        userwallet_cache_set(key, wallet_res, gen)
                     except Exception as e:
                         await logchanbot(traceback.format_exc())
     except Exception as e:
@@ -2025,8 +2252,183 @@ async def sql_get_userwallet(userID: str, coin: str, user_server: str = 'DISCORD
     return wallet_res
 
 
+def _userwallet_table(COIN_NAME: str):
+    # coin_family, table, coin column, deposit address column
+    if COIN_NAME in ENABLE_COIN_ERC:
+        return "ERC-20", "erc_user", "token_name", "balance_wallet_address"
+    elif COIN_NAME in ENABLE_COIN_TRC:
+        return "TRC-20", "trx_user", "token_name", "balance_wallet_address"
+    coin_family = wallet.get_coin_family(COIN_NAME)
+    if coin_family in ["TRTL", "BCN"]:
+        return coin_family, "cnoff_user_paymentid", "coin_name", "int_address"
+    elif coin_family == "XMR":
+        return coin_family, "xmroff_user_paymentid", "coin_name", "int_address"
+    elif coin_family == "XCH":
+        return coin_family, "xch_user", "coin_name", "balance_wallet_address"
+    elif coin_family == "DOGE":
+        return coin_family, "doge_user", "coin_name", "balance_wallet_address"
+    elif coin_family == "NANO":
+        return coin_family, "nano_user", "coin_name", "balance_wallet_address"
+    return coin_family, None, None, None
+
+
+async def sql_get_userwallet_multiple(userIDs, coin: str, user_server: str = 'DISCORD', chunk_size: int=MV_TX_CHUNK):
+    # user_id => deposit address of users who already have a wallet, one IN (...) query per chunk
+    global pool
+    COIN_NAME = coin.upper()
+    user_server = user_server.upper()
+    if user_server not in ['DISCORD', 'TELEGRAM', 'REDDIT']:
+        return None
+    coin_family, tb_name, coin_field, address_field = _userwallet_table(COIN_NAME)
+    if tb_name is None:
+        return None
+    userIDs = [str(each) for each in userIDs]
+    wallets = {}
+    try:
+        await openConnection()
+        async with pool.acquire() as conn:
+            async with conn.cursor() as cur:
+                for i in range(0, len(userIDs), chunk_size):
+                    chunk = userIDs[i:i+chunk_size]
+                    sql = """ SELECT `user_id`, `"""+address_field+"""` AS balance_wallet_address FROM `"""+tb_name+"""` 
+                              WHERE `"""+coin_field+"""`=%s AND `user_server`=%s AND `user_id` IN ("""+",".join(["%s"]*len(chunk))+""") """
+                    await cur.execute(sql, tuple([COIN_NAME, user_server] + chunk))
+                    result = await cur.fetchall()
+                    for each in result:
+                        wallets[each['user_id']] = each['balance_wallet_address']
+        return wallets
+    except Exception as e:
+        await logchanbot(traceback.format_exc())
+    return None
+
+
+async def sql_register_user_multiple(userIDs, coin: str, user_server: str = 'DISCORD'):
+    # For users known to have no wallet yet. TRTL/BCN/XMR addresses are integrated addresses of
+    # the main address so all rows go in one multi-row insert, other coins register one by one.
+    global pool
+    COIN_NAME = coin.upper()
+    user_server = user_server.upper()
+    if user_server not in ['DISCORD', 'REDDIT']:
+        return False
+    coin_family, tb_name, coin_field, address_field = _userwallet_table(COIN_NAME)
+    if coin_family in ["ERC-20", "TRC-20"]:
+        # need a created key pair each
+        return False
+    if coin_family not in ["TRTL", "BCN", "XMR"]:
+        for userID in userIDs:
+            await sql_register_user(str(userID), COIN_NAME, user_server, 0)
+        return True
+    main_address = getattr(getattr(config,"daemon"+COIN_NAME),"MainAddress")
+    currentTs = int(time.time())
+    rows = []
+    for userID in userIDs:
+        if coin_family == "XMR":
+            balance_address = await wallet.make_integrated_address_xmr(main_address, COIN_NAME)
+        else:
+            balance_address = {}
+            balance_address['payment_id'] = addressvalidation.paymentid()
+            balance_address['integrated_address'] = addressvalidation.make_integrated_cn(main_address, COIN_NAME, balance_address['payment_id'])['integrated_address']
+        if balance_address is None:
+            print('Internal error during call register wallet-api')
+            return False
+        rows.append((COIN_NAME, str(userID), main_address, balance_address['payment_id'], 
+                     balance_address['integrated_address'], currentTs, user_server))
+    try:
+        await openConnection()
+        async with pool.acquire() as conn:
+            async with conn.cursor() as cur:
+                sql = """ INSERT INTO `"""+tb_name+"""` (`coin_name`, `user_id`, `main_address`, `paymentid`, 
+                          `int_address`, `paymentid_ts`, `user_server`) 
+                          VALUES (%s, %s, %s, %s, %s, %s, %s) """
+                await executemany_chunked(conn, cur, sql, rows)
+                # no invalidation, these users had no row and a miss is not cached
+                return True
+    except Exception as e:
+        await logchanbot(traceback.format_exc())
+    return False
+
+
+# In-memory sliding window of recent tips for flood/cooldown checks.
+# userID => deque of [timestamp, number of rows] since the user was seeded
+# from database. Keeps only last config.floodTipDuration seconds.
+TIP_COUNTER_WINDOW = int(config.floodTipDuration)
+tip_counter = {}
+
+
+def _prune_countLastTip(userID: str, lastDuration: int):
+    currentTs = int(time.time())
+    timestamps = tip_counter[userID]
+    while len(timestamps) > 0 and timestamps[0][0] <= currentTs - TIP_COUNTER_WINDOW:
+        timestamps.popleft()
+    if len(timestamps) == 0:
+        # nothing left in the window, user is seeded again from database on next check
+        del tip_counter[userID]
+        return 0
+    lapDuration = currentTs - lastDuration
+    return sum([each[1] for each in timestamps if each[0] > lapDuration])
+
+
+def add_countLastTip(userID, numb: int=1):
+    # Called after a successful tip insert. Users not yet seeded will be loaded from database on next check.
+    # No await in here, so this is atomic within the event loop.
+    userID = str(userID)
+    if userID not in tip_counter:
+        return
+    currentTs = int(time.time())
+    timestamps = tip_counter[userID]
+    if len(timestamps) > 0 and timestamps[-1][0] == currentTs:
+        timestamps[-1][1] += numb
+    else:
+        timestamps.append([currentTs, numb])
+
+
+async def sql_seed_countLastTip(userID):
+    global pool
+    lapDuration = int(time.time()) - TIP_COUNTER_WINDOW
+    try:
+        await openConnection()
+        async with pool.acquire() as conn:
+            async with conn.cursor() as cur:
+                sql = """ SELECT `date`, COUNT(*) AS numb FROM cn_tip WHERE `from_user` = %s AND `date`>%s GROUP BY `date`
+                          UNION ALL
+                          SELECT `date`, COUNT(*) AS numb FROM cn_tipall WHERE `from_user` = %s AND `date`>%s GROUP BY `date`
+                          UNION ALL
+                          SELECT `date`, COUNT(*) AS numb FROM cn_send WHERE `from_user` = %s AND `date`>%s GROUP BY `date`
+                          UNION ALL
+                          SELECT `date`, COUNT(*) AS numb FROM cn_withdraw WHERE `user_id` = %s AND `date`>%s GROUP BY `date`
+                          UNION ALL
+                          SELECT `date`, COUNT(*) AS numb FROM cn_donate WHERE `from_user` = %s AND `date`>%s GROUP BY `date`
+                          UNION ALL
+                          SELECT `date`, COUNT(*) AS numb FROM cnoff_mv_tx WHERE `from_userid` = %s AND `date`>%s GROUP BY `date`
+                          UNION ALL
+                          SELECT `date`, COUNT(*) AS numb FROM doge_mv_tx WHERE `from_userid` = %s AND `date`>%s GROUP BY `date`
+                          UNION ALL
+                          SELECT `date`, COUNT(*) AS numb FROM erc_mv_tx WHERE `from_userid` = %s AND `date`>%s GROUP BY `date`
+                          UNION ALL
+                          SELECT `date`, COUNT(*) AS numb FROM xmroff_mv_tx WHERE `from_userid` = %s AND `date`>%s GROUP BY `date`
+                          UNION ALL
+                          SELECT `date`, COUNT(*) AS numb FROM nano_mv_tx WHERE `from_userid` = %s AND `date`>%s GROUP BY `date` """
+                await cur.execute(sql, (str(userID), lapDuration) * 10)
+                result = await cur.fetchall()
+                timestamps = {}
+                if result and len(result) > 0:
+                    for each in result:
+                        timestamps[int(each['date'])] = timestamps.get(int(each['date']), 0) + int(each['numb'])
+                # Another command may have seeded it while we were waiting
+                if str(userID) not in tip_counter:
+                    tip_counter[str(userID)] = deque([[k, timestamps[k]] for k in sorted(timestamps)])
+                return True
+    except Exception as e:
+        await logchanbot(traceback.format_exc())
+    return False
+
+
 async def sql_get_countLastTip(userID, lastDuration: int):
     global pool
+    # Flood check window is served from memory
+    if lastDuration <= TIP_COUNTER_WINDOW:
+        if str(userID) in tip_counter or await sql_seed_countLastTip(userID):
+            return _prune_countLastTip(str(userID), lastDuration)
     lapDuration = int(time.time()) - lastDuration
     count = 0
     try:
@@ -2089,7 +2491,7 @@ async def sql_mv_cn_single(user_from: str, user_to: str, amount: int, tiptype: s
     if user_server not in ['DISCORD', 'TELEGRAM', 'REDDIT']:
         return
     COIN_NAME = coin.upper()
-    coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+    coin_family = wallet.get_coin_family(COIN_NAME)
     user_from_wallet = None
     user_to_wallet = None
     if coin_family in ["TRTL", "BCN", "XMR"]:
@@ -2106,6 +2508,8 @@ async def sql_mv_cn_single(user_from: str, user_to: str, amount: int, tiptype: s
                                   VALUES (%s, %s, %s, %s, %s, %s, %s, %s) """
                         await cur.execute(sql, (COIN_NAME, user_from, user_to, amount, wallet.get_decimal(COIN_NAME), tiptype.upper(), int(time.time()), user_server,))
                         await conn.commit()
+                        balance_changed(COIN_NAME, [user_from, user_to])
+                        add_countLastTip(user_from)
                         return {'transactionHash': 'NONE', 'fee': 0}
             except Exception as e:
                 traceback.print_exc(file=sys.stdout)
@@ -2116,7 +2520,7 @@ async def sql_mv_cn_single(user_from: str, user_to: str, amount: int, tiptype: s
 async def sql_mv_cn_multiple(user_from: str, amount_div: int, user_ids, tiptype: str, coin: str, user_server: str = 'DISCORD'):
     global pool
     COIN_NAME = coin.upper()
-    coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+    coin_family = wallet.get_coin_family(COIN_NAME)
 
     if tiptype.upper() not in ["TIPS", "TIPALL", "FREETIP", "FREETIPS", "GUILDTIP"]:
         return None
@@ -2127,19 +2531,17 @@ async def sql_mv_cn_multiple(user_from: str, amount_div: int, user_ids, tiptype:
     if user_from_wallet['balance_wallet_address']:
         if coin_family in ["TRTL", "BCN"]:
             # Move offchain
-            values_str = []
             currentTs = int(time.time())
-            for item in user_ids:
-                values_str.append(f"('{COIN_NAME}', '{user_from}', '{item}', {amount_div}, {wallet.get_decimal(COIN_NAME)}, '{tiptype.upper()}', {currentTs})\n")
-            values_sql = "VALUES " + ",".join(values_str)
+            rows = [(COIN_NAME, user_from, item, amount_div, wallet.get_decimal(COIN_NAME), tiptype.upper(), currentTs) for item in user_ids]
             try:
                 await openConnection()
                 async with pool.acquire() as conn:
                     async with conn.cursor() as cur:
                         sql = """ INSERT INTO cnoff_mv_tx (`coin_name`, `from_userid`, `to_userid`, `amount`, `decimal`, `type`, `date`) 
-                                  """+values_sql+""" """
-                        await cur.execute(sql,)
-                        await conn.commit()
+                                  VALUES (%s, %s, %s, %s, %s, %s, %s) """
+                        await executemany_chunked(conn, cur, sql, rows)
+                        balance_changed(COIN_NAME, [user_from] + list(user_ids))
+                        add_countLastTip(user_from, len(user_ids))
                         return {'transactionHash': 'NONE', 'fee': 0}
             except Exception as e:
                 await logchanbot(traceback.format_exc())
@@ -2153,7 +2555,7 @@ async def sql_external_cn_single(user_from: str, address_to: str, amount: int, c
     user_server = user_server.upper()
     if user_server not in ['DISCORD', 'TELEGRAM', 'REDDIT']:
         return
-    coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+    coin_family = wallet.get_coin_family(COIN_NAME)
     user_from_wallet = None
 
     tx_hash = None
@@ -2183,6 +2585,7 @@ async def sql_external_cn_single(user_from: str, address_to: str, amount: int, c
                         await cur.execute(sql, (COIN_NAME, user_from, address_to, amount, wallet.get_decimal(COIN_NAME), updateTime, 
                                                 tx_hash['transactionHash'], fee, user_server))
                         await conn.commit()
+                        balance_changed(COIN_NAME, [user_from])
                     if coin_family == "XMR":
                         async with conn.cursor() as cur: 
                             sql = """ INSERT INTO xmroff_external_tx (`coin_name`, `user_id`, `amount`, `fee`, `decimal`, `to_address`, 
@@ -2191,6 +2594,7 @@ async def sql_external_cn_single(user_from: str, address_to: str, amount: int, c
                             await cur.execute(sql, (COIN_NAME, user_from, amount, fee, wallet.get_decimal(COIN_NAME), 
                                                     address_to, tiptype.upper(), int(time.time()), tx_hash['tx_hash'], tx_hash['tx_key'], user_server))
                             await conn.commit()
+                            balance_changed(COIN_NAME, [user_from])
                             tx_hash['transactionHash'] = tx_hash['tx_hash']
                             return tx_hash
         except Exception as e:
@@ -2202,7 +2606,7 @@ async def sql_external_cn_single(user_from: str, address_to: str, amount: int, c
 async def sql_external_cn_single_id(user_from: str, address_to: str, amount: int, paymentid, coin: str, user_server: str = 'DISCORD'):
     global pool
     COIN_NAME = coin.upper()
-    coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+    coin_family = wallet.get_coin_family(COIN_NAME)
 
     tx_hash = None
     if coin_family in ["TRTL", "BCN"]:
@@ -2229,6 +2633,7 @@ async def sql_external_cn_single_id(user_from: str, address_to: str, amount: int
                         await cur.execute(sql, (COIN_NAME, user_from, address_to, amount, wallet.get_decimal(COIN_NAME), 
                                                 timestamp, tx_hash['transactionHash'], paymentid, fee, user_server))
                         await conn.commit()
+                        balance_changed(COIN_NAME, [user_from])
         except Exception as e:
             await logchanbot(traceback.format_exc())
         return tx_hash
@@ -2239,7 +2644,7 @@ async def sql_donate(user_from: str, address_to: str, amount: int, coin: str, us
     global pool
     user_server = user_server.upper()
     COIN_NAME = coin.upper()
-    coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+    coin_family = wallet.get_coin_family(COIN_NAME)
 
     user_from_wallet = await sql_get_userwallet(user_from, COIN_NAME, user_server)
     if all(v is not None for v in [user_from_wallet['balance_wallet_address'], address_to]):
@@ -2254,6 +2659,8 @@ async def sql_donate(user_from: str, address_to: str, amount: int, coin: str, us
                         await cur.execute(sql, (COIN_NAME, user_from, wallet.get_donate_address(COIN_NAME), amount, 
                                                 wallet.get_decimal(COIN_NAME), 'DONATE', int(time.time()), user_server))
                         await conn.commit()
+                        balance_changed(COIN_NAME, [user_from])
+                        add_countLastTip(user_from)
                         return {'transactionHash': 'NONE', 'fee': 0}
             except Exception as e:
                 await logchanbot(traceback.format_exc())
@@ -2262,11 +2669,11 @@ async def sql_donate(user_from: str, address_to: str, amount: int, coin: str, us
 
 
 async def sql_get_donate_list():
-    global pool
+    global pool_read
     donate_list = {}
     try:
-        await openConnection()
-        async with pool.acquire() as conn:
+        await openConnection_read()
+        async with pool_read.acquire() as conn:
             async with conn.cursor() as cur:
                 # TRTL fam
                 for coin in ENABLE_COIN:
@@ -2336,6 +2743,7 @@ async def sql_send_to_voucher(user_id: str, user_name: str, message_creating: st
                 await cur.execute(sql, (COIN_NAME, user_id, user_name, message_creating, amount, wallet.get_decimal(COIN_NAME), reserved_fee, 
                                         int(time.time()), comment, secret_string, voucher_image_name, user_server))
                 await conn.commit()
+                balance_changed(COIN_NAME, [user_id])
                 return True
     except Exception as e:
         await logchanbot(traceback.format_exc())
@@ -2478,10 +2886,10 @@ async def sql_faucet_count_user(userID: str, user_server: str = 'DISCORD'):
 
 
 async def sql_faucet_count_all():
-    global pool
+    global pool_read
     try:
-        await openConnection()
-        async with pool.acquire() as conn:
+        await openConnection_read()
+        async with pool_read.acquire() as conn:
             async with conn.cursor() as cur:
                 sql = """ SELECT COUNT(*) FROM discord_faucet """
                 await cur.execute(sql,)
@@ -2494,10 +2902,10 @@ async def sql_faucet_count_all():
 
 async def sql_faucet_sum_count_claimed(coin: str):
     COIN_NAME = coin.upper()
-    global pool
+    global pool_read
     try:
-        await openConnection()
-        async with pool.acquire() as conn:
+        await openConnection_read()
+        async with pool_read.acquire() as conn:
             async with conn.cursor() as cur:
                 sql = """ SELECT SUM(claimed_amount) as claimed, COUNT(claimed_amount) as count FROM discord_faucet
                           WHERE `coin_name`=%s """
@@ -2552,6 +2960,7 @@ played_server: str, game_type: str, duration: int=0, user_server: str = 'DISCORD
                 await cur.execute(sql, (played_user, coin_name, win_lose, won_amount, decimal, played_server, 
                                         int(time.time()), game_type, user_server, game_result, duration))
                 await conn.commit()
+                balance_changed(coin_name, [played_user])
                 return True
     except Exception as e:
         await logchanbot(traceback.format_exc())
@@ -2579,12 +2988,12 @@ async def sql_game_free_add(game_result: str, played_user: str, win_lose: str, p
 
 
 async def sql_game_stat():
-    global pool
+    global pool_read
     stat = {}
     GAME_COIN = config.game.coin_game.split(",")
     try:
-        await openConnection()
-        async with pool.acquire() as conn:
+        await openConnection_read()
+        async with pool_read.acquire() as conn:
             async with conn.cursor() as cur:
                 sql = """ SELECT * FROM discord_game """
                 await cur.execute(sql,)
@@ -2612,10 +3021,10 @@ async def sql_game_stat():
 
 
 async def sql_count_tx_all():
-    global pool
+    global pool_read
     try:
-        await openConnection()
-        async with pool.acquire() as conn:
+        await openConnection_read()
+        async with pool_read.acquire() as conn:
             async with conn.cursor() as cur:
                 sql = """ SELECT COUNT(*) FROM cnoff_external_tx """
                 await cur.execute(sql,)
@@ -2912,11 +3321,11 @@ async def sql_add_messages(list_messages):
 
 
 async def sql_get_messages(server_id: str, channel_id: str, time_int: int, num_user: int=None):
-    global pool
+    global pool_read
     lapDuration = int(time.time()) - time_int
     try:
-        await openConnection()
-        async with pool.acquire() as conn:
+        await openConnection_read()
+        async with pool_read.acquire() as conn:
             async with conn.cursor() as cur:
                 list_talker = []
                 if num_user is None:
@@ -2961,19 +3370,40 @@ async def sql_changeinfo_by_server(server_id: str, what: str, value: str):
             await logchanbot(traceback.format_exc())
 
 
-async def sql_updatestat_by_server(server_id: str, numb_user: int, numb_bot: int, numb_channel: int, numb_online: int, servername: str):
+async def sql_updatestat_by_server_list(list_stats):
+    # list_stats = [(server_id, servername, numb_user, numb_bot, numb_channel, numb_online), ...]
+    # One UPDATE ... JOIN per chunk of changed guilds, guilds without a row are added by sql_addinfo_by_server
     global pool
+    if len(list_stats) == 0:
+        return 0
     try:
         await openConnection()
         async with pool.acquire() as conn:
             async with conn.cursor() as cur:
-                sql = """ UPDATE discord_server SET `numb_user` = %s, 
-                          `numb_bot`= %s, `numb_channel` = %s, `numb_online` = %s, 
-                         `lastUpdate` = %s, `servername` = %s WHERE `serverid` = %s """
-                await cur.execute(sql, (numb_user, numb_bot, numb_channel, numb_online, int(time.time()), server_id, conn.escape(servername)))
-                await conn.commit()
+                updateTime = int(time.time())
+                await conn.begin()
+                try:
+                    for i in range(0, len(list_stats), MV_TX_CHUNK):
+                        chunk = list_stats[i:i+MV_TX_CHUNK]
+                        rows = " UNION ALL ".join(["SELECT %s AS `serverid`, %s AS `servername`, %s AS `numb_user`, "
+                                                   "%s AS `numb_bot`, %s AS `numb_channel`, %s AS `numb_online`"] * len(chunk))
+                        sql = """ UPDATE discord_server d JOIN (""" + rows + """) s ON d.`serverid` = s.`serverid` 
+                                  SET d.`numb_user` = s.`numb_user`, d.`numb_bot` = s.`numb_bot`, 
+                                  d.`numb_channel` = s.`numb_channel`, d.`numb_online` = s.`numb_online`, 
+                                  d.`lastUpdate` = %s, d.`servername` = s.`servername` """
+                        args = []
+                        for each in chunk:
+                            # servername is a short ascii column, one bad name would fail the whole batch
+                            args += [str(each[0]), each[1].encode("ascii", "ignore").decode()[:28], each[2], each[3], each[4], each[5]]
+                        await cur.execute(sql, tuple(args + [updateTime]))
+                    await conn.commit()
+                except Exception as e:
+                    await conn.rollback()
+                    raise e
+                return len(list_stats)
     except Exception as e:
         await logchanbot(traceback.format_exc())
+    return 0
 
 
 async def sql_discord_userinfo_get(user_id: str, user_server: str='DISCORD'):
@@ -3306,28 +3736,40 @@ async def sql_add_failed_tx(coin: str, user_id: str, user_author: str, amount: i
     return False
 
 
+# user_id who turned off tip DM, loaded once then kept in sync by sql_toggle_tipnotify.
+# Reloaded now and then for changes made by the other bot processes.
+tipnotify_off = None
+tipnotify_loaded = 0
+TIPNOTIFY_RELOAD = 600
+
+
 async def sql_get_tipnotify():
-    global pool
+    # Returns a set, only for membership checks
+    global pool, tipnotify_off, tipnotify_loaded
+    if tipnotify_off is not None and int(time.time()) - tipnotify_loaded < TIPNOTIFY_RELOAD:
+        return tipnotify_off
     try:
         await openConnection()
         async with pool.acquire() as conn:
             async with conn.cursor() as cur:
-                sql = """ SELECT `user_id`, `date` FROM bot_tipnotify_user """
+                sql = """ SELECT `user_id` FROM bot_tipnotify_user """
                 await cur.execute(sql,)
                 result = await cur.fetchall()
-                ignorelist = []
-                for row in result:
-                    ignorelist.append(row['user_id'])
-                return ignorelist
+                tipnotify_off = set([row['user_id'] for row in result])
+                tipnotify_loaded = int(time.time())
+                return tipnotify_off
     except Exception as e:
         await logchanbot(traceback.format_exc())
+    return tipnotify_off if tipnotify_off is not None else set()
 
 
 async def sql_toggle_tipnotify(user_id: str, onoff: str):
     # Bot will add user_id if it failed to DM
     global pool
     onoff = onoff.upper()
+    user_id = str(user_id)
     if onoff == "OFF":
+        # no shortcut on the cached set, another process may have turned it ON
         try:
             await openConnection()
             async with pool.acquire() as conn:
@@ -3340,6 +3782,8 @@ async def sql_toggle_tipnotify(user_id: str, onoff: str):
                                   VALUES (%s, %s) """    
                         await cur.execute(sql, (user_id, int(time.time())))
                         await conn.commit()
+                    if tipnotify_off is not None:
+                        tipnotify_off.add(user_id)
         except pymysql.err.Warning as e:
             await logchanbot(traceback.format_exc())
         except Exception as e:
@@ -3350,8 +3794,10 @@ async def sql_toggle_tipnotify(user_id: str, onoff: str):
             async with pool.acquire() as conn:
                 async with conn.cursor() as cur:
                     sql = """ DELETE FROM `bot_tipnotify_user` WHERE `user_id` = %s """
-                    await cur.execute(sql, str(user_id))
+                    await cur.execute(sql, user_id)
                     await conn.commit()
+                    if tipnotify_off is not None:
+                        tipnotify_off.discard(user_id)
         except Exception as e:
             await logchanbot(traceback.format_exc())
 
@@ -3396,6 +3842,8 @@ async def sql_mv_doge_single(user_from: str, to_user: str, amount: float, coin:
                           VALUES (%s, %s, %s, %s, %s, %s, %s) """
                 await cur.execute(sql, (COIN_NAME, user_from, to_user, amount, tiptype.upper(), int(time.time()), user_server))
                 await conn.commit()
+                balance_changed(COIN_NAME, [user_from, to_user])
+                add_countLastTip(user_from)
                 return True
     except Exception as e:
         await logchanbot(traceback.format_exc())
@@ -3410,19 +3858,17 @@ async def sql_mv_doge_multiple(user_from: str, user_tos, amount_each: float, coi
         return False
     if tiptype.upper() not in ["TIPS", "TIPALL", "FREETIP", "FREETIPS", "GUILDTIP"]:
         return False
-    values_str = []
     currentTs = int(time.time())
-    for item in user_tos:
-        values_str.append(f"('{COIN_NAME}', '{user_from}', '{item}', {amount_each}, '{tiptype.upper()}', {currentTs})\n")
-    values_sql = "VALUES " + ",".join(values_str)
+    rows = [(COIN_NAME, user_from, item, amount_each, tiptype.upper(), currentTs) for item in user_tos]
     try:
         await openConnection()
         async with pool.acquire() as conn:
             async with conn.cursor() as cur:
                 sql = """ INSERT INTO doge_mv_tx (`coin_name`, `from_userid`, `to_userid`, `amount`, `type`, `date`) 
-                          """+values_sql+""" """
-                await cur.execute(sql,)
-                await conn.commit()
+                          VALUES (%s, %s, %s, %s, %s, %s) """
+                await executemany_chunked(conn, cur, sql, rows)
+                balance_changed(COIN_NAME, [user_from] + list(user_tos))
+                add_countLastTip(user_from, len(user_tos))
                 return True
     except Exception as e:
         await logchanbot(traceback.format_exc())
@@ -3449,6 +3895,7 @@ async def sql_external_doge_single(user_from: str, amount: float, fee: float, to
                           VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s) """
                 await cur.execute(sql, (COIN_NAME, user_from, amount, fee, to_address, tiptype.upper(), int(time.time()), txHash, user_server))
                 await conn.commit()
+                balance_changed(COIN_NAME, [user_from])
                 return txHash
     except Exception as e:
         await logchanbot(traceback.format_exc())
@@ -3459,7 +3906,7 @@ async def sql_external_doge_single(user_from: str, amount: float, fee: float, to
 async def sql_mv_xmr_single(user_from: str, to_user: str, amount: float, coin: str, tiptype: str, user_server: str = 'DISCORD'):
     global pool
     COIN_NAME = coin.upper()
-    coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+    coin_family = wallet.get_coin_family(COIN_NAME)
     if coin_family != "XMR":
         return False
     user_server = user_server.upper()
@@ -3473,6 +3920,8 @@ async def sql_mv_xmr_single(user_from: str, to_user: str, amount: float, coin: s
                           VALUES (%s, %s, %s, %s, %s, %s, %s, %s) """
                 await cur.execute(sql, (COIN_NAME, user_from, to_user, amount, wallet.get_decimal(COIN_NAME), tiptype.upper(), int(time.time()), user_server))
                 await conn.commit()
+                balance_changed(COIN_NAME, [user_from, to_user])
+                add_countLastTip(user_from)
                 return True
     except Exception as e:
         await logchanbot(traceback.format_exc())
@@ -3483,24 +3932,22 @@ async def sql_mv_xmr_multiple(user_from: str, user_tos, amount_each: float, coin
     # user_tos is array "account1", "account2", ....
     global pool
     COIN_NAME = coin.upper()
-    coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+    coin_family = wallet.get_coin_family(COIN_NAME)
     if coin_family != "XMR":
         return False
     if tiptype.upper() not in ["TIPS", "TIPALL", "FREETIP", "FREETIPS", "GUILDTIP"]:
         return False
-    values_str = []
     currentTs = int(time.time())
-    for item in user_tos:
-        values_str.append(f"('{COIN_NAME}', '{user_from}', '{item}', {amount_each}, {wallet.get_decimal(COIN_NAME)}, '{tiptype.upper()}', {currentTs})\n")
-    values_sql = "VALUES " + ",".join(values_str)
+    rows = [(COIN_NAME, user_from, item, amount_each, wallet.get_decimal(COIN_NAME), tiptype.upper(), currentTs) for item in user_tos]
     try:
         await openConnection()
         async with pool.acquire() as conn:
             async with conn.cursor() as cur:
                 sql = """ INSERT INTO xmroff_mv_tx (`coin_name`, `from_userid`, `to_userid`, `amount`, `decimal`, `type`, `date`) 
-                          """+values_sql+""" """
-                await cur.execute(sql,)
-                await conn.commit()
+                          VALUES (%s, %s, %s, %s, %s, %s, %s) """
+                await executemany_chunked(conn, cur, sql, rows)
+                balance_changed(COIN_NAME, [user_from] + list(user_tos))
+                add_countLastTip(user_from, len(user_tos))
                 return True
     except Exception as e:
         await logchanbot(traceback.format_exc())
@@ -3510,7 +3957,7 @@ async def sql_mv_xmr_multiple(user_from: str, user_tos, amount_each: float, coin
 async def sql_external_xmr_single(user_from: str, amount: float, to_address: str, coin: str, tiptype: str, fee: float):
     global pool
     COIN_NAME = coin.upper()
-    coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+    coin_family = wallet.get_coin_family(COIN_NAME)
     if coin_family != "XMR":
         return False
     if tiptype.upper() not in ["SEND", "WITHDRAW"]:
@@ -3530,6 +3977,7 @@ async def sql_external_xmr_single(user_from: str, amount: float, to_address: str
                                       VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s) """
                             await cur.execute(sql, (COIN_NAME, user_from, amount, fee, wallet.get_decimal(COIN_NAME), to_address, tiptype.upper(), int(time.time()), tx_hash['tx_hash'], tx_hash['tx_key'],))
                             await conn.commit()
+                            balance_changed(COIN_NAME, [user_from])
                             return tx_hash
     except Exception as e:
         await logchanbot(traceback.format_exc())
@@ -3558,7 +4006,7 @@ async def sql_get_userwallet_by_paymentid(paymentid: str, coin: str, user_server
     elif COIN_NAME in ENABLE_COIN_TRC:
         coin_family = "TRC-20"
     else:
-        coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+        coin_family = wallet.get_coin_family(COIN_NAME)
     try:
         await openConnection()
         async with pool.acquire() as conn:
@@ -3602,7 +4050,7 @@ async def sql_get_userwallet_by_paymentid(paymentid: str, coin: str, user_server
 async def sql_mv_xch_single(user_from: str, to_user: str, amount: float, coin: str, tiptype: str, user_server: str = 'DISCORD'):
     global pool
     COIN_NAME = coin.upper()
-    coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+    coin_family = wallet.get_coin_family(COIN_NAME)
     if coin_family != "XCH":
         return False
     user_server = user_server.upper()
@@ -3616,6 +4064,7 @@ async def sql_mv_xch_single(user_from: str, to_user: str, amount: float, coin: s
                           VALUES (%s, %s, %s, %s, %s, %s, %s, %s) """
                 await cur.execute(sql, (COIN_NAME, user_from, to_user, amount, wallet.get_decimal(COIN_NAME), tiptype.upper(), int(time.time()), user_server))
                 await conn.commit()
+                balance_changed(COIN_NAME, [user_from, to_user])
                 return True
     except Exception as e:
         await logchanbot(traceback.format_exc())
@@ -3626,24 +4075,21 @@ async def sql_mv_xch_multiple(user_from: str, user_tos, amount_each: float, coin
     # user_tos is array "account1", "account2", ....
     global pool
     COIN_NAME = coin.upper()
-    coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+    coin_family = wallet.get_coin_family(COIN_NAME)
     if coin_family != "XCH":
         return False
     if tiptype.upper() not in ["TIPS", "TIPALL", "FREETIP", "FREETIPS", "GUILDTIP"]:
         return False
-    values_str = []
     currentTs = int(time.time())
-    for item in user_tos:
-        values_str.append(f"('{COIN_NAME}', '{user_from}', '{item}', {amount_each}, {wallet.get_decimal(COIN_NAME)}, '{tiptype.upper()}', {currentTs})\n")
-    values_sql = "VALUES " + ",".join(values_str)
+    rows = [(COIN_NAME, user_from, item, amount_each, wallet.get_decimal(COIN_NAME), tiptype.upper(), currentTs) for item in user_tos]
     try:
         await openConnection()
         async with pool.acquire() as conn:
             async with conn.cursor() as cur:
                 sql = """ INSERT INTO xch_mv_tx (`coin_name`, `from_userid`, `to_userid`, `amount`, `decimal`, `type`, `date`) 
-                          """+values_sql+""" """
-                await cur.execute(sql,)
-                await conn.commit()
+                          VALUES (%s, %s, %s, %s, %s, %s, %s) """
+                await executemany_chunked(conn, cur, sql, rows)
+                balance_changed(COIN_NAME, [user_from] + list(user_tos))
                 return True
     except Exception as e:
         await logchanbot(traceback.format_exc())
@@ -3653,7 +4099,7 @@ async def sql_mv_xch_multiple(user_from: str, user_tos, amount_each: float, coin
 async def sql_external_xch_single(user_from: str, amount: float, to_address: str, coin: str, tiptype: str, user_server: str='DISCORD'):
     global pool
     COIN_NAME = coin.upper()
-    coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+    coin_family = wallet.get_coin_family(COIN_NAME)
     if coin_family != "XCH":
         return False
     if tiptype.upper() not in ["SEND", "WITHDRAW"]:
@@ -3672,6 +4118,7 @@ async def sql_external_xch_single(user_from: str, amount: float, to_address: str
                                   VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s) """
                         await cur.execute(sql, (COIN_NAME, user_from, amount, tx_hash['tx_hash']['fee_amount'], wallet.get_decimal(COIN_NAME), to_address, tiptype.upper(), int(time.time()), tx_hash['tx_hash']['name'], user_server,))
                         await conn.commit()
+                        balance_changed(COIN_NAME, [user_from])
                         return tx_hash
     except Exception as e:
         await logchanbot(traceback.format_exc())
@@ -3781,10 +4228,10 @@ async def sql_get_feedback_count_last(userID, lastDuration: int):
 
 
 async def sql_feedback_by_ref(ref: str):
-    global pool
+    global pool_read
     try:
-        await openConnection()
-        async with pool.acquire() as conn:
+        await openConnection_read()
+        async with pool_read.acquire() as conn:
             async with conn.cursor() as cur:
                 sql = """ SELECT * FROM discord_feedback WHERE `feedback_id`=%s """
                 await cur.execute(sql, (ref,))
@@ -3796,10 +4243,10 @@ async def sql_feedback_by_ref(ref: str):
 
 
 async def sql_feedback_list_by_user(userid: str, last: int):
-    global pool
+    global pool_read
     try:
-        await openConnection()
-        async with pool.acquire() as conn:
+        await openConnection_read()
+        async with pool_read.acquire() as conn:
             async with conn.cursor() as cur:
                 sql = """ SELECT * FROM discord_feedback WHERE `user_id`=%s 
                           ORDER BY `feedback_date` DESC LIMIT """+str(last)
@@ -4038,10 +4485,10 @@ async def sql_add_trans_tts(user_id: str, user_name: str, original: str, transla
 
 
 async def sql_game_get_level_tpl(level: int, game_name: str):
-    global pool
+    global pool_read
     try:
-        await openConnection()
-        async with pool.acquire() as conn:
+        await openConnection_read()
+        async with pool_read.acquire() as conn:
             async with conn.cursor() as cur:
                 sql = """ SELECT * FROM discord_game_level_tpl WHERE `level`=%s 
                           AND `game_name`=%s LIMIT 1 """
@@ -4273,10 +4720,10 @@ async def sql_help_doc_del(section: str, what: str):
 
 
 async def sql_help_doc_get(section: str, what: str):
-    global pool
+    global pool_read
     try:
-        await openConnection()
-        async with pool.acquire() as conn:
+        await openConnection_read()
+        async with pool_read.acquire() as conn:
             async with conn.cursor() as cur:
                 if section.upper() == 'ANY':
                     sql = """ SELECT * FROM discord_help_docs WHERE `what`=%s LIMIT 1 """
@@ -4294,10 +4741,10 @@ async def sql_help_doc_get(section: str, what: str):
 
 
 async def sql_help_doc_list(section: str='HELP', getall:bool=False):
-    global pool
+    global pool_read
     try:
-        await openConnection()
-        async with pool.acquire() as conn:
+        await openConnection_read()
+        async with pool_read.acquire() as conn:
             async with conn.cursor() as cur:
                 if getall == False:
                     sql = """ SELECT * FROM discord_help_docs WHERE `section` = %s """
@@ -4315,10 +4762,10 @@ async def sql_help_doc_list(section: str='HELP', getall:bool=False):
 
 
 async def sql_help_doc_search(term: str, max_result: int=10):
-    global pool
+    global pool_read
     try:
-        await openConnection()
-        async with pool.acquire() as conn:
+        await openConnection_read()
+        async with pool_read.acquire() as conn:
             async with conn.cursor() as cur:
                 sql = """ SELECT *, MATCH(detail, example) AGAINST(%s IN BOOLEAN MODE) AS `score` 
                           FROM discord_help_docs WHERE MATCH(detail, example) AGAINST(%s IN BOOLEAN MODE) 
@@ -4428,6 +4875,7 @@ async def sql_store_openorder(msg_id: str, msg_content: str, coin_sell: str, rea
                                   real_amount_get, amount_get_after_fee, sell_div_get, float("%.3f" % time.time()), coin_sell + "-" + coin_get, 
                                   'OPEN', sell_user_server))
                 await conn.commit()
+                balance_changed(coin_sell, [userid_sell])
                 return cur.lastrowid
     except Exception as e:
         await logchanbot(traceback.format_exc())
@@ -4436,13 +4884,13 @@ async def sql_store_openorder(msg_id: str, msg_content: str, coin_sell: str, rea
 
 
 async def sql_get_open_order_by_alluser_by_coins(coin1: str, coin2: str, status: str, option_order: str, limit: int=50):
-    global pool
+    global pool_read
     option_order = option_order.upper()
     if option_order not in ["DESC", "ASC"]:
         return False
     try:
-        await openConnection()
-        async with pool.acquire() as conn:
+        await openConnection_read()
+        async with pool_read.acquire() as conn:
             async with conn.cursor() as cur:
                 if coin2.upper() == "ALL":
                     sql = """ SELECT * FROM open_order WHERE `status`=%s AND `coin_sell`=%s 
@@ -4463,10 +4911,10 @@ async def sql_get_open_order_by_alluser_by_coins(coin1: str, coin2: str, status:
 
 
 async def sql_get_coin_trade_stat(coin: str):
-    global pool
+    global pool_read
     try:
-        await openConnection()
-        async with pool.acquire() as conn:
+        await openConnection_read()
+        async with pool_read.acquire() as conn:
             async with conn.cursor() as cur:
                 sql = """ SELECT (SELECT SUM(amount_sell) FROM open_order 
                           WHERE coin_sell=%s AND status='COMPLETE' AND order_completed_date > UNIX_TIMESTAMP()-3600*24) AS sell_24h, 
@@ -4538,6 +4986,12 @@ async def sql_match_order_by_sellerid(userid_get: str, ref_numb: str, buy_user_s
                               WHERE `order_id`=%s AND `status`=%s """
                     await cur.execute(sql, ('COMPLETE', float("%.3f" % time.time()), userid_get, buy_user_server, ref_numb, 'OPEN'))
                     await conn.commit()
+                    sql = """ SELECT `coin_sell`, `coin_get` FROM `open_order` WHERE `order_id`=%s LIMIT 1 """
+                    await cur.execute(sql, (ref_numb,))
+                    order = await cur.fetchone()
+                    if order:
+                        balance_changed(order['coin_sell'], [userid_sell, userid_get])
+                        balance_changed(order['coin_get'], [userid_sell, userid_get])
                     # Insert into open_order_notify_complete table
                     try:
                         if notified:
@@ -4562,14 +5016,14 @@ async def sql_match_order_by_sellerid(userid_get: str, ref_numb: str, buy_user_s
 
 
 async def sql_get_open_order_by_alluser(coin: str, status: str, need_to_buy: bool, limit: int=50):
-    global pool
+    global pool_read
     COIN_NAME = coin.upper()
     limit_str = ""
     if limit > 0:
         limit_str = "LIMIT "+str(limit)
     try:
-        await openConnection()
-        async with pool.acquire() as conn:
+        await openConnection_read()
+        async with pool_read.acquire() as conn:
             async with conn.cursor() as cur:
                 if need_to_buy: 
                     sql = """ SELECT * FROM `open_order` WHERE `status`=%s AND `coin_get`=%s ORDER BY sell_div_get ASC """+limit_str
@@ -4589,11 +5043,11 @@ async def sql_get_open_order_by_alluser(coin: str, status: str, need_to_buy: boo
 
 ## use by NetPublicAPI
 async def sql_get_markets_by_coin(coin: str, status: str):
-    global pool
+    global pool_read
     COIN_NAME = coin.upper()
     try:
-        await openConnection()
-        async with pool.acquire() as conn:
+        await openConnection_read()
+        async with pool_read.acquire() as conn:
             async with conn.cursor() as cur:
             # select distinct coin_sell, coin_get from open_order where status='OPEN' and coin_sell='GNTL' or coin_get='GNTL'
                 sql = """ SELECT DISTINCT `coin_sell`, `coin_get` FROM `open_order` WHERE `status`=%s AND (`coin_sell`=%s OR `coin_get`=%s) """
@@ -4667,16 +5121,22 @@ async def sql_cancel_open_order_by_sellerid(userid_sell: str, coin: str = 'ALL')
             async with conn.cursor() as cur:
                 if len(coin) < 6:
                     if COIN_NAME == 'ALL':
+                        sql = """ SELECT DISTINCT `coin_sell` FROM open_order WHERE `userid_sell`=%s AND `status`=%s """
+                        await cur.execute(sql, (userid_sell, 'OPEN'))
+                        result = await cur.fetchall()
                         sql = """ UPDATE open_order SET `status`=%s, `cancel_date`=%s WHERE `userid_sell`=%s 
                                   AND `status`=%s """
                         await cur.execute(sql, ('CANCEL', float("%.3f" % time.time()), userid_sell, 'OPEN'))
                         await conn.commit()
+                        for each in result:
+                            balance_changed(each['coin_sell'], [userid_sell])
                         return True
                     else:
                         sql = """ UPDATE open_order SET `status`=%s, `cancel_date`=%s WHERE `userid_sell`=%s 
                                   AND `status`=%s AND `coin_sell`=%s """
                         await cur.execute(sql, ('CANCEL', float("%.3f" % time.time()), userid_sell, 'OPEN', COIN_NAME))
                         await conn.commit()
+                        balance_changed(COIN_NAME, [userid_sell])
                         return True
                 else:
                     try:
@@ -4685,6 +5145,11 @@ async def sql_cancel_open_order_by_sellerid(userid_sell: str, coin: str = 'ALL')
                                   AND `status`=%s AND `order_id`=%s """
                         await cur.execute(sql, ('CANCEL', float("%.3f" % time.time()), userid_sell, 'OPEN', ref_numb))
                         await conn.commit()
+                        sql = """ SELECT `coin_sell` FROM open_order WHERE `order_id`=%s LIMIT 1 """
+                        await cur.execute(sql, (ref_numb,))
+                        order = await cur.fetchone()
+                        if order:
+                            balance_changed(order['coin_sell'], [userid_sell])
                         return True
                     except ValueError:
                         return False
@@ -4715,11 +5180,11 @@ async def sql_get_open_order_by_sellerid(userid_sell: str, coin: str, status: st
 
 ## TradeView
 async def sql_get_tradeview_available(market: str, pair1: str, pair2: str, enable:str='ENABLE'):
-    global pool
+    global pool_read
     enable = enable.upper()
     try:
-        await openConnection()
-        async with pool.acquire() as conn:
+        await openConnection_read()
+        async with pool_read.acquire() as conn:
             async with conn.cursor() as cur:
                 sql = """ SELECT * FROM `market_chart_pair` WHERE UPPER(`market_name`)=UPPER(%s) AND UPPER(`pair1`) = UPPER(%s) 
                           AND UPPER(`pair2`)=UPPER(%s) AND `enable_disable`=%s LIMIT 1 """
@@ -4733,11 +5198,11 @@ async def sql_get_tradeview_available(market: str, pair1: str, pair2: str, enabl
 
 
 async def sql_get_tradeview_market_setting(market: str, enable:str='ENABLE'):
-    global pool
+    global pool_read
     enable = enable.upper()
     try:
-        await openConnection()
-        async with pool.acquire() as conn:
+        await openConnection_read()
+        async with pool_read.acquire() as conn:
             async with conn.cursor() as cur:
                 sql = """ SELECT * FROM `market_chart_setting` WHERE UPPER(`market_name`)=UPPER(%s)
                           AND `enable_disable`=%s LIMIT 1 """
@@ -4946,6 +5411,8 @@ async def sql_mv_erc_single(user_from: str, to_user: str, amount: float, coin: s
                           VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s) """
                 await cur.execute(sql, (TOKEN_NAME, contract, user_from, to_user, amount, token_info['token_decimal'], tiptype.upper(), int(time.time()), user_server))
                 await conn.commit()
+                balance_changed(TOKEN_NAME, [user_from, to_user])
+                add_countLastTip(user_from)
                 return True
     except Exception as e:
         traceback.print_exc(file=sys.stdout)
@@ -4962,20 +5429,18 @@ async def sql_mv_erc_multiple(user_from: str, user_tos, amount_each: float, coin
     TOKEN_NAME = coin.upper()
     if tiptype.upper() not in ["TIPS", "TIPALL", "FREETIP", "FREETIPS"]:
         return False
-    values_str = []
     currentTs = int(time.time())
-    for item in user_tos:
-        values_str.append(f"('{TOKEN_NAME}', '{contract}', '{user_from}', '{item}', {amount_each}, {token_decimal}, '{tiptype.upper()}', {currentTs})\n")
-    values_sql = "VALUES " + ",".join(values_str)
+    rows = [(TOKEN_NAME, contract, user_from, item, amount_each, token_decimal, tiptype.upper(), currentTs) for item in user_tos]
     try:
         await openConnection()
         async with pool.acquire() as conn:
             await conn.ping(reconnect=True)
             async with conn.cursor() as cur:
                 sql = """ INSERT INTO erc_mv_tx (`token_name`, `contract`, `from_userid`, `to_userid`, `real_amount`, `token_decimal`, `type`, `date`) 
-                          """+values_sql+""" """
-                await cur.execute(sql,)
-                await conn.commit()
+                          VALUES (%s, %s, %s, %s, %s, %s, %s, %s) """
+                await executemany_chunked(conn, cur, sql, rows)
+                balance_changed(TOKEN_NAME, [user_from] + list(user_tos))
+                add_countLastTip(user_from, len(user_tos))
                 return True
     except Exception as e:
         traceback.print_exc(file=sys.stdout)
@@ -5057,6 +5522,7 @@ async def sql_external_erc_single(user_id: str, to_address: str, amount: float,
                         await cur.execute(sql, (TOKEN_NAME, token_info['contract'], user_id, amount, token_info['real_withdraw_fee'], token_info['token_decimal'], 
                                                 to_address, int(time.time()), sent_tx.hex(), tiptype.upper(), user_server))
                         await conn.commit()
+                        balance_changed(TOKEN_NAME, [user_id])
                         return sent_tx.hex()
             except Exception as e:
                 traceback.print_exc(file=sys.stdout)
@@ -5817,6 +6283,7 @@ async def sql_external_trx_single(user_id: str, to_address: str, amount: float,
                             await cur.execute(sql, (TOKEN_NAME, token_info['contract'], user_id, amount, token_info['real_withdraw_fee'], token_info['token_decimal'], 
                                                     to_address, int(time.time()), txn_ret['txid'], tiptype.upper(), user_server))
                             await conn.commit()
+                            balance_changed(TOKEN_NAME, [user_id])
                             return txn_ret['txid']
                 except Exception as e:
                     traceback.print_exc(file=sys.stdout)
@@ -5852,6 +6319,7 @@ async def sql_external_trx_single(user_id: str, to_address: str, amount: float,
                                     await cur.execute(sql, (TOKEN_NAME, token_info['contract'], user_id, amount, token_info['real_withdraw_fee'], token_info['token_decimal'], 
                                                             to_address, int(time.time()), txn_ret['txid'], tiptype.upper(), user_server))
                                     await conn.commit()
+                                    balance_changed(TOKEN_NAME, [user_id])
                                     return txn_ret['txid']
                         except Exception as e:
                             traceback.print_exc(file=sys.stdout)
@@ -5890,6 +6358,7 @@ async def sql_external_trx_single(user_id: str, to_address: str, amount: float,
                                     await cur.execute(sql, (TOKEN_NAME, str(token_info['contract']), user_id, amount, token_info['real_withdraw_fee'], token_info['token_decimal'], 
                                                             to_address, int(time.time()), txn_ret['txid'], tiptype.upper(), user_server))
                                     await conn.commit()
+                                    balance_changed(TOKEN_NAME, [user_id])
                                     return txn_ret['txid']
                         except Exception as e:
                             traceback.print_exc(file=sys.stdout)
@@ -6094,6 +6563,7 @@ async def sql_mv_trx_single(user_from: str, to_user: str, amount: float, coin: s
                           VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s) """
                 await cur.execute(sql, (TOKEN_NAME, contract, user_from, to_user, amount, token_info['token_decimal'], tiptype.upper(), int(time.time()), user_server))
                 await conn.commit()
+                balance_changed(TOKEN_NAME, [user_from, to_user])
                 return True
     except Exception as e:
         traceback.print_exc(file=sys.stdout)
@@ -6110,20 +6580,17 @@ async def sql_mv_trx_multiple(user_from: str, user_tos, amount_each: float, coin
     TOKEN_NAME = coin.upper()
     if tiptype.upper() not in ["TIPS", "TIPALL", "FREETIP", "FREETIPS"]:
         return False
-    values_str = []
     currentTs = int(time.time())
-    for item in user_tos:
-        values_str.append(f"('{TOKEN_NAME}', '{contract}', '{user_from}', '{item}', {amount_each}, {token_decimal}, '{tiptype.upper()}', {currentTs})\n")
-    values_sql = "VALUES " + ",".join(values_str)
+    rows = [(TOKEN_NAME, contract, user_from, item, amount_each, token_decimal, tiptype.upper(), currentTs) for item in user_tos]
     try:
         await openConnection()
         async with pool.acquire() as conn:
             await conn.ping(reconnect=True)
             async with conn.cursor() as cur:
                 sql = """ INSERT INTO trx_mv_tx (`token_name`, `contract`, `from_userid`, `to_userid`, `real_amount`, `token_decimal`, `type`, `date`) 
-                          """+values_sql+""" """
-                await cur.execute(sql,)
-                await conn.commit()
+                          VALUES (%s, %s, %s, %s, %s, %s, %s, %s) """
+                await executemany_chunked(conn, cur, sql, rows)
+                balance_changed(TOKEN_NAME, [user_from] + list(user_tos))
                 return True
     except Exception as e:
         traceback.print_exc(file=sys.stdout)
@@ -6245,6 +6712,7 @@ to_userid: str, to_username: str, to_server: str, amount: float, decimal_pts: in
                 await cur.execute(sql, (COIN_NAME, from_userid, from_username, from_server, to_userid, to_username,
                                         to_server, amount, decimal_pts, int(time.time())))
                 await conn.commit()	
+                balance_changed(COIN_NAME, [from_userid, to_userid])
                 return True	
     except Exception as e:	
         await logchanbot(traceback.format_exc())	
@@ -6323,6 +6791,8 @@ to_real_amount: float, to_decimal: int, user_id: str, user_name: str, user_serve
                 await cur.execute(sql, (from_coin_name.upper(), from_real_amount, from_decimal, to_coin_name.upper(), to_real_amount, 
                                         to_decimal, user_id, user_name, int(time.time()), user_server))
                 await conn.commit()	
+                balance_changed(from_coin_name, [user_id])
+                balance_changed(to_coin_name, [user_id])
                 return True	
     except Exception as e:	
         await logchanbot(traceback.format_exc())	
@@ -6484,14 +6954,16 @@ user_name: str, user_server: str='DISCORD'):
                 await cur.execute(sql, (raffle_id, guild_id, amount, decimal, COIN_NAME, user_id,
                                         user_name, int(time.time()), user_server,))
                 await conn.commit()	
+                balance_changed(COIN_NAME, [user_id])
                 return True	
     except Exception as e:	
         await logchanbot(traceback.format_exc())	
     return False
 
-async def raffle_update_id(raffle_id: int, status: str, list_winner=None, list_amounts=None):
+async def raffle_update_id(raffle_id: int, status: str, list_winner=None, list_amounts=None, coin: str=None):
     # list_winner = 3
     # list_amounts = 4
+    # coin: coin_name of the raffle, to drop balance reads of the winners
     try:
         await openConnection()	
         async with pool.acquire() as conn:	
@@ -6503,37 +6975,60 @@ async def raffle_update_id(raffle_id: int, status: str, list_winner=None, list_a
                     return True
                 else:
                     if status.upper() == "COMPLETED" and list_winner and list_amounts:
-                        sql = """ UPDATE guild_raffle SET `status`=%s, `winner_userid_1st`=%s,
-                                  `winner_1st_amount`=%s, `winner_userid_2nd`=%s,
-                                  `winner_2nd_amount`=%s, `winner_userid_3rd`=%s,
-                                  `winner_3rd_amount`=%s, `raffle_fund_pot`=%s WHERE `id`=%s """
-                        await cur.execute(sql, (status.upper(), list_winner[0], list_amounts[0], 
-                                                list_winner[1], list_amounts[1], list_winner[2],
-                                                list_amounts[2], list_amounts[3], raffle_id))
-                        await conn.commit()	
-                        # Update # guild_raffle_entries
-                        sql = """ UPDATE guild_raffle_entries SET `status`=%s, `won_amount`=%s WHERE `raffle_id`=%s 
-                                  AND `user_id`=%s """
-                        await cur.executemany(sql, [('WINNER', list_amounts[0], raffle_id, list_winner[0]),
-                                                    ('WINNER', list_amounts[1], raffle_id, list_winner[1]),
-                                                    ('WINNER', list_amounts[2], raffle_id, list_winner[2])])
-                        await conn.commit()	
+                        # Raffle status and winner entries in one transaction
+                        await conn.begin()
+                        try:
+                            sql = """ UPDATE guild_raffle SET `status`=%s, `winner_userid_1st`=%s,
+                                      `winner_1st_amount`=%s, `winner_userid_2nd`=%s,
+                                      `winner_2nd_amount`=%s, `winner_userid_3rd`=%s,
+                                      `winner_3rd_amount`=%s, `raffle_fund_pot`=%s WHERE `id`=%s AND `status`=%s """
+                            await cur.execute(sql, (status.upper(), list_winner[0], list_amounts[0], 
+                                                    list_winner[1], list_amounts[1], list_winner[2],
+                                                    list_amounts[2], list_amounts[3], raffle_id, 'ONGOING'))
+                            if cur.rowcount == 0:
+                                # Already completed or cancelled
+                                await conn.rollback()
+                                return False
+                            # Update # guild_raffle_entries
+                            sql = """ UPDATE guild_raffle_entries SET `status`=%s, `won_amount`=%s WHERE `raffle_id`=%s 
+                                      AND `user_id`=%s """
+                            await cur.executemany(sql, [('WINNER', list_amounts[i], raffle_id, list_winner[i]) for i in range(len(list_winner))])
+                            await conn.commit()
+                            if coin:
+                                balance_changed(coin, list_winner)
+                        except Exception as e:
+                            await conn.rollback()
+                            raise e
                         return True	
     except Exception as e:	
         await logchanbot(traceback.format_exc())	
     return False
 
-async def raffle_cancel_id(raffle_id: int):
+async def raffle_cancel_id(raffle_id: int, coin: str=None):
     try:	
         await openConnection()	
         async with pool.acquire() as conn:	
             async with conn.cursor() as cur:
-                sql = """ UPDATE guild_raffle SET `status`=%s WHERE `id`=%s AND `status` IN ('ONGOING', 'OPENED') LIMIT 1 """	
-                await cur.execute(sql, ('CANCELLED', raffle_id))
-                await conn.commit()	
-                sql = """ UPDATE guild_raffle_entries SET `status`=%s WHERE `raffle_id`=%s """	
-                await cur.execute(sql, ('CANCELLED', raffle_id))
-                await conn.commit()	
+                sql = """ SELECT `user_id` FROM guild_raffle_entries WHERE `raffle_id`=%s """
+                await cur.execute(sql, (raffle_id,))
+                entries = await cur.fetchall()
+                await conn.begin()
+                try:
+                    sql = """ UPDATE guild_raffle SET `status`=%s WHERE `id`=%s AND `status` IN ('ONGOING', 'OPENED') LIMIT 1 """	
+                    await cur.execute(sql, ('CANCELLED', raffle_id))
+                    if cur.rowcount == 0:
+                        # Already completed or cancelled
+                        await conn.rollback()
+                        return False
+                    sql = """ UPDATE guild_raffle_entries SET `status`=%s WHERE `raffle_id`=%s """	
+                    await cur.execute(sql, ('CANCELLED', raffle_id))
+                    await conn.commit()
+                except Exception as e:
+                    await conn.rollback()
+                    raise e
+                if coin:
+                    # entry fees are refunded
+                    balance_changed(coin, [each['user_id'] for each in entries])
                 return True	
     except Exception as e:	
         await logchanbot(traceback.format_exc())	
@@ -6639,10 +7134,10 @@ async def economy_get_user_activities_duration(user_id: str, duration: int=3600)
 
 
 async def economy_get_guild_worklist(guild_id: str, get_all: bool=True):
-    global pool
+    global pool_read
     try:
-        await openConnection()
-        async with pool.acquire() as conn:
+        await openConnection_read()
+        async with pool_read.acquire() as conn:
             async with conn.cursor() as cur:
                 if get_all:
                     sql = """ SELECT * FROM discord_economy_work_reward WHERE `status`=%s ORDER BY `work_id` ASC """
@@ -6685,6 +7180,7 @@ async def economy_insert_activity(user_id: str, guild_id: str, work_id: int, dur
                           VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s) """
                 await cur.execute(sql, (user_id, guild_id, work_id, int(time.time()), duration_in_second, reward_coin_name, reward_amount, fee_amount, reward_decimal, exp, health, energy))
                 await conn.commit()
+                balance_changed(reward_coin_name, [user_id])
                 return True
     except Exception as e:
         await logchanbot(traceback.format_exc())
@@ -6712,10 +7208,10 @@ async def economy_update_activity(act_id: int, user_id: str, exp: int, health: f
 
 
 async def economy_get_guild_foodlist(guild_id: str, get_all: bool=True):
-    global pool
+    global pool_read
     try:
-        await openConnection()
-        async with pool.acquire() as conn:
+        await openConnection_read()
+        async with pool_read.acquire() as conn:
             async with conn.cursor() as cur:
                 if get_all:
                     sql = """ SELECT * FROM discord_economy_food ORDER BY `food_id` ASC """
@@ -6746,6 +7242,7 @@ async def economy_insert_eating(user_id: str, guild_id: str, cost_coin_name: str
                 sql = """ UPDATE discord_economy_userinfo SET `energy_current`=`energy_current`+%s WHERE `user_id`=%s """
                 await cur.execute(sql, (gained_energy, user_id,))
                 await conn.commit()
+                balance_changed(cost_coin_name, [user_id])
                 return True
     except Exception as e:
         await logchanbot(traceback.format_exc())
@@ -6797,10 +7294,10 @@ async def economy_get_user_eating_list_record(user_id: str, duration: int=3600):
     return None
 
 async def economy_get_list_secret_items():
-    global pool
+    global pool_read
     try:
-        await openConnection()
-        async with pool.acquire() as conn:
+        await openConnection_read()
+        async with pool_read.acquire() as conn:
             async with conn.cursor() as cur:
                 sql = """ SELECT * FROM discord_economy_secret_items WHERE `usable`=%s """
                 await cur.execute(sql, ('YES'))
@@ -6929,10 +7426,10 @@ async def economy_shop_get_item(item_name: str):
     return None
 
 async def economy_shop_get_item_list():
-    global pool
+    global pool_read
     try:
-        await openConnection()
-        async with pool.acquire() as conn:
+        await openConnection_read()
+        async with pool_read.acquire() as conn:
             async with conn.cursor() as cur:
                 sql = """ SELECT * FROM discord_economy_shopbot ORDER BY `credit_cost` DESC """
                 await cur.execute(sql,)
@@ -7005,10 +7502,10 @@ async def discord_economy_userinfo_what(guild_id: str, user_id: str, item_id: in
 
 
 async def economy_get_list_fish_items():
-    global pool
+    global pool_read
     try:
-        await openConnection()
-        async with pool.acquire() as conn:
+        await openConnection_read()
+        async with pool_read.acquire() as conn:
             async with conn.cursor() as cur:
                 sql = """ SELECT * FROM discord_economy_fish_items """
                 await cur.execute(sql,)
@@ -7171,10 +7668,10 @@ async def economy_get_timber_user(user_id: str, sold_timber: str='NO', sold_leaf
 
 
 async def economy_farm_get_list_plants():
-    global pool
+    global pool_read
     try:
-        await openConnection()
-        async with pool.acquire() as conn:
+        await openConnection_read()
+        async with pool_read.acquire() as conn:
             async with conn.cursor() as cur:
                 sql = """ SELECT * FROM discord_economy_farm_plantlist """
                 await cur.execute(sql,)
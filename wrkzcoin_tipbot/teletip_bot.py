@@ -33,6 +33,11 @@ from terminaltables import AsciiTable
 from aiogram.types import InlineQuery, \
     InputTextMessageContent, InlineQueryResultArticle
 
+# webhook mode
+import asyncio
+import hmac
+from aiohttp import web
+
 logging.basicConfig(format=u'%(filename)s [ LINE:%(lineno)+3s ]#%(levelname)+8s [%(asctime)s]  %(message)s',
                     level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -79,6 +84,22 @@ logging.basicConfig(level=logging.INFO)
 bot = Bot(token=API_TOKEN)
 dp = Dispatcher(bot)
 
+# Optional webhook mode instead of long polling
+WEBHOOK_ENABLE = getattr(config.telegram, "webhook_enable", 0) == 1
+WEBHOOK_URL = getattr(config.telegram, "webhook_url", None) # public https url telegram posts to
+WEBHOOK_PATH = getattr(config.telegram, "webhook_path", "/teletip_webhook")
+# telegram sends it back in X-Telegram-Bot-Api-Secret-Token, a new one each start if not set
+WEBHOOK_SECRET = getattr(config.telegram, "webhook_secret", None) or uuid.uuid4().hex
+WEBAPP_HOST = getattr(config.telegram, "webapp_host", "127.0.0.1")
+WEBAPP_PORT = int(getattr(config.telegram, "webapp_port", 3001))
+# updates processed at the same time, and queued before telegram is asked to retry
+WEBHOOK_CONCURRENT = int(getattr(config.telegram, "webhook_concurrent", 16))
+WEBHOOK_MAX_PENDING = int(getattr(config.telegram, "webhook_max_pending", 2000))
+# chat_id => [lock, number of updates queued or running]
+WEBHOOK_CHAT_LOCKS = {}
+WEBHOOK_PENDING = 0
+WEBHOOK_LIMIT = None
+
 
 def init():
     global redis_pool
@@ -2159,8 +2180,86 @@ def seconds_str(time: float):
     return "{:02d}:{:02d}:{:02d}".format(hour, minutes, seconds)
 
 
+def webhook_update_chat(update_json):
+    # Updates of one chat are handled in the order they came
+    for key in ['message', 'edited_message', 'channel_post', 'edited_channel_post']:
+        if key in update_json:
+            return update_json[key]['chat']['id']
+    if 'callback_query' in update_json and 'message' in update_json['callback_query']:
+        return update_json['callback_query']['message']['chat']['id']
+    for key in ['inline_query', 'chosen_inline_result', 'callback_query']:
+        if key in update_json:
+            return update_json[key]['from']['id']
+    return None
+
+
+async def webhook_process_update(chat_id, update):
+    global WEBHOOK_PENDING
+    chat_lock = WEBHOOK_CHAT_LOCKS[chat_id]
+    try:
+        # lock waiters are woken in order, then wait for a free slot
+        async with chat_lock[0]:
+            async with WEBHOOK_LIMIT:
+                Bot.set_current(bot)
+                Dispatcher.set_current(dp)
+                await dp.process_update(update)
+    except Exception as e:
+        traceback.print_exc(file=sys.stdout)
+    finally:
+        WEBHOOK_PENDING -= 1
+        chat_lock[1] -= 1
+        if chat_lock[1] == 0:
+            del WEBHOOK_CHAT_LOCKS[chat_id]
+
+
+async def webhook_handler(request):
+    global WEBHOOK_PENDING
+    if not hmac.compare_digest(request.headers.get("X-Telegram-Bot-Api-Secret-Token", ""), WEBHOOK_SECRET):
+        return web.Response(status=403)
+    if WEBHOOK_PENDING >= WEBHOOK_MAX_PENDING:
+        # telegram retries later
+        return web.Response(status=429)
+    try:
+        update_json = await request.json()
+        update = types.Update(**update_json)
+    except (ValueError, TypeError) as e:
+        return web.Response(status=400)
+    chat_id = webhook_update_chat(update_json)
+    if chat_id is None:
+        chat_id = "UPDATE_" + str(update.update_id)
+    if chat_id not in WEBHOOK_CHAT_LOCKS:
+        WEBHOOK_CHAT_LOCKS[chat_id] = [asyncio.Lock(), 0]
+    WEBHOOK_CHAT_LOCKS[chat_id][1] += 1
+    WEBHOOK_PENDING += 1
+    asyncio.ensure_future(webhook_process_update(chat_id, update))
+    return web.Response()
+
+
+async def webhook_on_startup(app):
+    global WEBHOOK_LIMIT
+    WEBHOOK_LIMIT = asyncio.Semaphore(WEBHOOK_CONCURRENT)
+    asyncio.ensure_future(notify_new_tx_user())
+    asyncio.ensure_future(notify_new_move_balance_user())
+    await bot.set_webhook(WEBHOOK_URL, drop_pending_updates=True, max_connections=WEBHOOK_CONCURRENT,
+                          secret_token=WEBHOOK_SECRET)
+
+
+async def webhook_on_shutdown(app):
+    await bot.delete_webhook()
+
+
 if __name__ == '__main__':
-    loop = asyncio.get_event_loop()
-    loop.create_task(notify_new_tx_user())
-    loop.create_task(notify_new_move_balance_user())
-    executor.start_polling(dp, skip_updates=True)
+    if WEBHOOK_ENABLE:
+        if not WEBHOOK_URL:
+            print("telegram.webhook_url is required for webhook mode.")
+            sys.exit(1)
+        app = web.Application()
+        app.router.add_post(WEBHOOK_PATH, webhook_handler)
+        app.on_startup.append(webhook_on_startup)
+        app.on_shutdown.append(webhook_on_shutdown)
+        web.run_app(app, host=WEBAPP_HOST, port=WEBAPP_PORT)
+    else:
+        loop = asyncio.get_event_loop()
+        loop.create_task(notify_new_tx_user())
+        loop.create_task(notify_new_move_balance_user())
+        executor.start_polling(dp, skip_updates=True)
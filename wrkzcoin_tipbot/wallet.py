@@ -2,6 +2,7 @@ from discord_webhook import DiscordWebhook
 import discord
 
 from typing import List, Dict
+from collections import namedtuple
 import json
 from uuid import uuid4
 import rpc_client
@@ -19,7 +20,7 @@ FEE_PER_BYTE_COIN = config.Fee_Per_Byte_Coin.split(",")
 
 async def registerOTHER(coin: str) -> str:
     COIN_NAME = coin.upper()
-    coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+    coin_family = get_coin_family(COIN_NAME)
     reg_address = {}
     if coin_family == "XMR":
         payload = {
@@ -62,7 +63,7 @@ async def getSpendKey(from_address: str, coin: str) -> str:
 
 async def send_transaction(from_address: str, to_address: str, amount: int, coin: str, acc_index: int = None) -> str:
     COIN_NAME = coin.upper()
-    coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+    coin_family = get_coin_family(COIN_NAME)
     result = None
     time_out = 64
     if COIN_NAME == "DEGO":
@@ -177,7 +178,7 @@ async def send_transactionall(from_address: str, to_address, coin: str, acc_inde
     COIN_NAME = coin.upper()
     if COIN_NAME == "DEGO":
         time_out = 300
-    coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+    coin_family = get_coin_family(COIN_NAME)
     result = None
     if coin_family == "TRTL" or coin_family == "BCN":
         if COIN_NAME not in FEE_PER_BYTE_COIN:
@@ -220,7 +221,7 @@ async def send_transactionall(from_address: str, to_address, coin: str, acc_inde
 
 async def send_transaction_offchain(from_address: str, to_address: str, amount: int, coin: str, acc_index: int = None) -> str:
     COIN_NAME = coin.upper()
-    coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+    coin_family = get_coin_family(COIN_NAME)
     result = None
     time_out = 64
     if COIN_NAME == "DEGO":
@@ -286,7 +287,7 @@ async def get_sum_balances(coin: str) -> Dict[str, Dict]:
 
 async def get_balance_address(address: str, coin: str, acc_index: int = None) -> Dict[str, Dict]:
     coin = coin.upper()
-    coin_family = getattr(getattr(config,"daemon"+coin),"coin_family","TRTL")
+    coin_family = get_coin_family(coin)
     if coin_family == "XMR":
         if acc_index is None:
             acc_index = 0
@@ -305,7 +306,7 @@ async def get_balance_address(address: str, coin: str, acc_index: int = None) ->
 
 async def rpc_cn_wallet_save(coin: str):
     COIN_NAME = coin.upper()
-    coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+    coin_family = get_coin_family(COIN_NAME)
     start = time.time()
     if coin_family == "TRTL" or coin_family == "BCN":
         result = await rpc_client.call_aiohttp_wallet('save', coin)
@@ -452,7 +453,7 @@ async def doge_validaddress(address: str, coin: str) -> str:
 
 def get_wallet_api_url(coin: str):
     COIN_NAME = coin.upper()
-    coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+    coin_family = get_coin_family(COIN_NAME)
     if coin_family == "TRTL":
         return "http://"+getattr(config,"daemon"+COIN_NAME,config.daemonWRKZ).wallethost + ":" + \
             str(getattr(config,"daemon"+COIN_NAME,config.daemonWRKZ).walletport) \
@@ -463,72 +464,119 @@ def get_wallet_api_url(coin: str):
             + '/json_rpc'
 
 
+# Per coin settings, built once from config daemon<COIN> sections.
+# Helpers below are called many times per command, they read from here instead of
+# getattr(config, "daemon"+coin) and string branching on every call.
+COIN_META_FIELDS = ['coin_name', 'coin_family', 'mixin', 'decimal', 'AddrLen', 'IntAddrLen', 'prefix', 'prefixChar',
+                    'DonateAddress', 'DonateAccount', 'voucher_address', 'DiffTarget', 'tx_fee', 'node_tx_fee',
+                    'reserved_fee', 'voucher_fee', 'min_mv_amount', 'max_mv_amount', 'min_tx_amount', 'max_tx_amount',
+                    'voucher_min', 'voucher_max', 'min_deposit', 'IntervalOptimize', 'MinToOptimize', 'voucher_logo',
+                    'confirm_depth']
+CoinMeta = namedtuple('CoinMeta', COIN_META_FIELDS)
+
+
+def _num_format_style(COIN_NAME: str):
+    # (style, decimal) used by num_format_coin
+    if COIN_NAME in ["DOGE", "LTC", "BTC", "DASH", "BCH"]:
+        return ("DOGE", 1)
+    coin_decimal = _coin_meta(COIN_NAME).decimal
+    if COIN_NAME in config.Enable_Coin_ERC.split(",")+config.Enable_Coin_TRC.split(","):
+        return ("TOKEN", coin_decimal)
+    elif COIN_NAME in ["NANO", "BAN"]:
+        return ("NANO", coin_decimal)
+    elif COIN_NAME in ["WRKZ", "DEGO", "BTCMZ", "NIMB", "TRTL"]:
+        return ("2DP", coin_decimal)
+    return ("DEFAULT", coin_decimal)
+
+
+def build_coin_meta():
+    coin_meta = {}
+    for key, value in config.items():
+        if not key.startswith("daemon") or not isinstance(value, dict):
+            continue
+        COIN_NAME = key[len("daemon"):]
+        fields = {each: value.get(each) for each in COIN_META_FIELDS}
+        fields['coin_name'] = COIN_NAME
+        if fields['confirm_depth'] is not None and fields['coin_family'] != "NANO":
+            fields['confirm_depth'] = int(fields['confirm_depth'])
+        coin_meta[COIN_NAME] = CoinMeta(**fields)
+    return coin_meta
+
+
+def get_coin_family(coin: str, default: str = "TRTL"):
+    meta = COIN_META.get(coin)
+    if meta is None:
+        # Same error as getattr(config, "daemon"+coin) for unknown coin
+        raise AttributeError("daemon"+coin)
+    return meta.coin_family if meta.coin_family else default
+
+
+def _coin_meta(coin: str):
+    # Same fallback as getattr(config, "daemon"+coin, config.daemonWRKZ)
+    meta = COIN_META.get(coin)
+    if meta is None:
+        meta = COIN_META['WRKZ']
+    return meta
+
+
+COIN_META = build_coin_meta()
+NUM_FORMAT = {coin: _num_format_style(coin) for coin in list(COIN_META.keys()) + config.Enable_Coin_ERC.split(",") + config.Enable_Coin_TRC.split(",")}
+
+
 def get_mixin(coin: str = None):
-    return getattr(config,"daemon"+coin,config.daemonWRKZ).mixin
+    return _coin_meta(coin).mixin
 
 
 def get_decimal(coin: str = None):
-    return getattr(config,"daemon"+coin,config.daemonWRKZ).decimal
+    return _coin_meta(coin).decimal
 
 
 def get_addrlen(coin: str = None):
-    return getattr(config,"daemon"+coin,config.daemonWRKZ).AddrLen
+    return _coin_meta(coin).AddrLen
 
 
 def get_intaddrlen(coin: str = None):
-    return getattr(config,"daemon"+coin,config.daemonWRKZ).IntAddrLen
+    return _coin_meta(coin).IntAddrLen
 
 
 def get_prefix(coin: str = None):
-    return getattr(config,"daemon"+coin,config.daemonWRKZ).prefix
+    return _coin_meta(coin).prefix
 
 
 def get_prefix_char(coin: str = None):
-    return getattr(config,"daemon"+coin,config.daemonWRKZ).prefixChar
+    return _coin_meta(coin).prefixChar
 
 
 def get_donate_address(coin: str = None):
-    return getattr(config,"daemon"+coin,config.daemonWRKZ).DonateAddress
+    return _coin_meta(coin).DonateAddress
 
 def get_donate_account_name(coin: str):
-    return getattr(config,"daemon"+coin).DonateAccount
+    return COIN_META[coin].DonateAccount
 
 
 def get_voucher_address(coin: str = None):
-    return getattr(config,"daemon"+coin,config.daemonWRKZ).voucher_address
+    return _coin_meta(coin).voucher_address
 
 
 def get_diff_target(coin: str = None):
-    return getattr(config,"daemon"+coin,config.daemonWRKZ).DiffTarget
+    return _coin_meta(coin).DiffTarget
 
 
 def get_tx_fee(coin: str):
-    COIN_NAME = coin.upper()
-    coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
-    if coin_family == "TRTL" or coin_family == "BCN" or coin_family == "DOGE" or coin_family == "LTC":
-        return getattr(config,"daemon"+coin,config.daemonWRKZ).tx_fee        
-    elif coin_family == "XMR":
-        return getattr(config,"daemon"+coin,config.daemonWRKZ).tx_fee
-    elif coin_family == "XCH":
-        return getattr(config,"daemon"+coin,config.daemonWRKZ).tx_fee
+    coin_family = get_coin_family(coin.upper())
+    if coin_family in ["TRTL", "BCN", "DOGE", "LTC", "XMR", "XCH"]:
+        return _coin_meta(coin).tx_fee
 
 
 def get_tx_node_fee(coin: str):
-    COIN_NAME = coin.upper()
-    coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
-    if coin_family == "TRTL" or coin_family == "BCN" or coin_family == "DOGE" or coin_family == "LTC":
-        return getattr(config,"daemon"+coin,config.daemonWRKZ).node_tx_fee        
-    elif coin_family == "XMR":
-        return getattr(config,"daemon"+coin,config.daemonWRKZ).node_tx_fee
-    elif coin_family == "XCH":
-        return getattr(config,"daemon"+coin,config.daemonWRKZ).node_tx_fee
-    elif coin_family == "NANO":
-        return getattr(config,"daemon"+coin,config.daemonWRKZ).node_tx_fee
+    coin_family = get_coin_family(coin.upper())
+    if coin_family in ["TRTL", "BCN", "DOGE", "LTC", "XMR", "XCH", "NANO"]:
+        return _coin_meta(coin).node_tx_fee
 
 async def get_tx_fee_xmr(coin: str, amount: int = None, to_address: str = None):
     COIN_NAME = coin.upper()
     timeout = 64
-    coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","XMR")      
+    coin_family = get_coin_family(COIN_NAME, "XMR")      
     if coin_family == "XMR":
         if COIN_NAME in ["XAM"]:
             payload = {
@@ -576,70 +624,70 @@ async def get_tx_fee_xmr(coin: str, amount: int = None, to_address: str = None):
 
 
 def get_reserved_fee(coin: str = None):
-    return getattr(config,"daemon"+coin,config.daemonWRKZ).reserved_fee
+    return _coin_meta(coin).reserved_fee
 
 
 def get_voucher_fee(coin: str = None):
-    return getattr(config,"daemon"+coin,config.daemonWRKZ).voucher_fee
+    return _coin_meta(coin).voucher_fee
 
 
 def get_min_mv_amount(coin: str = None):
-    return getattr(config,"daemon"+coin,config.daemonWRKZ).min_mv_amount
+    return _coin_meta(coin).min_mv_amount
 
 
 def get_max_mv_amount(coin: str = None):
-    return getattr(config,"daemon"+coin,config.daemonWRKZ).max_mv_amount
+    return _coin_meta(coin).max_mv_amount
 
 
 def get_min_tx_amount(coin: str = None):
-    return getattr(config,"daemon"+coin,config.daemonWRKZ).min_tx_amount
+    return _coin_meta(coin).min_tx_amount
 
 
 def get_max_tx_amount(coin: str = None):
-    return getattr(config,"daemon"+coin,config.daemonWRKZ).max_tx_amount
+    return _coin_meta(coin).max_tx_amount
 
 
 def get_min_voucher_amount(coin: str = None):
-    return getattr(config,"daemon"+coin,config.daemonWRKZ).voucher_min
+    return _coin_meta(coin).voucher_min
 
 
 def get_max_voucher_amount(coin: str = None):
-    return getattr(config,"daemon"+coin,config.daemonWRKZ).voucher_max
+    return _coin_meta(coin).voucher_max
 
 
 def get_min_deposit_amount(coin: str = None):
-    return getattr(config,"daemon"+coin,config.daemonWRKZ).min_deposit
+    return _coin_meta(coin).min_deposit
 
 
 def get_interval_opt(coin: str = None):
-    return getattr(config,"daemon"+coin,config.daemonWRKZ).IntervalOptimize
+    return _coin_meta(coin).IntervalOptimize
 
 
 def get_min_opt(coin: str = None):
-    return getattr(config,"daemon"+coin,config.daemonWRKZ).MinToOptimize
+    return _coin_meta(coin).MinToOptimize
 
 
 def get_coinlogo_path(coin: str = None):
-    return config.qrsettings.coin_logo_path + getattr(config,"daemon"+coin,config.daemonWRKZ).voucher_logo
+    return config.qrsettings.coin_logo_path + _coin_meta(coin).voucher_logo
 
 
 def num_format_coin(amount, coin: str):
     COIN_NAME = coin.upper() 
     if amount == 0:
         return "0.0"
-    if COIN_NAME in ["DOGE", "LTC", "BTC", "DASH", "BCH"]:
-        coin_decimal = 1
-    else:
-        coin_decimal = get_decimal(COIN_NAME)
+    num_format = NUM_FORMAT.get(COIN_NAME)
+    if num_format is None:
+        num_format = _num_format_style(COIN_NAME)
+    coin_decimal = num_format[1]
     amount_str = 'Invalid.'
-    if COIN_NAME in ["DOGE", "LTC", "BTC", "DASH", "BCH"]:
+    if num_format[0] == "DOGE":
         amount_test = '{:,f}'.format(float(('%f' % amount).rstrip('0').rstrip('.')))
         if '.' in amount_test and len(amount_test.split('.')[1]) > 6:
             amount_str = '{:,.6f}'.format(amount)
         else:
             amount_str = amount_test
         #return '{:,}'.format(float('%.8g' % (amount)))
-    elif COIN_NAME in config.Enable_Coin_ERC.split(",")+config.Enable_Coin_TRC.split(","):
+    elif num_format[0] == "TOKEN":
         # Use amount real
         # return '{:,.6f}'.format(amount)
         amount_test = '{:,f}'.format(float(('%f' % amount).rstrip('0').rstrip('.')))
@@ -647,14 +695,14 @@ def num_format_coin(amount, coin: str):
             amount_str = '{:,.6f}'.format(amount)
         else:
             amount_str = amount_test
-    elif COIN_NAME in ["NANO", "BAN"]:
+    elif num_format[0] == "NANO":
         #return '{:,.8f}'.format(amount / coin_decimal)
         amount_test = '{:,f}'.format(float(('%f' % (amount / coin_decimal)).rstrip('0').rstrip('.')))
         if '.' in amount_test and len(amount_test.split('.')[1]) > 5:
             amount_str = '{:,.5f}'.format(amount / coin_decimal)
         else:
             amount_str = amount_test
-    elif COIN_NAME in ["WRKZ", "DEGO", "BTCMZ", "NIMB", "TRTL"]:
+    elif num_format[0] == "2DP":
         amount_str = '{:,.2f}'.format(amount / coin_decimal)
     else:
         # return '{:,.8f}'.format(float('%.8g' % (amount / coin_decimal)))
@@ -668,7 +716,7 @@ def num_format_coin(amount, coin: str):
 
 # XMR
 async def validate_address_xmr(address: str, coin: str):
-    coin_family = getattr(getattr(config,"daemon"+coin),"coin_family","XMR")
+    coin_family = get_coin_family(coin, "XMR")
     # different tatic for Lethean
     if coin.upper() == "LTHN":
         if len(address) != get_addrlen(coin.upper()) and len(address) != get_intaddrlen(coin.upper()):
@@ -717,9 +765,13 @@ async def validate_address_xmr(address: str, coin: str):
     return None
 
 
+# coin => integrated address prefix, once checked against wallet make_integrated_address
+XMR_INT_PREFIX = {}
+
+
 async def make_integrated_address_xmr(address: str, coin: str, paymentid: str = None):
     COIN_NAME = coin.upper()
-    coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","XMR")
+    coin_family = get_coin_family(COIN_NAME, "XMR")
     if paymentid:
         try:
             value = int(paymentid, 16)
@@ -737,12 +789,22 @@ async def make_integrated_address_xmr(address: str, coin: str, paymentid: str =
         else:
             return None
     elif coin_family == "XMR":
+        int_prefix = XMR_INT_PREFIX.get(COIN_NAME)
+        if int_prefix is not None:
+            return addressvalidation.make_integrated_xmr(address, int_prefix, paymentid)
         payload = {
             "standard_address" : address,
             "payment_id": {} or paymentid
         }
         address_ia = await rpc_client.call_aiohttp_wallet('make_integrated_address', COIN_NAME, payload=payload)
         if address_ia:
+            # Learn the integrated prefix from wallet once, use it only if local result is the same
+            int_prefix = getattr(getattr(config,"daemon"+COIN_NAME),"IntPrefix",None)
+            if int_prefix is None:
+                int_prefix = addressvalidation.integrated_prefix_xmr(address_ia['integrated_address'])
+            address_local = addressvalidation.make_integrated_xmr(address, int(int_prefix), address_ia['payment_id']) if int_prefix is not None else None
+            if address_local and address_local['integrated_address'] == address_ia['integrated_address']:
+                XMR_INT_PREFIX[COIN_NAME] = int(int_prefix)
             return address_ia
         else:
             return None
@@ -750,7 +812,7 @@ async def make_integrated_address_xmr(address: str, coin: str, paymentid: str =
 
 async def getTransactions(coin: str, firstBlockIndex: int=2000000, blockCount: int= 200000):
     COIN_NAME = coin.upper()
-    coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
+    coin_family = get_coin_family(COIN_NAME)
     result = None
     time_out = 64
     if coin_family == "TRTL" or coin_family == "BCN":
@@ -767,7 +829,7 @@ async def getTransactions(coin: str, firstBlockIndex: int=2000000, blockCount: i
 
 async def get_transfers_xmr(coin: str, height_start: int = None, height_end: int = None):
     COIN_NAME = coin.upper()
-    coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","XMR")
+    coin_family = get_coin_family(COIN_NAME, "XMR")
     if coin_family == "XMR":
         payload = None
         if height_start and height_end:
@@ -795,9 +857,4 @@ async def get_transfers_xmr(coin: str, height_start: int = None, height_end: int
 
 
 def get_confirm_depth(coin: str):
-    COIN_NAME = coin.upper()
-    coin_family = getattr(getattr(config,"daemon"+COIN_NAME),"coin_family","TRTL")
-    if coin_family == "NANO":
-        return getattr(config,"daemon"+COIN_NAME).confirm_depth
-    else:
-        return int(getattr(config,"daemon"+COIN_NAME).confirm_depth)
+    return COIN_META[coin.upper()].confirm_depth